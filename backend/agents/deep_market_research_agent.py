@@ -1,6 +1,8 @@
 from services.llm import get_sonar_pro_llm
 from utils.logger import setup_logger
-import json
+from utils.prompt_builder import PromptBuilder
+from utils.json_extract import extract_json, JsonExtractionError
+from models.schemas import DeepMarketResearch
 import time
 
 logger = setup_logger(__name__)
@@ -30,12 +32,15 @@ async def analyze_deep_market_research(data: dict) -> dict:
         description = crunchbase_data.get('description', '')
 
         # Construct comprehensive prompt for deep market research
-        prompt = f"""
+        # (name and description are stated on their own, so not repeated in the data)
+        builder = PromptBuilder("deep_market_research")
+        builder.add_json("company_data", crunchbase_data, priority=1, drop_keys=("name", "description"))
+        prompt = builder.render("""
         You are an expert venture capital market research analyst. Conduct comprehensive market research for this company:
 
         Company Name: {company_name}
         Description: {description}
-        Company Data: {json.dumps(crunchbase_data, indent=2)}
+        Company Data: {company_data}
 
         Provide deep market analysis with web-sourced competitive intelligence. Use your web search capabilities to find:
         - Recent market reports and data
@@ -105,31 +110,21 @@ async def analyze_deep_market_research(data: dict) -> dict:
 
         Ensure you provide at least 5-10 competitors in competitive_landscape, 5-7 trends in market_trends,
         and comprehensive citations in the sources array. Use "High", "Medium", or "Low" for impact/potential/severity fields.
-        """
+        """, company_name=company_name, description=description)
 
         logger.debug(f"Sending prompt to Perplexity Sonar Pro (length: {len(prompt)} chars)")
         logger.info("🌐 Querying web for market intelligence...")
 
         # Call Sonar Pro LLM with web search
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="deep_market_research")
         response_text = str(response)
 
         logger.debug(f"Received response (length: {len(response_text)} chars)")
-        logger.debug(f"Response preview: {response_text[:300]}...")
+        logger.debug("Response preview: %.300s...", response_text)
 
-        # Parse JSON response - handle multiple formats
+        # Parse JSON response (prose, code fences and common JSON slips are handled)
         try:
-            # Try to extract JSON from markdown code block
-            if '```json' in response_text:
-                json_object = response_text.split('```json')[1].split('```')[0].strip()
-                result = json.loads(json_object)
-            elif '```' in response_text:
-                # Try generic code block
-                json_object = response_text.split('```')[1].split('```')[0].strip()
-                result = json.loads(json_object)
-            else:
-                # Try parsing the entire response as JSON
-                result = json.loads(response_text.strip())
+            result = extract_json(response_text, DeepMarketResearch, agent="deep_market_research")
             
             logger.debug(f"Successfully parsed JSON response")
             
@@ -143,39 +138,43 @@ async def analyze_deep_market_research(data: dict) -> dict:
 
             return result
 
-        except (json.JSONDecodeError, IndexError, KeyError) as e:
+        except JsonExtractionError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Raw response: {response_text}")
 
-            # Return fallback structure
             logger.warning("⚠️  Returning fallback market research data")
-            return {
-                "market_overview": {
-                    "tam": "Data unavailable",
-                    "sam": "Data unavailable",
-                    "som": "Data unavailable",
-                    "sources": []
-                },
-                "competitive_landscape": [],
-                "market_trends": [],
-                "growth_trajectory": {
-                    "current_rate": "Unknown",
-                    "projected_rate": "Unknown",
-                    "key_drivers": []
-                },
-                "barriers_and_moats": {
-                    "entry_barriers": [],
-                    "company_moats": []
-                },
-                "regulatory_landscape": {
-                    "regulations": [],
-                    "compliance_requirements": []
-                },
-                "expansion_opportunities": [],
-                "market_risks": [],
-                "sources": []
-            }
+            return fallback_deep_market_research_result()
 
     except Exception as e:
         logger.error(f"❌ Deep Market Research analysis failed: {str(e)}", exc_info=True)
         raise
+
+
+def fallback_deep_market_research_result() -> dict:
+    """Placeholder deep market research used when the response was unusable (or the agent ran out of time)."""
+    return {
+        "market_overview": {
+            "tam": "Data unavailable",
+            "sam": "Data unavailable",
+            "som": "Data unavailable",
+            "sources": []
+        },
+        "competitive_landscape": [],
+        "market_trends": [],
+        "growth_trajectory": {
+            "current_rate": "Unknown",
+            "projected_rate": "Unknown",
+            "key_drivers": []
+        },
+        "barriers_and_moats": {
+            "entry_barriers": [],
+            "company_moats": []
+        },
+        "regulatory_landscape": {
+            "regulations": [],
+            "compliance_requirements": []
+        },
+        "expansion_opportunities": [],
+        "market_risks": [],
+        "sources": []
+    }
@@ -1,9 +1,11 @@
 from services.llm import get_sonar_llm
-from config import config
-from utils.logger import setup_logger
-import json
+from services.retrieval import get_agent_sources
+from utils.logger import setup_logger, lazy_json
+from utils.hedging import run_hedged
+from utils.prompt_builder import PromptBuilder
+from utils.json_extract import extract_json, JsonExtractionError
+from models.schemas import MarketData
 import time
-import httpx
 
 logger = setup_logger(__name__)
 
@@ -23,97 +25,55 @@ async def analyze_market_with_fireplexity(data: dict) -> dict:
         # Extract company name from crunchbase data
         company_name = data.get('crunchbase', {}).get('name', 'Unknown Company')
         
-        # Construct search query for market analysis
-        query = f"{company_name} market size competition trends industry analysis"
+        # Ranked slice from the workflow's shared retrieval stage, or this agent's own Firecrawl search
+        all_sources = await get_agent_sources(data, 'market')
         
-        logger.debug(f"Fireplexity search query: {query}")
+        if not all_sources:
+            logger.warning("No sources found from Firecrawl search")
+            raise Exception("No sources found")
+        
+        logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
+        
+        # Compact company data plus deduplicated sources, trimmed to the agent's token budget
+        builder = PromptBuilder("market")
+        builder.add_json("company_data", data.get('crunchbase', {}), priority=2)
+        builder.add_sources("sources", all_sources, max_chars=1000, priority=1)
+        
+        # Now use LLM to analyze the context
+        llm = get_sonar_llm(temperature=0.3)
+        
+        prompt = builder.render("""
+            You are a startup market analyst. Analyze the provided sources about {company_name} and extract:
+            - Overall market size and opportunity
+            - Competition level in this space
+            - Target customer segment
+            - Relevant market trends
+            - Market positioning and fit
+
+            Company Data: {company_data}
+
+            Sources:
+            {sources}
+
+            Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
+            {{
+                "market_size": "string describing TAM/market size",
+                "competition_level": "High" or "Medium" or "Low",
+                "target_segment": "string describing primary customer segment",
+                "market_trends": ["trend1", "trend2", "trend3"],
+                "summary": "string summarizing market opportunity and positioning"
+            }}
+            """, company_name=company_name)
+        
+        logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
+        response = await llm.acomplete(prompt, agent="market")
+        response_text = str(response)
+        
+        # Parse JSON response
+        result = extract_json(response_text, MarketData, agent="market")
+        logger.info(f"✅ Fireplexity market analysis completed")
+        return result
         
-        # Call Firecrawl v2 search API directly
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                'https://api.firecrawl.dev/v2/search',
-                headers={
-                    'Authorization': f'Bearer {config.FIRECRAWL_API_KEY}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'query': query,
-                    'sources': ['web', 'news'],
-                    'limit': 5,
-                    'scrapeOptions': {
-                        'formats': ['markdown'],
-                        'onlyMainContent': True,
-                        'maxAge': 86400000  # 24 hours
-                    }
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                logger.warning(f"Firecrawl API returned status {response.status_code}: {error_data}")
-                raise Exception(f"Firecrawl API error: {response.status_code}")
-            
-            search_result = response.json()
-            search_data = search_result.get('data', {})
-            
-            # Extract sources from search results
-            sources = search_data.get('web', [])
-            news_sources = search_data.get('news', [])
-            all_sources = sources + news_sources
-            
-            if not all_sources:
-                logger.warning("No sources found from Firecrawl search")
-                raise Exception("No sources found")
-            
-            logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
-            
-            # Prepare context from sources
-            context = ""
-            for idx, source in enumerate(all_sources[:5], 1):
-                title = source.get('title', 'No title')
-                content = source.get('markdown', source.get('content', ''))[:1000]  # Limit content
-                context += f"[{idx}] {title}\n{content}\n\n"
-            
-            # Now use LLM to analyze the context
-            llm = get_sonar_llm(temperature=0.3)
-            
-            prompt = f"""
-                You are a startup market analyst. Analyze the provided sources about {company_name} and extract:
-                - Overall market size and opportunity
-                - Competition level in this space
-                - Target customer segment
-                - Relevant market trends
-                - Market positioning and fit
-
-                Company Data: {json.dumps(data.get('crunchbase', {}), indent=2)}
-
-                Sources:
-                {context}
-
-                Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
-                {{
-                    "market_size": "string describing TAM/market size",
-                    "competition_level": "High" or "Medium" or "Low",
-                    "target_segment": "string describing primary customer segment",
-                    "market_trends": ["trend1", "trend2", "trend3"],
-                    "summary": "string summarizing market opportunity and positioning"
-                }}
-                """
-            
-            logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
-            response = await llm.acomplete(prompt)
-            response_text = str(response)
-            
-            # Parse JSON response
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(response_text)
-            logger.info(f"✅ Fireplexity market analysis completed")
-            return result
-            
     except Exception as e:
         logger.error(f"❌ Fireplexity analysis failed: {str(e)}")
         raise
@@ -135,8 +95,10 @@ async def analyze_market_with_perplexity(data: dict) -> dict:
         # Get LLM with slightly higher temperature for market context
         llm = get_sonar_llm(temperature=0.3)
 
-        # Construct prompt
-        prompt = f"""
+        # Construct prompt (compact company data within the agent's token budget)
+        builder = PromptBuilder("market")
+        builder.add_json("company_data", data.get('crunchbase', {}), priority=1)
+        prompt = builder.render("""
             You are a startup market analyst. Analyze the provided data and extract:
             - Overall market size and opportunity
             - Competition level in this space
@@ -144,7 +106,7 @@ async def analyze_market_with_perplexity(data: dict) -> dict:
             - Relevant market trends
             - Market positioning and fit
 
-            Company Data: {json.dumps(data.get('crunchbase', {}), indent=2)}
+            Company Data: {company_data}
 
             Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
             {{
@@ -154,28 +116,22 @@ async def analyze_market_with_perplexity(data: dict) -> dict:
                 "market_trends": ["trend1", "trend2", "trend3"],
                 "summary": "string summarizing market opportunity and positioning"
             }}
-            """
+            """)
 
         logger.debug(f"Sending prompt to Perplexity Sonar (length: {len(prompt)} chars)")
 
         # Call LLM
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="market")
         response_text = str(response)
 
         logger.debug(f"Received response (length: {len(response_text)} chars)")
 
         # Parse JSON response
         try:
-            # Try to extract JSON from response (in case there's markdown formatting)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(response_text)
+            result = extract_json(response_text, MarketData, agent="market")
             logger.info(f"✅ Perplexity market analysis completed")
             return result
-        except json.JSONDecodeError as e:
+        except JsonExtractionError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Raw response: {response_text}")
             raise
@@ -187,7 +143,7 @@ async def analyze_market_with_perplexity(data: dict) -> dict:
 
 async def analyze_market(data: dict) -> dict:
     """
-    Analyze company market. Tries Fireplexity first, falls back to Perplexity.
+    Analyze company market. Fireplexity is the primary path, Perplexity the hedged fallback (HEDGE_MODE).
 
     Args:
         data: Dict with keys: crunchbase, reddit, website, news
@@ -200,28 +156,27 @@ async def analyze_market(data: dict) -> dict:
     start_time = time.time()
 
     try:
-        # Try Fireplexity first
-        try:
-            result = await analyze_market_with_fireplexity(data)
-            logger.info(f"✅ Market analysis completed with Fireplexity in {time.time() - start_time:.2f}s")
-            logger.debug(f"Market result: {json.dumps(result, indent=2)}")
-            return result
-        except Exception as fireplexity_error:
-            logger.warning(f"Fireplexity failed, falling back to Perplexity: {str(fireplexity_error)}")
-            
-            # Fallback to Perplexity
-            result = await analyze_market_with_perplexity(data)
-            logger.info(f"✅ Market analysis completed with Perplexity (fallback) in {time.time() - start_time:.2f}s")
-            logger.debug(f"Market result: {json.dumps(result, indent=2)}")
-            return result
+        # Fireplexity primary, Perplexity fallback hedged per HEDGE_MODE
+        result = await run_hedged(
+            "market",
+            lambda: analyze_market_with_fireplexity(data),
+            lambda: analyze_market_with_perplexity(data)
+        )
+        logger.info(f"✅ Market analysis completed in {time.time() - start_time:.2f}s")
+        logger.debug("Market result: %s", lazy_json(result))
+        return result
 
     except Exception as e:
         logger.error(f"❌ All market analysis methods failed: {str(e)}", exc_info=True)
-        # Return fallback structure
-        return {
-            "market_size": "Unable to determine",
-            "competition_level": "Medium",
-            "target_segment": "Unable to determine",
-            "market_trends": [],
-            "summary": "Unable to extract market data from available sources"
-        }
+        return fallback_market_result()
+
+
+def fallback_market_result() -> dict:
+    """Placeholder MarketData dict used when no analysis path succeeded (or the agent ran out of time)."""
+    return {
+        "market_size": "Unable to determine",
+        "competition_level": "Medium",
+        "target_segment": "Unable to determine",
+        "market_trends": [],
+        "summary": "Unable to extract market data from available sources"
+    }
@@ -1,9 +1,11 @@
 from services.llm import get_sonar_llm
-from config import config
-from utils.logger import setup_logger
-import json
+from services.retrieval import get_agent_sources
+from utils.logger import setup_logger, lazy_json
+from utils.hedging import run_hedged
+from utils.prompt_builder import PromptBuilder
+from utils.json_extract import extract_json, JsonExtractionError
+from models.schemas import RiskData
 import time
-import httpx
 
 logger = setup_logger(__name__)
 
@@ -24,99 +26,57 @@ async def analyze_risks_with_fireplexity(data: dict) -> dict:
         # Extract company name from crunchbase data
         company_name = data.get('crunchbase', {}).get('name', 'Unknown Company')
         
-        # Construct search query for risk analysis
-        query = f"{company_name} risks challenges problems controversies failures issues concerns"
+        # Ranked slice from the workflow's shared retrieval stage, or this agent's own Firecrawl search
+        all_sources = await get_agent_sources(data, 'risks')
         
-        logger.debug(f"Fireplexity search query: {query}")
+        if not all_sources:
+            logger.warning("No sources found from Firecrawl search")
+            raise Exception("No sources found")
+        
+        logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
+        
+        # Compact company data plus deduplicated sources, trimmed to the agent's token budget
+        builder = PromptBuilder("risks")
+        builder.add_json("company_data", data.get('crunchbase', {}), priority=2)
+        builder.add_sources("sources", all_sources, max_chars=1000, priority=1)
+        
+        # Now use LLM to analyze the context
+        llm = get_sonar_llm(temperature=0.2)
+        
+        prompt = builder.render("""
+        You are a startup risk analyst specializing in venture capital due diligence. Analyze the provided sources about {company_name} and identify:
+        - Technical risks and challenges
+        - Market and competitive risks
+        - Team and execution risks
+        - Financial risks and concerns
+        - Any red flags or warning signs
+
+        Company Data: {company_data}
+
+        Sources:
+        {sources}
+
+        Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
+        {{
+            "technical_risks": ["risk1", "risk2", "risk3"],
+            "market_risks": ["risk1", "risk2", "risk3"],
+            "team_risks": ["risk1", "risk2"],
+            "financial_risks": ["risk1", "risk2"],
+            "red_flags": ["flag1", "flag2"],
+            "overall_risk_level": "High" or "Medium" or "Low",
+            "summary": "string summarizing key risks and concerns"
+        }}
+        """, company_name=company_name)
+        
+        logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
+        response = await llm.acomplete(prompt, agent="risks")
+        response_text = str(response)
+        
+        # Parse JSON response
+        result = extract_json(response_text, RiskData, agent="risks")
+        logger.info(f"✅ Fireplexity risk analysis completed")
+        return result
         
-        # Call Firecrawl v2 search API directly
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                'https://api.firecrawl.dev/v2/search',
-                headers={
-                    'Authorization': f'Bearer {config.FIRECRAWL_API_KEY}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'query': query,
-                    'sources': ['web', 'news'],
-                    'limit': 5,
-                    'scrapeOptions': {
-                        'formats': ['markdown'],
-                        'onlyMainContent': True,
-                        'maxAge': 86400000  # 24 hours
-                    }
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                logger.warning(f"Firecrawl API returned status {response.status_code}: {error_data}")
-                raise Exception(f"Firecrawl API error: {response.status_code}")
-            
-            search_result = response.json()
-            search_data = search_result.get('data', {})
-            
-            # Extract sources from search results
-            sources = search_data.get('web', [])
-            news_sources = search_data.get('news', [])
-            all_sources = sources + news_sources
-            
-            if not all_sources:
-                logger.warning("No sources found from Firecrawl search")
-                raise Exception("No sources found")
-            
-            logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
-            
-            # Prepare context from sources
-            context = ""
-            for idx, source in enumerate(all_sources[:5], 1):
-                title = source.get('title', 'No title')
-                content = source.get('markdown', source.get('content', ''))[:1000]  # Limit content
-                context += f"[{idx}] {title}\n{content}\n\n"
-            
-            # Now use LLM to analyze the context
-            llm = get_sonar_llm(temperature=0.2)
-            
-            prompt = f"""
-            You are a startup risk analyst specializing in venture capital due diligence. Analyze the provided sources about {company_name} and identify:
-            - Technical risks and challenges
-            - Market and competitive risks
-            - Team and execution risks
-            - Financial risks and concerns
-            - Any red flags or warning signs
-
-            Company Data: {json.dumps(data.get('crunchbase', {}), indent=2)}
-
-            Sources:
-            {context}
-
-            Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
-            {{
-                "technical_risks": ["risk1", "risk2", "risk3"],
-                "market_risks": ["risk1", "risk2", "risk3"],
-                "team_risks": ["risk1", "risk2"],
-                "financial_risks": ["risk1", "risk2"],
-                "red_flags": ["flag1", "flag2"],
-                "overall_risk_level": "High" or "Medium" or "Low",
-                "summary": "string summarizing key risks and concerns"
-            }}
-            """
-            
-            logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
-            response = await llm.acomplete(prompt)
-            response_text = str(response)
-            
-            # Parse JSON response
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-            
-            result = json.loads(response_text)
-            logger.info(f"✅ Fireplexity risk analysis completed")
-            return result
-            
     except Exception as e:
         logger.error(f"❌ Fireplexity analysis failed: {str(e)}")
         raise
@@ -138,8 +98,10 @@ async def analyze_risks_with_perplexity(data: dict) -> dict:
         # Get LLM with low temperature for consistent risk assessment
         llm = get_sonar_llm(temperature=0.2)
 
-        # Construct prompt
-        prompt = f"""
+        # Construct prompt (compact company data within the agent's token budget)
+        builder = PromptBuilder("risks")
+        builder.add_json("company_data", data.get('crunchbase', {}), priority=1)
+        prompt = builder.render("""
             You are a startup risk analyst specializing in venture capital due diligence. Analyze the provided data and identify:
             - Technical risks and challenges
             - Market and competitive risks
@@ -147,7 +109,7 @@ async def analyze_risks_with_perplexity(data: dict) -> dict:
             - Financial risks and concerns
             - Any red flags or warning signs
 
-            Company Data: {json.dumps(data.get('crunchbase', {}), indent=2)}
+            Company Data: {company_data}
 
             Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
             {{
@@ -159,28 +121,22 @@ async def analyze_risks_with_perplexity(data: dict) -> dict:
                 "overall_risk_level": "High" or "Medium" or "Low",
                 "summary": "string summarizing key risks and concerns"
             }}
-            """
+            """)
 
         logger.debug(f"Sending prompt to Perplexity Sonar (length: {len(prompt)} chars)")
 
         # Call LLM
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="risks")
         response_text = str(response)
 
         logger.debug(f"Received response (length: {len(response_text)} chars)")
 
         # Parse JSON response
         try:
-            # Try to extract JSON from response (in case there's markdown formatting)
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            result = json.loads(response_text)
+            result = extract_json(response_text, RiskData, agent="risks")
             logger.info(f"✅ Perplexity risk analysis completed")
             return result
-        except json.JSONDecodeError as e:
+        except JsonExtractionError as e:
             logger.error(f"Failed to parse LLM response as JSON: {e}")
             logger.error(f"Raw response: {response_text}")
             raise
@@ -192,7 +148,7 @@ async def analyze_risks_with_perplexity(data: dict) -> dict:
 
 async def analyze_risks(data: dict) -> dict:
     """
-    Analyze company risks. Tries Fireplexity first, falls back to Perplexity.
+    Analyze company risks. Fireplexity is the primary path, Perplexity the hedged fallback (HEDGE_MODE).
 
     Args:
         data: Dict with keys: crunchbase, reddit, website, news
@@ -205,30 +161,29 @@ async def analyze_risks(data: dict) -> dict:
     start_time = time.time()
 
     try:
-        # Try Fireplexity first
-        try:
-            result = await analyze_risks_with_fireplexity(data)
-            logger.info(f"✅ Risk analysis completed with Fireplexity in {time.time() - start_time:.2f}s")
-            logger.debug(f"Risk result: {json.dumps(result, indent=2)}")
-            return result
-        except Exception as fireplexity_error:
-            logger.warning(f"Fireplexity failed, falling back to Perplexity: {str(fireplexity_error)}")
-            
-            # Fallback to Perplexity
-            result = await analyze_risks_with_perplexity(data)
-            logger.info(f"✅ Risk analysis completed with Perplexity (fallback) in {time.time() - start_time:.2f}s")
-            logger.debug(f"Risk result: {json.dumps(result, indent=2)}")
-            return result
+        # Fireplexity primary, Perplexity fallback hedged per HEDGE_MODE
+        result = await run_hedged(
+            "risks",
+            lambda: analyze_risks_with_fireplexity(data),
+            lambda: analyze_risks_with_perplexity(data)
+        )
+        logger.info(f"✅ Risk analysis completed in {time.time() - start_time:.2f}s")
+        logger.debug("Risk result: %s", lazy_json(result))
+        return result
 
     except Exception as e:
         logger.error(f"❌ All risk analysis methods failed: {str(e)}", exc_info=True)
-        # Return fallback structure
-        return {
-            "technical_risks": ["Unable to assess technical risks"],
-            "market_risks": ["Unable to assess market risks"],
-            "team_risks": ["Unable to assess team risks"],
-            "financial_risks": ["Unable to assess financial risks"],
-            "red_flags": [],
-            "overall_risk_level": "Medium",
-            "summary": "Unable to extract risk data from available sources"
-        }
+        return fallback_risk_result()
+
+
+def fallback_risk_result() -> dict:
+    """Placeholder RiskData dict used when no analysis path succeeded (or the agent ran out of time)."""
+    return {
+        "technical_risks": ["Unable to assess technical risks"],
+        "market_risks": ["Unable to assess market risks"],
+        "team_risks": ["Unable to assess team risks"],
+        "financial_risks": ["Unable to assess financial risks"],
+        "red_flags": [],
+        "overall_risk_level": "Medium",
+        "summary": "Unable to extract risk data from available sources"
+    }
@@ -1,20 +1,35 @@
 from services.llm import get_sonar_llm, get_sonar_pro_llm
-from config import config
-from utils.logger import setup_logger
-import json
+from services.retrieval import search_agent_sources
+from typing import Dict, List, Optional
+from utils.logger import setup_logger, lazy_json
+from utils.hedging import run_hedged
+from utils.prompt_builder import PromptBuilder
+from utils.json_extract import extract_json, JsonExtractionError
+from models.schemas import SynthesisOutput
 import time
-import httpx
 
 logger = setup_logger(__name__)
 
 
+def _analyses_prompt_builder(traction: dict, team: dict, market: dict, deep_market_research: dict, risks: dict) -> PromptBuilder:
+    """Synthesis prompt sections for the agent outputs; deep research (the largest) is trimmed before the others."""
+    builder = PromptBuilder("synthesis")
+    builder.add_json("traction", traction, priority=3)
+    builder.add_json("team", team, priority=3)
+    builder.add_json("market", market, priority=3)
+    builder.add_json("deep_market_research", deep_market_research, priority=2)
+    builder.add_json("risks", risks, priority=3)
+    return builder
+
+
 async def synthesize_analysis_with_fireplexity(
     traction: dict,
     team: dict,
     market: dict,
     deep_market_research: dict,
     risks: dict,
-    company_name: str
+    company_name: str,
+    sources: Optional[List[Dict]] = None
 ) -> dict:
     """
     Synthesize all analyses into final investment report using Firecrawl search (Fireplexity approach).
@@ -26,6 +41,8 @@ async def synthesize_analysis_with_fireplexity(
         deep_market_research: Deep market research results
         risks: Risk analysis results
         company_name: Name of the company
+        sources: Synthesis slice from the workflow's shared retrieval stage
+                 (default: run the synthesis search here)
         
     Returns:
         Dict with indicators and outlook
@@ -33,80 +50,42 @@ async def synthesize_analysis_with_fireplexity(
     logger.info("🔥 Using Fireplexity (Firecrawl search) for synthesis analysis")
     
     try:
-        # Construct search query for investment insights and similar companies
-        query = f"{company_name} investment analysis valuation funding investors industry outlook"
+        # Shared retrieval slice, or our own Firecrawl search for investment insights
+        all_sources = sources if sources is not None else await search_agent_sources('synthesis', company_name)
+        
+        if not all_sources:
+            logger.warning("No sources found from Firecrawl search")
+            raise Exception("No sources found")
         
-        logger.debug(f"Fireplexity search query: {query}")
+        logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
         
-        # Call Firecrawl v2 search API directly
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                'https://api.firecrawl.dev/v2/search',
-                headers={
-                    'Authorization': f'Bearer {config.FIRECRAWL_API_KEY}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'query': query,
-                    'sources': ['web', 'news'],
-                    'limit': 5,
-                    'scrapeOptions': {
-                        'formats': ['markdown'],
-                        'onlyMainContent': True,
-                        'maxAge': 86400000  # 24 hours
-                    }
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json() if response.text else {}
-                logger.warning(f"Firecrawl API returned status {response.status_code}: {error_data}")
-                raise Exception(f"Firecrawl API error: {response.status_code}")
-            
-            search_result = response.json()
-            search_data = search_result.get('data', {})
-            
-            # Extract sources from search results
-            sources = search_data.get('web', [])
-            news_sources = search_data.get('news', [])
-            all_sources = sources + news_sources
-            
-            if not all_sources:
-                logger.warning("No sources found from Firecrawl search")
-                raise Exception("No sources found")
-            
-            logger.info(f"✅ Found {len(all_sources)} sources from Firecrawl")
-            
-            # Prepare context from sources
-            context = ""
-            for idx, source in enumerate(all_sources[:5], 1):
-                title = source.get('title', 'No title')
-                content = source.get('markdown', source.get('content', ''))[:800]  # Limit content
-                context += f"[{idx}] {title}\n{content}\n\n"
-            
-            # Now use LLM to synthesize with external context
-            llm = get_sonar_pro_llm(temperature=0.3)
-            
-            prompt = f"""
+        # Compact agent outputs plus deduplicated sources, trimmed to the synthesis token budget
+        builder = _analyses_prompt_builder(traction, team, market, deep_market_research, risks)
+        builder.add_sources("sources", all_sources, max_chars=800, priority=1)
+        
+        # Now use LLM to synthesize with external context
+        llm = get_sonar_pro_llm(temperature=0.3)
+        
+        prompt = builder.render("""
 You are an expert venture capital analyst. Synthesize these analyses into a final investment thesis for {company_name}.
 
 TRACTION ANALYSIS:
-{json.dumps(traction, indent=2)}
+{traction}
 
 TEAM ANALYSIS:
-{json.dumps(team, indent=2)}
+{team}
 
 MARKET ANALYSIS (BASIC):
-{json.dumps(market, indent=2)}
+{market}
 
 DEEP MARKET RESEARCH (with web sources):
-{json.dumps(deep_market_research, indent=2)}
+{deep_market_research}
 
 RISK ANALYSIS:
-{json.dumps(risks, indent=2)}
+{risks}
 
 EXTERNAL MARKET INTELLIGENCE:
-{context}
+{sources}
 
 Based on all the above analyses and external market intelligence, provide:
 
@@ -123,23 +102,23 @@ Based on all the above analyses and external market intelligence, provide:
 
 Output valid JSON matching this exact schema:
 {{
-    "indicators": {{
-        "growth": 0-100,
-        "team": 0-100,
-        "market": 0-100,
-        "product": 0-100
-    }},
-    "outlook": {{
-        "overall": "Strong" | "Moderate" | "Weak",
-        "summary": "Comprehensive investment thesis summary",
-        "keyPoints": [
-            "Key insight 1",
-            "Key insight 2",
-            "Key insight 3",
-            "Key insight 4",
-            "Key insight 5"
-        ]
-    }}
+"indicators": {{
+    "growth": 0-100,
+    "team": 0-100,
+    "market": 0-100,
+    "product": 0-100
+}},
+"outlook": {{
+    "overall": "Strong" | "Moderate" | "Weak",
+    "summary": "Comprehensive investment thesis summary",
+    "keyPoints": [
+        "Key insight 1",
+        "Key insight 2",
+        "Key insight 3",
+        "Key insight 4",
+        "Key insight 5"
+    ]
+}}
 }}
 
 Guidelines for scoring:
@@ -154,28 +133,24 @@ Guidelines for outlook:
 - "Weak": Significant concerns, high risks, limited upside potential
 
 Ensure keyPoints are actionable and specific to this company's situation, incorporating insights from external sources.
-"""
-            
-            logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
-            response = await llm.acomplete(prompt)
-            response_text = str(response)
-            
-            # Parse JSON response
-            result = json.loads(response_text)
-            
-            # Validate structure
-            if 'indicators' not in result or 'outlook' not in result:
-                raise ValueError("Missing required fields in synthesis response")
-            
-            indicators = result['indicators']
-            outlook = result['outlook']
-            
-            logger.info(f"✅ Fireplexity synthesis completed")
-            logger.info(f"📊 Indicators - Growth: {indicators.get('growth', 0)}, Team: {indicators.get('team', 0)}, Market: {indicators.get('market', 0)}, Product: {indicators.get('product', 0)}")
-            logger.info(f"🎯 Overall Outlook: {outlook.get('overall', 'Unknown')}")
-            
-            return result
-            
+""", company_name=company_name)
+        
+        logger.debug(f"Sending prompt to LLM (length: {len(prompt)} chars)")
+        response = await llm.acomplete(prompt, agent="synthesis")
+        response_text = str(response)
+        
+        # Parse and validate JSON response
+        result = extract_json(response_text, SynthesisOutput, agent="synthesis")
+        
+        indicators = result['indicators']
+        outlook = result['outlook']
+        
+        logger.info(f"✅ Fireplexity synthesis completed")
+        logger.info(f"📊 Indicators - Growth: {indicators.get('growth', 0)}, Team: {indicators.get('team', 0)}, Market: {indicators.get('market', 0)}, Product: {indicators.get('product', 0)}")
+        logger.info(f"🎯 Overall Outlook: {outlook.get('overall', 'Unknown')}")
+        
+        return result
+        
     except Exception as e:
         logger.error(f"❌ Fireplexity synthesis failed: {str(e)}")
         raise
@@ -209,24 +184,25 @@ async def synthesize_analysis_with_perplexity(
         # Get Sonar LLM with moderate temperature for balanced synthesis
         llm = get_sonar_pro_llm(temperature=0.3)
 
-        # Construct comprehensive synthesis prompt
-        prompt = f"""
+        # Construct comprehensive synthesis prompt (compact agent outputs within the token budget)
+        builder = _analyses_prompt_builder(traction, team, market, deep_market_research, risks)
+        prompt = builder.render("""
 You are an expert venture capital analyst. Synthesize these analyses into a final investment thesis for {company_name}.
 
 TRACTION ANALYSIS:
-{json.dumps(traction, indent=2)}
+{traction}
 
 TEAM ANALYSIS:
-{json.dumps(team, indent=2)}
+{team}
 
 MARKET ANALYSIS (BASIC):
-{json.dumps(market, indent=2)}
+{market}
 
 DEEP MARKET RESEARCH (with web sources):
-{json.dumps(deep_market_research, indent=2)}
+{deep_market_research}
 
 RISK ANALYSIS:
-{json.dumps(risks, indent=2)}
+{risks}
 
 Based on all the above analyses, provide:
 
@@ -274,23 +250,19 @@ Guidelines for outlook:
 - "Weak": Significant concerns, high risks, limited upside potential
 
 Ensure keyPoints are actionable and specific to this company's situation.
-"""
+""", company_name=company_name)
 
         logger.debug(f"Sending synthesis prompt to Perplexity Sonar (length: {len(prompt)} chars)")
         logger.info("🔄 Synthesizing all analyses...")
 
         # Call LLM
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="synthesis")
         response_text = str(response)
 
         logger.debug(f"Received synthesis response (length: {len(response_text)} chars)")
 
-        # Parse JSON response
-        result = json.loads(response_text)
-
-        # Validate structure
-        if 'indicators' not in result or 'outlook' not in result:
-            raise ValueError("Missing required fields in synthesis response")
+        # Parse and validate JSON response
+        result = extract_json(response_text, SynthesisOutput, agent="synthesis")
 
         indicators = result['indicators']
         outlook = result['outlook']
@@ -302,7 +274,7 @@ Ensure keyPoints are actionable and specific to this company's situation.
 
         return result
 
-    except (json.JSONDecodeError, ValueError) as e:
+    except JsonExtractionError as e:
         logger.error(f"Failed to parse synthesis response: {e}")
         logger.error(f"Raw response: {response_text}")
         raise
@@ -317,10 +289,11 @@ async def synthesize_analysis(
     market: dict,
     deep_market_research: dict,
     risks: dict,
-    company_name: str
+    company_name: str,
+    sources: Optional[List[Dict]] = None
 ) -> dict:
     """
-    Synthesize all analyses into final investment report. Tries Fireplexity first, falls back to Perplexity.
+    Synthesize all analyses into final investment report. Fireplexity is the primary path, Perplexity the hedged fallback (HEDGE_MODE).
     Calculate indicators and generate overall outlook.
 
     Args:
@@ -330,6 +303,7 @@ async def synthesize_analysis(
         deep_market_research: Deep market research results
         risks: Risk analysis results
         company_name: Name of the company
+        sources: Synthesis slice from the workflow's shared retrieval stage (optional)
 
     Returns:
         Dict with indicators and outlook
@@ -339,76 +313,92 @@ async def synthesize_analysis(
     start_time = time.time()
 
     try:
-        # Try Fireplexity first
-        try:
-            result = await synthesize_analysis_with_fireplexity(
-                traction, team, market, deep_market_research, risks, company_name
-            )
-            logger.info(f"✅ Synthesis completed with Fireplexity in {time.time() - start_time:.2f}s")
-            logger.debug(f"Synthesis result: {json.dumps(result, indent=2)}")
-            return result
-        except Exception as fireplexity_error:
-            logger.warning(f"Fireplexity failed, falling back to Perplexity: {str(fireplexity_error)}")
-            
-            # Fallback to Perplexity
-            result = await synthesize_analysis_with_perplexity(
-                traction, team, market, deep_market_research, risks, company_name
-            )
-            logger.info(f"✅ Synthesis completed with Perplexity (fallback) in {time.time() - start_time:.2f}s")
-            logger.debug(f"Synthesis result: {json.dumps(result, indent=2)}")
-            return result
+        # Fireplexity primary, Perplexity fallback hedged per HEDGE_MODE
+        result = await run_hedged(
+            "synthesis",
+            lambda: synthesize_analysis_with_fireplexity(traction, team, market, deep_market_research, risks, company_name, sources),
+            lambda: synthesize_analysis_with_perplexity(traction, team, market, deep_market_research, risks, company_name)
+        )
+        logger.info(f"✅ Synthesis completed in {time.time() - start_time:.2f}s")
+        logger.debug("Synthesis result: %s", lazy_json(result))
+        return result
 
     except Exception as e:
         logger.error(f"❌ All synthesis methods failed: {str(e)}", exc_info=True)
         
         # Return fallback synthesis with basic scoring
         logger.warning("⚠️  Returning fallback synthesis with estimated scores")
+        return fallback_synthesis_result(traction, team, market, deep_market_research, risks, company_name)
+
+
+def fallback_synthesis_result(
+    traction: dict,
+    team: dict,
+    market: dict,
+    deep_market_research: dict,
+    risks: dict,
+    company_name: str
+) -> dict:
+    """
+    Estimated indicators and outlook when no synthesis path succeeded (or synthesis
+    ran out of time), scored from what the agent results contain.
 
-        # Calculate fallback scores based on available data
-        growth_score = 50  # Default moderate
-        team_score = 50
-        market_score = 50
-        product_score = 50
-
-        # Try to improve scores based on analysis content
-        if traction.get('revenue') or traction.get('users'):
-            growth_score = 60
-        if len(team.get('founders', [])) > 0:
-            team_score = 60
-        if market.get('market_size') and 'billion' in market.get('market_size', '').lower():
-            market_score = 65
-        if deep_market_research.get('competitive_landscape') and len(deep_market_research['competitive_landscape']) > 0:
-            market_score = 70
-        if risks.get('overall_risk_level') == 'Low':
-            product_score = 65
-        elif risks.get('overall_risk_level') == 'High':
-            product_score = 40
-
-        # Determine overall outlook
-        avg_score = (growth_score + team_score + market_score + product_score) / 4
-        if avg_score >= 70:
-            overall = "Strong"
-        elif avg_score >= 50:
-            overall = "Moderate"
-        else:
-            overall = "Weak"
-
-        return {
-            "indicators": {
-                "growth": growth_score,
-                "team": team_score,
-                "market": market_score,
-                "product": product_score
-            },
-            "outlook": {
-                "overall": overall,
-                "summary": f"Comprehensive analysis complete for {company_name}. Based on available data, the company shows {overall.lower()} potential.",
-                "keyPoints": [
-                    f"Traction: {traction.get('summary', 'Analyzed')}",
-                    f"Team: {team.get('summary', 'Analyzed')}",
-                    f"Market: {market.get('summary', 'Analyzed')}",
-                    f"Risk Level: {risks.get('overall_risk_level', 'Unknown')}",
-                    "Detailed synthesis unavailable - review individual sections"
-                ]
-            }
+    Args:
+        traction: Traction analysis results
+        team: Team analysis results
+        market: Market analysis results
+        deep_market_research: Deep market research results
+        risks: Risk analysis results
+        company_name: Name of the company
+
+    Returns:
+        Dict with indicators and outlook
+    """
+    # Calculate fallback scores based on available data
+    growth_score = 50  # Default moderate
+    team_score = 50
+    market_score = 50
+    product_score = 50
+
+    # Try to improve scores based on analysis content
+    if traction.get('revenue') or traction.get('users'):
+        growth_score = 60
+    if len(team.get('founders', [])) > 0:
+        team_score = 60
+    if market.get('market_size') and 'billion' in market.get('market_size', '').lower():
+        market_score = 65
+    if deep_market_research.get('competitive_landscape') and len(deep_market_research['competitive_landscape']) > 0:
+        market_score = 70
+    if risks.get('overall_risk_level') == 'Low':
+        product_score = 65
+    elif risks.get('overall_risk_level') == 'High':
+        product_score = 40
+
+    # Determine overall outlook
+    avg_score = (growth_score + team_score + market_score + product_score) / 4
+    if avg_score >= 70:
+        overall = "Strong"
+    elif avg_score >= 50:
+        overall = "Moderate"
+    else:
+        overall = "Weak"
+
+    return {
+        "indicators": {
+            "growth": growth_score,
+            "team": team_score,
+            "market": market_score,
+            "product": product_score
+        },
+        "outlook": {
+            "overall": overall,
+            "summary": f"Comprehensive analysis complete for {company_name}. Based on available data, the company shows {overall.lower()} potential.",
+            "keyPoints": [
+                f"Traction: {traction.get('summary', 'Analyzed')}",
+                f"Team: {team.get('summary', 'Analyzed')}",
+                f"Market: {market.get('summary', 'Analyzed')}",
+                f"Risk Level: {risks.get('overall_risk_level', 'Unknown')}",
+                "Detailed synthesis unavailable - review individual sections"
+            ]
         }
+    }
@@ -1,9 +1,11 @@
 from services.llm import get_sonar_llm
-from utils.logger import setup_logger
-import json
+from services.retrieval import get_agent_sources
+from utils.logger import setup_logger, lazy_json
+from utils.hedging import run_hedged
+from utils.prompt_builder import PromptBuilder
+from utils.json_extract import extract_json
+from models.schemas import TractionData
 import time
-import httpx
-import config
 
 logger = setup_logger(__name__)
 
@@ -25,7 +27,6 @@ async def analyze_traction_with_fireplexity(data: dict) -> dict:
     try:
         # Extract structured Crunchbase data
         crunchbase_data = data.get('crunchbase', {})
-        company_name = crunchbase_data.get('name', 'Unknown Company')
         
         # Get employee count directly from Crunchbase
         employee_count = crunchbase_data.get('employee_count')
@@ -41,49 +42,20 @@ async def analyze_traction_with_fireplexity(data: dict) -> dict:
         total_raised = funding_amount if funding_amount != 'Not disclosed' else funding_raw
         logger.info(f"Found funding data: {total_raised}")
         
-        # Step 1: Search with Firecrawl v2 API
-        search_query = f"{company_name} revenue ARR users growth metrics milestones funding traction"
-        logger.info(f"Searching with Firecrawl: {search_query}")
+        # Step 1: Ranked slice from the workflow's shared retrieval stage, or our own Firecrawl search
+        search_items = await get_agent_sources(data, 'traction')
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            search_response = await client.post(
-                "https://api.firecrawl.dev/v2/search",
-                json={
-                    "query": search_query,
-                    "limit": 5,
-                    "tbs": "qdr:y",  # Last year for recent traction data
-                    "lang": "en",
-                    "country": "us",
-                    "location": "United States",
-                    "timeout": 60000,
-                    "scrapeOptions": {
-                        "formats": ["markdown"]
-                    }
-                },
-                headers={
-                    "Authorization": f"Bearer {config.FIRECRAWL_API_KEY}",
-                    "Content-Type": "application/json"
-                }
-            )
-            search_response.raise_for_status()
-            search_results = search_response.json()
+        logger.info(f"Firecrawl search completed, found {len(search_items)} results")
         
-        logger.info(f"Firecrawl search completed, found {len(search_results.get('data', []))} results")
-        
-        # Step 2: Extract search results
-        search_data = []
-        for item in search_results.get('data', []):
-            search_data.append({
-                'url': item.get('url', ''),
-                'title': item.get('title', ''),
-                'description': item.get('description', ''),
-                'markdown': item.get('markdown', '')[:1000]  # Limit markdown length
-            })
+        # Step 2: Compact Crunchbase data plus deduplicated search results, trimmed to the token budget
+        builder = PromptBuilder("traction")
+        builder.add_json("crunchbase_data", crunchbase_data, priority=2)
+        builder.add_sources("search_results", search_items, max_chars=1000, priority=1, show_urls=True)
         
         # Step 3: Use LLM to analyze combined data
         llm = get_sonar_llm(temperature=0.2)
         
-        prompt = f"""
+        prompt = builder.render("""
             You are a startup traction analyst. Analyze the provided data and extract:
             - Revenue/ARR metrics
             - User growth numbers
@@ -92,9 +64,10 @@ async def analyze_traction_with_fireplexity(data: dict) -> dict:
             - Funding stage (e.g., Seed, Series A, Series B, etc.)
             - Recent funding round information
 
-            Crunchbase Data: {json.dumps(crunchbase_data, indent=2)}
+            Crunchbase Data: {crunchbase_data}
 
-            Recent Web Search Results: {json.dumps(search_data, indent=2)}
+            Recent Web Search Results:
+            {search_results}
 
             Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
             {{
@@ -106,21 +79,16 @@ async def analyze_traction_with_fireplexity(data: dict) -> dict:
                 "funding_stage": "string or null (e.g., Seed, Series A, Pre-seed, etc.)",
                 "recent_round": "string or null (most recent funding round amount and details)"
             }}
-            """
+            """)
         
         logger.debug(f"Sending prompt to Perplexity Sonar (length: {len(prompt)} chars)")
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="traction")
         response_text = str(response)
         
         logger.debug(f"Received response (length: {len(response_text)} chars)")
         
         # Parse JSON response
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        result = json.loads(response_text)
+        result = extract_json(response_text, TractionData, agent="traction")
         
         # Add structured Crunchbase fields
         result['employee_count'] = employee_count
@@ -132,7 +100,7 @@ async def analyze_traction_with_fireplexity(data: dict) -> dict:
             result['recent_round'] = None
         
         logger.info(f"✅ Traction analysis with Fireplexity completed in {time.time() - start_time:.2f}s")
-        logger.debug(f"Traction result: {json.dumps(result, indent=2)}")
+        logger.debug("Traction result: %s", lazy_json(result))
         return result
         
     except Exception as e:
@@ -176,8 +144,10 @@ async def analyze_traction_with_perplexity(data: dict) -> dict:
         # Get LLM
         llm = get_sonar_llm(temperature=0.2)
 
-        # Construct prompt
-        prompt = f"""
+        # Construct prompt (compact company data within the agent's token budget)
+        builder = PromptBuilder("traction")
+        builder.add_json("company_data", crunchbase_data, priority=1)
+        prompt = builder.render("""
             You are a startup traction analyst. Analyze the provided data and extract:
             - Revenue/ARR metrics
             - User growth numbers
@@ -186,7 +156,7 @@ async def analyze_traction_with_perplexity(data: dict) -> dict:
             - Funding stage (e.g., Seed, Series A, Series B, etc.)
             - Recent funding round information
 
-            Company Data: {json.dumps(crunchbase_data, indent=2)}
+            Company Data: {company_data}
 
             Output ONLY valid JSON matching this exact schema (no markdown, no extra text):
             {{
@@ -198,21 +168,16 @@ async def analyze_traction_with_perplexity(data: dict) -> dict:
                 "funding_stage": "string or null (e.g., Seed, Series A, Pre-seed, etc.)",
                 "recent_round": "string or null (most recent funding round amount and details)"
             }}
-            """
+            """)
 
         logger.debug(f"Sending prompt to Perplexity Sonar (length: {len(prompt)} chars)")
-        response = await llm.acomplete(prompt)
+        response = await llm.acomplete(prompt, agent="traction")
         response_text = str(response)
 
         logger.debug(f"Received response (length: {len(response_text)} chars)")
 
         # Parse JSON response
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-
-        result = json.loads(response_text)
+        result = extract_json(response_text, TractionData, agent="traction")
 
         # Add structured Crunchbase fields
         result['employee_count'] = employee_count
@@ -224,7 +189,7 @@ async def analyze_traction_with_perplexity(data: dict) -> dict:
             result['recent_round'] = None
 
         logger.info(f"✅ Traction analysis with Perplexity completed in {time.time() - start_time:.2f}s")
-        logger.debug(f"Traction result: {json.dumps(result, indent=2)}")
+        logger.debug("Traction result: %s", lazy_json(result))
         return result
 
     except Exception as e:
@@ -234,7 +199,7 @@ async def analyze_traction_with_perplexity(data: dict) -> dict:
 
 async def analyze_traction(data: dict) -> dict:
     """
-    Analyze company traction with Fireplexity as primary and Perplexity as fallback.
+    Analyze company traction with Fireplexity as primary and Perplexity as hedged fallback (HEDGE_MODE).
     
     Args:
         data: Dict with keys: crunchbase, reddit, website, news
@@ -244,30 +209,42 @@ async def analyze_traction(data: dict) -> dict:
         employee_count, funding_stage, total_raised, recent_round
     """
     try:
-        # Try Fireplexity first
-        return await analyze_traction_with_fireplexity(data)
-    except Exception as e:
-        logger.warning(f"Fireplexity failed, falling back to Perplexity: {str(e)}")
-        try:
-            # Fallback to Perplexity
-            return await analyze_traction_with_perplexity(data)
-        except Exception as fallback_error:
-            logger.error(f"Both Fireplexity and Perplexity failed: {str(fallback_error)}")
-            # Return safe fallback with structured fields
-            crunchbase_data = data.get('crunchbase', {})
-            employee_count = crunchbase_data.get('employee_count')
-            funding_amount = crunchbase_data.get('funding_amount', 'Not disclosed')
-            funding_raw = crunchbase_data.get('funding', 'Not disclosed')
-            total_raised = funding_amount if funding_amount != 'Not disclosed' else funding_raw
-            
-            return {
-                "revenue": None,
-                "users": None,
-                "growth_rate": None,
-                "milestones": [],
-                "summary": "Unable to extract traction data from available sources",
-                "employee_count": employee_count if isinstance(employee_count, int) else None,
-                "funding_stage": None,
-                "total_raised": total_raised if total_raised != 'Not disclosed' else None,
-                "recent_round": None
-            }
+        # Fireplexity primary, Perplexity fallback hedged per HEDGE_MODE
+        return await run_hedged(
+            "traction",
+            lambda: analyze_traction_with_fireplexity(data),
+            lambda: analyze_traction_with_perplexity(data)
+        )
+    except Exception as fallback_error:
+        logger.error(f"Both Fireplexity and Perplexity failed: {str(fallback_error)}")
+        return fallback_traction_result(data)
+
+
+def fallback_traction_result(data: dict) -> dict:
+    """
+    Safe traction result when no analysis path succeeded (or the agent ran out of time).
+    Keeps the structured Crunchbase fields.
+
+    Args:
+        data: Dict with keys: crunchbase, reddit, website, news
+
+    Returns:
+        TractionData dict with empty metrics
+    """
+    crunchbase_data = data.get('crunchbase', {})
+    employee_count = crunchbase_data.get('employee_count')
+    funding_amount = crunchbase_data.get('funding_amount', 'Not disclosed')
+    funding_raw = crunchbase_data.get('funding', 'Not disclosed')
+    total_raised = funding_amount if funding_amount != 'Not disclosed' else funding_raw
+
+    return {
+        "revenue": None,
+        "users": None,
+        "growth_rate": None,
+        "milestones": [],
+        "summary": "Unable to extract traction data from available sources",
+        "employee_count": employee_count if isinstance(employee_count, int) else None,
+        "funding_stage": None,
+        "total_raised": total_raised if total_raised != 'Not disclosed' else None,
+        "recent_round": None
+    }
@@ -1,67 +1,283 @@
-from llama_index.core.workflow import Workflow, Event, StartEvent, StopEvent, step
-from agents.traction_agent import analyze_traction
-from agents.team_agent import analyze_team
-from agents.market_agent import analyze_market
-from agents.risk_agent import analyze_risks
-from agents.deep_market_research_agent import analyze_deep_market_research
-from agents.synthesis_agent import synthesize_analysis
+from llama_index.core.workflow import Workflow, Context, Event, StartEvent, StopEvent, step
+from agents.traction_agent import analyze_traction, fallback_traction_result
+from agents.team_agent import analyze_team, fallback_team_result
+from agents.market_agent import analyze_market, fallback_market_result
+from agents.risk_agent import analyze_risks, fallback_risk_result
+from agents.deep_market_research_agent import analyze_deep_market_research, fallback_deep_market_research_result
+from agents.synthesis_agent import synthesize_analysis, fallback_synthesis_result
 from services.crunchbase_scraper import scrape_company_url, CrunchbaseScraperError
+from services.retrieval import retrieve_sources
+from services.cassette import cassette_scope
+from services.usage import UsageLedger, current_usage, persist_on_close, usage_scope
+from config import config
+from utils.deadline import Deadline, deadline_scope
 from utils.logger import setup_logger
+from utils.metrics import AGENT_DURATION, AGENT_FALLBACKS, ANALYSIS_DURATION, STAGE_DURATION
+from utils.stats import LatencyStats
+from utils.tracing import span
+from utils.urls import company_name_from_urls
 from urllib.parse import urlparse
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Union
 import asyncio
 import time
 
 logger = setup_logger(__name__)
 
+# Hard workflow timeout beyond the analysis deadline, for work that ignores it
+_WORKFLOW_TIMEOUT_GRACE_SECONDS = 30
+
+# Per-agent latency as seen by the workflow (including deadline fallbacks), and how
+# synthesis fared waiting for deep research - for tuning DEEP_RESEARCH_SOFT_DEADLINE_SECONDS
+_agent_latency: Dict[str, LatencyStats] = {}
+_agent_deadline_fallbacks: Dict[str, int] = {}
+_deep_research_wait = LatencyStats()
+_deep_research_counters = {"in_time": 0, "late": 0}
+
+# Deep research runs can outlive their workflow; keep them referenced until done
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Awaitable) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+class ScrapeRequestedEvent(Event):
+    """Fan-out: scrape the Crunchbase profile"""
+    company_url: str
+    crunchbase_url: str
+    force_refresh: bool
+    company_name: str  # URL-derived, used if the scrape fails
+
+class RetrievalRequestedEvent(Event):
+    """Fan-out: shared web retrieval for the agents"""
+    company_name: str
+
+class DeepResearchStartedEvent(Event):
+    """Fan-out: deep market research is running in the background"""
+    pass
+
 class DataCollectedEvent(Event):
     """Event fired when data collection is complete"""
     data: dict
     company_url: str
     crunchbase_url: str
 
-class AnalysisCompleteEvent(Event):
-    """Event fired when all agent analyses are complete"""
+class SourcesRetrievedEvent(Event):
+    """Event fired when shared web retrieval for the agents is complete"""
+    web_sources: Optional[dict] = None  # None when retrieval is disabled or failed
+
+class StageEvent(Event):
+    """Streamed when a workflow stage starts or completes"""
+    stage: str
+    status: str  # "started" or "completed"
+    elapsed: Optional[float] = None
+
+class AgentResultEvent(Event):
+    """Streamed as soon as one agent's analysis resolves"""
+    agent: str
+    result: dict
+    elapsed: float
+
+class AgentsCompleteEvent(Event):
+    """Event fired when the traction, team, market and risk agents are complete"""
     traction: dict
     team: dict
     market: dict
     risks: dict
-    deep_market_research: dict
     company_name: str
     domain: str
+    synthesis_sources: Optional[list] = None
 
 class CompanyAnalysisWorkflow(Workflow):
     """
     Multi-stage workflow for company analysis.
-    Phase 8: Data collection + 5 parallel agents + Synthesis (3 stages total).
+    Phase 8: Data collection + shared web retrieval + 5 parallel agents + Synthesis.
+
+    The Crunchbase scrape, web retrieval and deep market research start together
+    from a URL-derived company name; the traction/team/market/risk agents join
+    on the scrape and retrieval results. Synthesis starts once those four are
+    done, waiting at most DEEP_RESEARCH_SOFT_DEADLINE_SECONDS more for deep
+    research; if it lands later the result is marked deep_market_research_pending
+    and the research is handed to on_deep_research when it arrives.
+
+    Every stage and agent runs against a slice of one analysis Deadline
+    (STAGE_BUDGETS, less SYNTHESIS_RESERVE_SECONDS for everything before
+    synthesis). The slice is put in scope so outbound calls size their timeouts
+    from it, and an agent still running when it expires is replaced by its
+    fallback result so synthesis starts on time.
+
+    Stages and agents run in trace spans (utils/tracing.py) under the request's
+    span, so every provider call is attributed to the agent that made it. Their
+    tokens, Firecrawl credits and estimated cost are tallied the same way in the
+    run's UsageLedger (services/usage.py), returned as the result's diagnostics.
     """
 
-    @step
-    async def collect_data(self, ev: StartEvent) -> DataCollectedEvent:
+    def __init__(
+        self,
+        *args: Any,
+        deadline: Optional[Deadline] = None,
+        on_deep_research: Optional[Callable[[dict], Awaitable[None]]] = None,
+        **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self.deadline = deadline or Deadline(config.ANALYSIS_DEADLINE_SECONDS)
+        self.on_deep_research = on_deep_research
+        self._deep_research: Optional[asyncio.Task] = None
+        self._started = 0.0
+        self._deep_research_started = 0.0
+        self._deep_research_detached = False
+
+    def _stage_deadline(self, name: str) -> Deadline:
+        """The analysis deadline narrowed to a stage or agent's budget."""
+        reserve = 0.0 if name == "synthesis" else config.SYNTHESIS_RESERVE_SECONDS
+        return self.deadline.child(name, config.STAGE_BUDGETS.get(name), reserve=reserve)
+
+    def _stage_completed(self, ctx: Context, stage: str, elapsed: float):
+        """Stream a stage's completion and record its duration."""
+        STAGE_DURATION.observe(elapsed, stage=stage)
+        ledger = current_usage()
+        if ledger is not None:
+            ledger.record_stage(stage, elapsed)
+        ctx.write_event_to_stream(StageEvent(stage=stage, status="completed", elapsed=elapsed))
+
+    async def _run_within_budget(
+        self, name: str, run: Callable[[], Awaitable[dict]], fallback: Callable[[], dict]
+    ) -> dict:
         """
-        Stage 1: Data collection from Crunchbase (real scraping).
-        Future phases will add Reddit, Website, and News scrapers.
+        Run an agent under its stage deadline, falling back if it runs out of time.
+
+        Args:
+            name: Agent name (key of STAGE_BUDGETS)
+            run: Coroutine factory for the agent
+            fallback: Builds the agent's fallback result
+
+        Returns:
+            The agent's result, or its fallback result if the deadline passed first
         """
-        logger.info("=" * 80)
-        logger.info("🔄 STAGE 1: Data Collection")
-        logger.info("=" * 80)
+        deadline = self._stage_deadline(name)
+        start_time = time.perf_counter()
+        outcome = "ok"
+        with deadline_scope(deadline), span(f"agent {name}", agent=name) as agent_span:
+            try:
+                return await asyncio.wait_for(run(), timeout=deadline.remaining())
+            except asyncio.TimeoutError:
+                logger.warning(f"⏰ {name} missed its deadline - using fallback result")
+                agent_span.set_attribute("fallback", "deadline")
+                _agent_deadline_fallbacks[name] = _agent_deadline_fallbacks.get(name, 0) + 1
+                AGENT_FALLBACKS.inc(agent=name, reason="deadline")
+                outcome = "deadline"
+                return fallback()
+            finally:
+                elapsed = time.perf_counter() - start_time
+                _agent_latency.setdefault(name, LatencyStats()).record(elapsed)
+                AGENT_DURATION.observe(elapsed, agent=name, outcome=outcome)
+                ledger = current_usage()
+                if ledger is not None:
+                    ledger.record_agent(name, elapsed)
 
+    @step
+    async def start(
+        self, ctx: Context, ev: StartEvent
+    ) -> Union[ScrapeRequestedEvent, RetrievalRequestedEvent, DeepResearchStartedEvent, None]:
+        """
+        Fan out the independent stages. Web searches only need a company name, so
+        they do not wait for the (slow, retried) Crunchbase scrape. Deep research
+        runs as a task of its own so it can outlive synthesis.
+        """
+        self._started = time.time()
         company_url = ev.get("company_url")
         crunchbase_url = ev.get("crunchbase_url")
+        company_name = company_name_from_urls(company_url, crunchbase_url)
 
         logger.info(f"Company URL: {company_url}")
         logger.info(f"Crunchbase URL: {crunchbase_url}")
+        logger.info(f"🚦 Starting scrape, retrieval and deep research for '{company_name}' (from URLs)")
+        logger.info(f"⏱️  Analysis deadline: {self.deadline.remaining():.0f}s")
+
+        ctx.send_event(ScrapeRequestedEvent(
+            company_url=company_url,
+            crunchbase_url=crunchbase_url,
+            force_refresh=ev.get("force_refresh", False),
+            company_name=company_name
+        ))
+        ctx.send_event(RetrievalRequestedEvent(company_name=company_name))
+        logger.info("🔍 Deep Market Research Agent (Sonar Pro) - started in parallel with data collection")
+        self._deep_research_started = time.time()
+        self._deep_research = _spawn(self._run_deep_research({
+            "crunchbase": {
+                "name": company_name,
+                "website": company_url,
+                "crunchbase_url": crunchbase_url
+            }
+        }))
+        ctx.send_event(DeepResearchStartedEvent())
+        return None
+
+    async def _run_deep_research(self, data: dict) -> dict:
+        """
+        Deep research under its budget; an error gives the fallback result
+        instead of failing the analysis (or the late merge).
+        """
+        try:
+            return await self._run_within_budget(
+                "deep_market_research",
+                lambda: analyze_deep_market_research(data),
+                fallback_deep_market_research_result
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Deep market research failed: {str(e)} - using fallback result")
+            AGENT_FALLBACKS.inc(agent="deep_market_research", reason="error")
+            return fallback_deep_market_research_result()
+
+    def _deep_research_result(self) -> dict:
+        """Result of the finished deep research task; the fallback result if it was cancelled or failed."""
+        task = self._deep_research
+        if task.cancelled():
+            return fallback_deep_market_research_result()
+        if task.exception() is not None:
+            logger.warning(f"⚠️  Deep market research failed: {str(task.exception())} - using fallback result")
+            return fallback_deep_market_research_result()
+        return task.result()
+
+    @step
+    async def collect_data(self, ctx: Context, ev: ScrapeRequestedEvent) -> DataCollectedEvent:
+        """
+        Stage 1: Data collection from Crunchbase (real scraping).
+        Future phases will add Reddit, Website, and News scrapers.
+        """
+        logger.info("=" * 80)
+        logger.info("🔄 STAGE 1: Data Collection")
+        logger.info("=" * 80)
+        ctx.write_event_to_stream(StageEvent(stage="collect_data", status="started"))
+        start_time = time.time()
 
         # Scrape Crunchbase for real data
         crunchbase_data = {}
         try:
             logger.info("📊 Scraping Crunchbase for company details...")
-            crunchbase_data = await scrape_company_url(crunchbase_url)
+            with deadline_scope(self._stage_deadline("collect_data")) as deadline, span("collect_data", stage="collect_data"):
+                crunchbase_data = await asyncio.wait_for(
+                    scrape_company_url(ev.crunchbase_url, force_refresh=ev.force_refresh),
+                    timeout=deadline.remaining()
+                )
             logger.info(f"✅ Crunchbase scrape successful: {crunchbase_data.get('name', 'Unknown')}")
+        except asyncio.TimeoutError:
+            logger.error("⏰ Crunchbase scraping missed its deadline")
+            logger.warning("⚠️  Falling back to minimal data")
+            crunchbase_data = {
+                "name": ev.company_name,
+                "description": "Unable to scrape company details",
+                "funding": "Not disclosed",
+                "employees": "Not disclosed",
+                "error": "Scraping deadline exceeded"
+            }
         except CrunchbaseScraperError as e:
             logger.error(f"⚠️  Crunchbase scraping failed: {str(e)}")
             logger.warning("⚠️  Falling back to minimal data")
             crunchbase_data = {
-                "name": "Unknown Company",
+                "name": ev.company_name,
                 "description": "Unable to scrape company details",
                 "funding": "Not disclosed",
                 "employees": "Not disclosed",
@@ -70,7 +286,7 @@ class CompanyAnalysisWorkflow(Workflow):
         except Exception as e:
             logger.error(f"⚠️  Unexpected error during Crunchbase scraping: {str(e)}", exc_info=True)
             crunchbase_data = {
-                "name": "Unknown Company",
+                "name": ev.company_name,
                 "description": "Error during scraping",
                 "funding": "Not disclosed",
                 "employees": "Not disclosed",
@@ -87,106 +303,207 @@ class CompanyAnalysisWorkflow(Workflow):
 
         logger.info(f"✅ Data collection complete")
         logger.debug(f"Collected data keys: {list(data.keys())}")
+        self._stage_completed(ctx, "collect_data", time.time() - start_time)
 
         return DataCollectedEvent(
             data=data,
-            company_url=company_url,
-            crunchbase_url=crunchbase_url
+            company_url=ev.company_url,
+            crunchbase_url=ev.crunchbase_url
         )
 
     @step
-    async def analyze_agents(self, ev: DataCollectedEvent) -> AnalysisCompleteEvent:
+    async def retrieve_sources(self, ctx: Context, ev: RetrievalRequestedEvent) -> SourcesRetrievedEvent:
         """
-        Stage 2: Run analysis agents.
-        Phase 8: Traction + Team + Market + Risk + Deep Market Research agents in parallel.
+        Stage 2: Shared web retrieval for the agents, concurrent with the scrape.
+        One concurrent search per agent, results deduplicated by URL and each page
+        scraped once; every agent gets its ranked slice in data["web_sources"].
         """
         logger.info("=" * 80)
-        logger.info("🔄 STAGE 2: Agent Analysis - 5 Agents in Parallel (Phase 8)")
+        logger.info("🔄 STAGE 2: Shared Web Retrieval")
         logger.info("=" * 80)
+        ctx.write_event_to_stream(StageEvent(stage="retrieve_sources", status="started"))
+        start_time = time.time()
+
+        web_sources = None
+        if config.RETRIEVAL_ENABLED:
+            try:
+                with deadline_scope(self._stage_deadline("retrieve_sources")) as deadline, span("retrieve_sources", stage="retrieve_sources"):
+                    web_sources = await asyncio.wait_for(
+                        retrieve_sources(ev.company_name),
+                        timeout=deadline.remaining()
+                    )
+            except asyncio.TimeoutError:
+                logger.warning("⏰ Shared retrieval missed its deadline - agents will search individually")
+            except Exception as e:
+                # Agents fall back to their own searches
+                logger.error(f"⚠️  Shared retrieval failed: {str(e)}", exc_info=True)
+        else:
+            logger.info("Shared retrieval disabled - agents will search individually")
+
+        self._stage_completed(ctx, "retrieve_sources", time.time() - start_time)
+        return SourcesRetrievedEvent(web_sources=web_sources)
+
+    @step
+    async def deep_research(self, ctx: Context, ev: DeepResearchStartedEvent) -> None:
+        """
+        Stream deep market research (Sonar Pro with web search) if it lands while
+        the workflow is still running. Needs only the company's name and URLs, not
+        the Crunchbase profile.
+        """
+        try:
+            # Waits without propagating the task's own failure or cancellation
+            await asyncio.wait({self._deep_research})
+        except asyncio.CancelledError:
+            # Run cancelled or failed before synthesis took the research over
+            if not self._deep_research_detached:
+                self._deep_research.cancel()
+            raise
+        if self._deep_research.cancelled():
+            return None
+        result = self._deep_research_result()
 
-        # Run all 5 agents in parallel
-        logger.info("Running 5 agents in parallel...")
+        elapsed = time.time() - self._deep_research_started
+        ctx.write_event_to_stream(
+            AgentResultEvent(agent="deep_market_research", result=result, elapsed=elapsed)
+        )
+
+        # Log deep market research metrics
+        source_count = len(result.get('sources', []))
+        competitor_count = len(result.get('competitive_landscape', []))
+        logger.info(f"📊 Deep Market Research: {competitor_count} competitors, {source_count} cited sources ({elapsed:.2f}s)")
+        return None
+
+    @step
+    async def analyze_agents(
+        self, ctx: Context, ev: Union[DataCollectedEvent, SourcesRetrievedEvent]
+    ) -> Optional[AgentsCompleteEvent]:
+        """
+        Stage 3: Run analysis agents once the scrape and retrieval have both arrived.
+        Phase 8: Traction + Team + Market + Risk agents in parallel (deep research
+        runs alongside from the start). Each agent's result is written to the event
+        stream as soon as it resolves.
+        """
+        events = ctx.collect_events(ev, [DataCollectedEvent, SourcesRetrievedEvent], buffer_id="analyze_agents")
+        if events is None:
+            return None
+        collected, retrieved = events
+
+        logger.info("=" * 80)
+        logger.info("🔄 STAGE 3: Agent Analysis - 4 Agents in Parallel (Phase 8)")
+        logger.info("=" * 80)
+
+        data = dict(collected.data)
+        if retrieved.web_sources is not None:
+            data["web_sources"] = retrieved.web_sources
+
+        # Run the 4 web-search agents in parallel
+        logger.info("Running 4 agents in parallel...")
         logger.info("📊 Traction Agent (Sonar)")
         logger.info("👥 Team Agent (Sonar)")
         logger.info("🌍 Market Agent (Sonar)")
         logger.info("⚠️  Risk Agent (Sonar)")
-        logger.info("🔍 Deep Market Research Agent (Sonar Pro)")
+        ctx.write_event_to_stream(StageEvent(stage="analyze_agents", status="started"))
         start_time = time.time()
 
-        traction_result, team_result, market_result, risk_result, deep_market_result = await asyncio.gather(
-            analyze_traction(ev.data),
-            analyze_team(ev.data),
-            analyze_market(ev.data),
-            analyze_risks(ev.data),
-            analyze_deep_market_research(ev.data)  # Sonar Pro with web search
-        )
+        async def run_agent(agent: str, run: Callable[[], Awaitable[dict]], fallback: Callable[[], dict]) -> dict:
+            result = await self._run_within_budget(agent, run, fallback)
+            ctx.write_event_to_stream(
+                AgentResultEvent(agent=agent, result=result, elapsed=time.time() - start_time)
+            )
+            return result
 
-        elapsed = time.time() - start_time
-        logger.info(f"✅ All 5 agents completed in {elapsed:.2f}s")
+        with span("analyze_agents", stage="analyze_agents"):
+            traction_result, team_result, market_result, risk_result = await asyncio.gather(
+                run_agent("traction", lambda: analyze_traction(data), lambda: fallback_traction_result(data)),
+                run_agent("team", lambda: analyze_team(data), fallback_team_result),
+                run_agent("market", lambda: analyze_market(data), fallback_market_result),
+                run_agent("risks", lambda: analyze_risks(data), fallback_risk_result)
+            )
 
-        # Log deep market research metrics
-        source_count = len(deep_market_result.get('sources', []))
-        competitor_count = len(deep_market_result.get('competitive_landscape', []))
-        logger.info(f"📊 Deep Market Research: {competitor_count} competitors, {source_count} cited sources")
+        elapsed = time.time() - start_time
+        logger.info(f"✅ All 4 agents completed in {elapsed:.2f}s")
+        self._stage_completed(ctx, "analyze_agents", elapsed)
 
         # Extract domain from company URL
         try:
-            parsed_url = urlparse(ev.company_url)
+            parsed_url = urlparse(collected.company_url)
             domain = parsed_url.netloc or parsed_url.path
             # Remove www. prefix if present
             if domain.startswith('www.'):
                 domain = domain[4:]
         except Exception as e:
             logger.warning(f"Failed to parse domain from URL: {e}")
-            domain = ev.company_url
+            domain = collected.company_url
 
-        company_name = ev.data.get("crunchbase", {}).get("name", "Unknown Company")
+        company_name = data.get("crunchbase", {}).get("name", "Unknown Company")
 
         # Pass results to synthesis stage
-        return AnalysisCompleteEvent(
+        return AgentsCompleteEvent(
             traction=traction_result,
             team=team_result,
             market=market_result,
             risks=risk_result,
-            deep_market_research=deep_market_result,
             company_name=company_name,
-            domain=domain
+            domain=domain,
+            synthesis_sources=(retrieved.web_sources or {}).get("synthesis")
         )
 
     @step
-    async def synthesize(self, ev: AnalysisCompleteEvent) -> StopEvent:
+    async def synthesize(self, ctx: Context, ev: AgentsCompleteEvent) -> StopEvent:
         """
-        Stage 3: Synthesis - Aggregate all analyses into final report.
+        Stage 4: Synthesis - Aggregate all analyses into final report.
         Phase 8: Uses Perplexity Sonar to calculate indicators and generate outlook.
+        Starts once the core agents are done; deep research is included if it
+        lands within DEEP_RESEARCH_SOFT_DEADLINE_SECONDS, otherwise merged later.
         """
+        agents = ev
+        deep_market_research = await self._await_deep_research()
+        deep_research_pending = deep_market_research is None
+
         logger.info("=" * 80)
-        logger.info("🔄 STAGE 3: Synthesis - Final Report Generation (Phase 8)")
+        logger.info("🔄 STAGE 4: Synthesis - Final Report Generation (Phase 8)")
         logger.info("=" * 80)
+        ctx.write_event_to_stream(StageEvent(stage="synthesize", status="started"))
 
         start_time = time.time()
 
-        # Run synthesis agent
-        synthesis_result = await synthesize_analysis(
-            traction=ev.traction,
-            team=ev.team,
-            market=ev.market,
-            deep_market_research=ev.deep_market_research,
-            risks=ev.risks,
-            company_name=ev.company_name
+        # Run synthesis agent with whatever is left of the analysis deadline
+        synthesis_result = await self._run_within_budget(
+            "synthesis",
+            lambda: synthesize_analysis(
+                traction=agents.traction,
+                team=agents.team,
+                market=agents.market,
+                deep_market_research=deep_market_research or {},
+                risks=agents.risks,
+                company_name=agents.company_name,
+                sources=agents.synthesis_sources
+            ),
+            lambda: fallback_synthesis_result(
+                agents.traction, agents.team, agents.market,
+                deep_market_research or {}, agents.risks, agents.company_name
+            )
         )
 
+        # Deep research may have landed while synthesis ran
+        if deep_research_pending and self._deep_research.done():
+            deep_market_research = self._deep_research_result()
+            deep_research_pending = False
+
         elapsed = time.time() - start_time
         logger.info(f"✅ Synthesis completed in {elapsed:.2f}s")
+        self._stage_completed(ctx, "synthesize", elapsed)
 
         # Build final result with synthesized indicators and outlook
         final_result = {
-            "name": ev.company_name,
-            "domain": ev.domain,
-            "traction": ev.traction,
-            "team": ev.team,
-            "market": ev.market,
-            "risks": ev.risks,
-            "deep_market_research": ev.deep_market_research,
+            "name": agents.company_name,
+            "domain": agents.domain,
+            "traction": agents.traction,
+            "team": agents.team,
+            "market": agents.market,
+            "risks": agents.risks,
+            "deep_market_research": deep_market_research,
+            "deep_market_research_pending": deep_research_pending,
             "indicators": synthesis_result.get("indicators", {
                 "growth": 50, "team": 50, "market": 50, "product": 50
             }),
@@ -196,6 +513,10 @@ class CompanyAnalysisWorkflow(Workflow):
                 "keyPoints": []
             })
         }
+        ledger = current_usage()
+        if ledger is not None:
+            # Spend so far; late deep research is still counted in the stored usage
+            final_result["diagnostics"] = ledger.snapshot()
 
         logger.info("=" * 80)
         logger.info("✅ COMPLETE: Full Analysis Workflow Finished (Phase 8)")
@@ -206,5 +527,138 @@ class CompanyAnalysisWorkflow(Workflow):
                    f"Product={final_result['indicators']['product']}")
         logger.info(f"🎯 Overall Outlook: {final_result['outlook']['overall']}")
         logger.debug(f"Final result keys: {list(final_result.keys())}")
+        ANALYSIS_DURATION.observe(
+            time.time() - self._started,
+            outcome="deep_research_pending" if deep_research_pending else "complete"
+        )
+
+        if deep_research_pending:
+            # Hand the still-running research over to on_deep_research
+            self._deep_research_detached = True
+            self._deep_research.add_done_callback(self._deliver_late_deep_research)
 
         return StopEvent(result=final_result)
+
+    async def _await_deep_research(self) -> Optional[dict]:
+        """
+        Deep research result if it is done or lands within the soft deadline.
+
+        Returns:
+            The research dict (its fallback result if it failed), or None if it is still running
+        """
+        task = self._deep_research
+        soft_deadline = config.DEEP_RESEARCH_SOFT_DEADLINE_SECONDS
+        wait_start = time.time()
+        if not task.done():
+            if soft_deadline < 0:
+                logger.info("⏳ Waiting for deep market research before synthesis")
+            else:
+                logger.info(f"⏳ Waiting up to {soft_deadline:.1f}s for deep market research before synthesis")
+            with span("wait deep_market_research", soft_deadline_seconds=soft_deadline) as wait_span:
+                await asyncio.wait({task}, timeout=soft_deadline if soft_deadline >= 0 else None)
+                wait_span.set_attribute("landed", task.done())
+        _deep_research_wait.record(time.time() - wait_start)
+
+        if task.done():
+            _deep_research_counters["in_time"] += 1
+            return self._deep_research_result()
+
+        _deep_research_counters["late"] += 1
+        logger.info("⏩ Deep market research still running - synthesizing without it, will merge when it lands")
+        return None
+
+    async def close_usage(self, handler: Any, ledger: UsageLedger):
+        """Close the run's usage ledger once the run, and deep research (which may outlive it), are done."""
+        try:
+            await handler
+        except (Exception, asyncio.CancelledError):
+            pass  # failed and cancelled runs spent money too
+        if self._deep_research is not None:
+            await asyncio.wait({self._deep_research})
+        ledger.close()
+
+    def _deliver_late_deep_research(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.warning(f"⚠️  Late deep market research failed: {str(task.exception())}")
+            return
+        logger.info(f"🧩 Deep market research landed {time.time() - self._started:.2f}s after start, after synthesis")
+        if self.on_deep_research is not None:
+            _spawn(self.on_deep_research(task.result()))
+
+
+def start_analysis(
+    company_url: str,
+    crunchbase_url: str,
+    force_refresh: bool = False,
+    deadline: Optional[Deadline] = None,
+    on_deep_research: Optional[Callable[[dict], Awaitable[None]]] = None,
+    timeout: Optional[float] = None
+) -> Any:
+    """
+    Start a CompanyAnalysisWorkflow run without awaiting it.
+
+    Args:
+        company_url: Company website URL
+        crunchbase_url: Crunchbase profile URL
+        force_refresh: Bypass cached scrapes
+        deadline: Analysis deadline (default: ANALYSIS_DEADLINE_SECONDS from now)
+        on_deep_research: Awaited with the deep research result if it lands after
+                          synthesis (the result then has deep_market_research_pending)
+        timeout: Hard workflow timeout in seconds (default: deadline plus a grace period)
+
+    With CASSETTE_MODE=record or replay the run's provider calls are recorded to
+    or replayed from the company's cassette, and cached scrapes and completions
+    are bypassed.
+
+    The run's provider usage is tallied in a UsageLedger; the result dict gets
+    its snapshot as "diagnostics", and once the run (including late deep
+    research) has finished it is stored for /api/admin/costs.
+
+    Returns:
+        WorkflowHandler - iterate handler.stream_events() for StageEvent and
+        AgentResultEvent as they happen, then await it for the final result dict
+    """
+    deadline = deadline or Deadline(config.ANALYSIS_DEADLINE_SECONDS)
+    if timeout is None:
+        timeout = deadline.remaining() + _WORKFLOW_TIMEOUT_GRACE_SECONDS
+    workflow = CompanyAnalysisWorkflow(
+        timeout=timeout, verbose=True, deadline=deadline, on_deep_research=on_deep_research
+    )
+    logger.info("Starting CompanyAnalysisWorkflow...")
+    # The run's tasks are created here, so they inherit the cassette and usage scopes
+    with cassette_scope(company_url, crunchbase_url) as cassette:
+        ledger = UsageLedger(
+            company_url,
+            crunchbase_url,
+            name=company_name_from_urls(company_url, crunchbase_url),
+            replayed=cassette is not None and cassette.replaying
+        )
+        ledger.on_close(persist_on_close)
+        with usage_scope(ledger):
+            handler = workflow.run(
+                company_url=company_url,
+                crunchbase_url=crunchbase_url,
+                force_refresh=force_refresh or cassette is not None
+            )
+    _spawn(workflow.close_usage(handler, ledger))
+    return handler
+
+
+def get_agent_latency_stats() -> Dict:
+    """
+    Per-agent latency percentiles as seen by the workflow (deadline fallbacks
+    included) and how often synthesis had to go ahead without deep research.
+    """
+    return {
+        "agents": {
+            agent: {**stats.snapshot(), "deadline_fallbacks": _agent_deadline_fallbacks.get(agent, 0)}
+            for agent, stats in _agent_latency.items()
+        },
+        "deep_research": {
+            "soft_deadline_seconds": config.DEEP_RESEARCH_SOFT_DEADLINE_SECONDS,
+            **_deep_research_counters,
+            "synthesis_wait": _deep_research_wait.snapshot()
+        }
+    }
@@ -1,12 +1,36 @@
-from fastapi import APIRouter, HTTPException, status
-from models.schemas import SearchRequest, SearchResponse, CompanySearchResult, AnalyzeRequest, AnalysisResult
-from services.crunchbase_scraper import search_crunchbase, CrunchbaseScraperError
-from analysis_workflows.analysis_workflow import CompanyAnalysisWorkflow
-from utils.logger import setup_logger
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Optional
+from models.schemas import SearchRequest, SearchResponse, CompanySearchResult, AnalyzeRequest, AnalysisResult, DeepMarketResearch, StoredAnalysisSummary, StoredAnalysisList, JobStatus, BatchAnalyzeRequest
+from services.crunchbase_scraper import search_crunchbase_async, CrunchbaseScraperError
+from analysis_workflows.analysis_workflow import start_analysis, get_agent_latency_stats, StageEvent, AgentResultEvent
+from services.http_client import get_pool_stats
+from services.llm import get_llm_stats
+from services.result_store import get_result_store
+from services.cache import get_cache_stats, make_cache_key
+from services.jobs import Job, JobQueueFullError, get_job_manager
+from services.rate_limits import get_rate_limit_stats
+from services.cassette import get_cassette_stats
+from services.usage import get_process_usage, summarize_usage
+from utils.singleflight import SingleFlight, get_singleflight_stats
+from utils.hedging import get_hedging_stats
+from utils.urls import normalize_url
+from utils.rate_limit import TokenBucket
+from utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+from utils.prompt_builder import get_prompt_stats
+from utils.json_extract import get_json_extract_stats
+from utils.tracing import get_tracing_stats
+from config import config
+from utils.logger import setup_logger, get_log_levels, set_log_level, lazy_json
+import asyncio
+import json
 import time
 
 logger = setup_logger(__name__)
-router = APIRouter(prefix="/api", tags=["search", "analysis"])
+router = APIRouter(prefix="/api", tags=["search", "analysis", "jobs", "admin"])
+
+# Analyses of the same company that overlap in time share one workflow run
+_analysis_flights = SingleFlight("analysis")
 
 @router.post("/search", response_model=SearchResponse)
 async def search_companies(request: SearchRequest):
@@ -35,8 +59,8 @@ async def search_companies(request: SearchRequest):
             )
 
         # Search Crunchbase
-        logger.info(f"Calling crunchbase_scraper.search_crunchbase()")
-        results = search_crunchbase(request.query, limit=5)
+        logger.info("Calling crunchbase_scraper.search_crunchbase_async()")
+        results = await search_crunchbase_async(request.query, limit=5)
 
         # Convert to Pydantic models
         company_results = [CompanySearchResult(**r) for r in results]
@@ -49,7 +73,7 @@ async def search_companies(request: SearchRequest):
 
         elapsed = time.time() - start_time
         logger.info(f"✅ Search completed in {elapsed:.2f}s - Found {len(company_results)} results")
-        logger.debug(f"Response: {response.model_dump_json(indent=2)}")
+        logger.debug("Response: %s", lazy_json(response.model_dump()))
 
         return response
 
@@ -78,31 +102,50 @@ async def analyze_company(request: AnalyzeRequest):
     Future phases will add more agents incrementally.
 
     Processing time: ~30-60 seconds (Phase 3), up to 2-3 min (final phase)
+
+    With max_age, a stored result at most that many seconds old is returned
+    immediately. Every completed analysis is persisted to the result store.
+
+    If deep market research is still running when synthesis starts, the result
+    has deep_market_research=null and deep_market_research_pending=true; the
+    research is merged into the stored analysis when it lands (fetch it again
+    with max_age).
+
+    With include_diagnostics, a result that ran the workflow carries the run's
+    provider calls, tokens, Firecrawl credits and estimated cost per agent.
     """
     logger.info("=" * 80)
-    logger.info(f"🚀 POST /api/analyze")
+    logger.info("🚀 POST /api/analyze")
     logger.info(f"Company URL: {request.company_url}")
     logger.info(f"Crunchbase URL: {request.crunchbase_url}")
+    if request.force_refresh:
+        logger.info("Force refresh: bypassing caches")
     logger.info("=" * 80)
 
     start_time = time.time()
+    # One budget for the whole request; the workflow narrows it per stage and agent
+    deadline = Deadline(config.ANALYSIS_DEADLINE_SECONDS)
 
-    try:
-        # Create and run workflow
-        workflow = CompanyAnalysisWorkflow(timeout=300, verbose=True)
+    # Serve a recent enough stored result without re-running the workflow
+    stored = await _load_stored_analysis(request)
+    if stored is not None:
+        return stored
 
-        logger.info("Starting CompanyAnalysisWorkflow...")
-        result = await workflow.run(
-            company_url=request.company_url,
-            crunchbase_url=request.crunchbase_url
-        )
+    try:
+        analysis = await _run_analysis_shared(request, deadline)
 
         elapsed = time.time() - start_time
         logger.info(f"✅ Analysis completed in {elapsed:.2f}s")
-        logger.debug(f"Result: {result}")
 
-        return AnalysisResult(**result)
+        return _with_diagnostics(request, analysis)
 
+    except DeadlineExceeded as e:
+        elapsed = time.time() - start_time
+        logger.error(f"⏰ Analysis timed out after {elapsed:.2f}s: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Analysis timed out: {str(e)}"
+        )
     except Exception as e:
         elapsed = time.time() - start_time
         logger.error(f"❌ Analysis failed after {elapsed:.2f}s: {str(e)}", exc_info=True)
@@ -110,3 +153,579 @@ async def analyze_company(request: AnalyzeRequest):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Analysis failed: {str(e)}"
         )
+
+async def _load_stored_analysis(request: AnalyzeRequest) -> Optional[AnalysisResult]:
+    """
+    Stored analysis for the request's company if max_age allows serving it.
+
+    Args:
+        request: Analysis request
+
+    Returns:
+        AnalysisResult marked cached, or None if the workflow should run
+    """
+    if request.max_age is None or request.force_refresh:
+        return None
+    try:
+        stored = await get_result_store().aget(request.company_url, request.crunchbase_url)
+        if stored is not None and stored.age <= request.max_age:
+            logger.info(f"⚡ Returning stored analysis from {stored.analyzed_at} (age {stored.age:.0f}s <= max_age {request.max_age}s)")
+            return AnalysisResult(**{**stored.result, "analyzed_at": stored.analyzed_at, "cached": True})
+        if stored is not None:
+            logger.info(f"Stored analysis is {stored.age:.0f}s old (max_age {request.max_age}s) - re-running")
+    except Exception as e:
+        logger.warning(f"⚠️  Result store lookup failed, running analysis: {str(e)}")
+    return None
+
+def _with_diagnostics(request: AnalyzeRequest, analysis: AnalysisResult) -> AnalysisResult:
+    """Drop the run's diagnostics unless the request asked for them."""
+    if not request.include_diagnostics:
+        analysis.diagnostics = None
+    return analysis
+
+async def _persist_analysis(request: AnalyzeRequest, analysis: AnalysisResult):
+    """Save a completed analysis to the result store and stamp analyzed_at."""
+    try:
+        # Diagnostics describe one run; its usage is stored separately for /api/admin/costs
+        stored = await get_result_store().asave(
+            request.company_url,
+            request.crunchbase_url,
+            analysis.model_dump(mode="json", exclude={"analyzed_at", "cached", "diagnostics"})
+        )
+        analysis.analyzed_at = stored.analyzed_at
+    except Exception as e:
+        logger.warning(f"⚠️  Failed to persist analysis result: {str(e)}")
+
+async def _merge_late_deep_research(
+    request: AnalyzeRequest,
+    research: dict,
+    persisted: asyncio.Event,
+    result: Optional[dict] = None
+):
+    """
+    Fill in deep market research that landed after synthesis.
+
+    Args:
+        request: Analysis request the research belongs to
+        research: Deep market research result
+        persisted: Set once the pending analysis has been saved
+        result: Analysis dict already handed out (e.g. a job result) to update in place
+    """
+    await persisted.wait()
+    try:
+        research = DeepMarketResearch(**research).model_dump(mode="json")
+        if result is not None:
+            result["deep_market_research"] = research
+            result["deep_market_research_pending"] = False
+
+        # Keeps the stored analysis's created_at (max_age, /api/analyses order)
+        stored = await get_result_store().amerge_deep_research(request.company_url, request.crunchbase_url, research)
+        if stored is None:
+            return
+        logger.info(f"🧩 Merged late deep market research into stored analysis of {stored.name}")
+    except Exception as e:
+        logger.warning(f"⚠️  Failed to merge late deep market research: {str(e)}")
+
+def _analysis_flight_key(request: AnalyzeRequest) -> str:
+    return make_cache_key(
+        normalize_url(request.company_url),
+        normalize_url(request.crunchbase_url),
+        request.force_refresh
+    )
+
+async def _run_analysis_shared(request: AnalyzeRequest, deadline: Optional[Deadline] = None) -> AnalysisResult:
+    """
+    Run (or join an in-flight run of) the analysis for a request's company.
+
+    Args:
+        request: Analysis request
+        deadline: This request's deadline (default: ANALYSIS_DEADLINE_SECONDS from now);
+                  a request that joins another's run waits for it at most until then
+
+    Returns:
+        AnalysisResult; a joined run's diagnostics are marked coalesced
+
+    Raises:
+        DeadlineExceeded: If the deadline passes while waiting on another request's run
+    """
+    deadline = deadline or Deadline(config.ANALYSIS_DEADLINE_SECONDS)
+    # Concurrent requests for the same company await one shared run
+    flight_key = _analysis_flight_key(request)
+    joined = []
+    with deadline_scope(deadline):
+        analysis = await _analysis_flights.do(
+            flight_key, lambda: _run_analysis(request, deadline), on_shared=lambda _: joined.append(True)
+        )
+    analysis = analysis.model_copy()
+    if joined and analysis.diagnostics is not None:
+        # The timing and spend are the run this request joined, not its own
+        analysis.diagnostics = analysis.diagnostics.model_copy(update={"coalesced": True})
+    return analysis
+
+async def _run_analysis(request: AnalyzeRequest, deadline: Optional[Deadline] = None) -> AnalysisResult:
+    """
+    Run CompanyAnalysisWorkflow for a request and persist the result.
+
+    Args:
+        request: Analysis request
+        deadline: Analysis deadline (default: ANALYSIS_DEADLINE_SECONDS from workflow start)
+
+    Returns:
+        Validated AnalysisResult
+    """
+    persisted = asyncio.Event()
+    try:
+        result = await start_analysis(
+            request.company_url,
+            request.crunchbase_url,
+            force_refresh=request.force_refresh,
+            deadline=deadline,
+            on_deep_research=lambda research: _merge_late_deep_research(request, research, persisted)
+        )
+        logger.debug("Result: %s", result)
+
+        analysis = AnalysisResult(**result)
+        await _persist_analysis(request, analysis)
+        return analysis
+    finally:
+        persisted.set()
+
+@router.post("/analyze/batch")
+async def analyze_batch(batch: BatchAnalyzeRequest):
+    """
+    Analyze a list of companies, streaming one NDJSON line per company as it finishes.
+
+    Companies run through CompanyAnalysisWorkflow at most BATCH_MAX_CONCURRENCY
+    at a time and are started no faster than BATCH_START_RATE_PER_MINUTE, which
+    bounds the request rate each company fans out to Firecrawl and Perplexity.
+    Duplicate companies, and companies already being analyzed by another
+    request, share one run; they and stored results (max_age) don't count
+    against the start rate.
+
+    Lines:
+      - {"type": "result", "index", "company_url", "crunchbase_url", "status": "succeeded", "elapsed_seconds", "result"}
+      - {"type": "result", ..., "status": "failed", "error"}
+      - {"type": "summary", "total", "unique", "succeeded", "failed", "elapsed_seconds", "companies_per_minute"} (last;
+        companies_per_minute counts unique companies)
+    """
+    logger.info("=" * 80)
+    logger.info(f"🚀 POST /api/analyze/batch - {len(batch.companies)} companies")
+    logger.info("=" * 80)
+
+    if len(batch.companies) > config.BATCH_MAX_COMPANIES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch too large: {len(batch.companies)} companies (max {config.BATCH_MAX_COMPANIES})"
+        )
+
+    return StreamingResponse(_stream_batch(batch), media_type="application/x-ndjson")
+
+async def _stream_batch(batch: BatchAnalyzeRequest) -> AsyncIterator[str]:
+    start_time = time.time()
+    concurrency = min(batch.max_concurrency or config.BATCH_MAX_CONCURRENCY, config.BATCH_MAX_CONCURRENCY)
+    semaphore = asyncio.Semaphore(concurrency)
+    starts = TokenBucket(
+        "batch_starts",
+        rate=config.BATCH_START_RATE_PER_MINUTE / 60,
+        capacity=concurrency
+    )
+    logger.info(f"Batch concurrency {concurrency}, start rate {config.BATCH_START_RATE_PER_MINUTE}/min")
+
+    async def analyze_one(indices: list, company_url: str, crunchbase_url: str) -> list:
+        request = AnalyzeRequest(
+            company_url=company_url,
+            crunchbase_url=crunchbase_url,
+            force_refresh=batch.force_refresh,
+            max_age=batch.max_age,
+            include_diagnostics=batch.include_diagnostics
+        )
+        outcome = {}
+        async with semaphore:
+            company_start = time.time()
+            try:
+                analysis = await _load_stored_analysis(request)
+                if analysis is None:
+                    # Only a new workflow run counts against the start rate; joining one doesn't
+                    if not _analysis_flights.in_flight(_analysis_flight_key(request)):
+                        await starts.acquire()
+                    analysis = await _run_analysis_shared(request)
+                outcome.update(status="succeeded", result=_with_diagnostics(request, analysis).model_dump(mode="json"))
+            except Exception as e:
+                logger.error(f"❌ Batch company {company_url} failed: {str(e)}")
+                outcome.update(status="failed", error=str(e))
+            outcome["elapsed_seconds"] = round(time.time() - company_start, 2)
+
+        return [
+            {"type": "result", "index": index, "company_url": batch.companies[index].company_url,
+             "crunchbase_url": batch.companies[index].crunchbase_url, **outcome}
+            for index in indices
+        ]
+
+    # The same company listed twice is analyzed once and reported at each position
+    groups = {}
+    for index, company in enumerate(batch.companies):
+        key = (normalize_url(company.company_url), normalize_url(company.crunchbase_url))
+        groups.setdefault(key, []).append(index)
+
+    tasks = [
+        asyncio.create_task(analyze_one(
+            indices, batch.companies[indices[0]].company_url, batch.companies[indices[0]].crunchbase_url
+        ))
+        for indices in groups.values()
+    ]
+    total = len(batch.companies)
+    counts = {"succeeded": 0, "failed": 0}
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            for line in await next_done:
+                counts[line["status"]] += 1
+                logger.info(f"📤 Batch {sum(counts.values())}/{total}: {line['company_url']} {line['status']}")
+                yield json.dumps(line) + "\n"
+
+        elapsed = time.time() - start_time
+        summary = {
+            "type": "summary",
+            "total": total,
+            "unique": len(tasks),
+            **counts,
+            "elapsed_seconds": round(elapsed, 2),
+            "companies_per_minute": round(len(tasks) / elapsed * 60, 2) if elapsed > 0 else None
+        }
+        logger.info(f"✅ Batch of {total} finished in {elapsed:.2f}s ({summary['companies_per_minute']} companies/min)")
+        yield json.dumps(summary) + "\n"
+
+    finally:
+        # Client disconnected: drop the companies that have not finished yet
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+@router.post("/analyze/stream")
+async def analyze_company_stream(request: AnalyzeRequest):
+    """
+    Run the analysis workflow and stream progress as Server-Sent Events.
+
+    Events, in order:
+      - stage: {"stage", "status", "elapsed"} when a workflow stage starts/completes
+      - agent_result: {"agent", "result", "elapsed"} as soon as each agent resolves
+      - result: the full AnalysisResult once synthesis finishes
+      - agent_result for deep_market_research after the result, if the result
+        had deep_market_research_pending
+      - error: {"detail"} if the workflow fails
+
+    A stored result allowed by max_age is sent as a single result event.
+    Disconnecting cancels the run.
+    """
+    logger.info("=" * 80)
+    logger.info("🚀 POST /api/analyze/stream")
+    logger.info(f"Company URL: {request.company_url}")
+    logger.info(f"Crunchbase URL: {request.crunchbase_url}")
+    logger.info("=" * 80)
+
+    return StreamingResponse(
+        _stream_analysis(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+async def _stream_analysis(request: AnalyzeRequest) -> AsyncIterator[str]:
+    start_time = time.time()
+
+    stored = await _load_stored_analysis(request)
+    if stored is not None:
+        yield _sse("result", stored.model_dump(mode="json"))
+        return
+
+    deadline = Deadline(config.ANALYSIS_DEADLINE_SECONDS)
+    persisted = asyncio.Event()
+    late_research = asyncio.get_running_loop().create_future()
+
+    async def on_deep_research(research: dict):
+        if not late_research.done():
+            late_research.set_result(research)
+        await _merge_late_deep_research(request, research, persisted)
+
+    handler = start_analysis(
+        request.company_url,
+        request.crunchbase_url,
+        force_refresh=request.force_refresh,
+        deadline=deadline,
+        on_deep_research=on_deep_research
+    )
+    try:
+        async for event in handler.stream_events():
+            if isinstance(event, AgentResultEvent):
+                logger.info(f"📤 Streaming {event.agent} result ({event.elapsed:.2f}s)")
+                yield _sse("agent_result", event.model_dump(mode="json"))
+            elif isinstance(event, StageEvent):
+                yield _sse("stage", event.model_dump(mode="json"))
+
+        analysis = AnalysisResult(**(await handler))
+        await _persist_analysis(request, analysis)
+        persisted.set()
+        logger.info(f"✅ Streamed analysis completed in {time.time() - start_time:.2f}s")
+        yield _sse("result", _with_diagnostics(request, analysis).model_dump(mode="json"))
+
+        if analysis.deep_market_research_pending:
+            # Keep the stream open for deep research; its budget ends with the deadline
+            try:
+                research = await asyncio.wait_for(asyncio.shield(late_research), timeout=deadline.remaining() + 5)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️  Deep market research did not land before the deadline")
+            else:
+                logger.info(f"📤 Streaming late deep_market_research result ({time.time() - start_time:.2f}s)")
+                yield _sse("agent_result", {
+                    "agent": "deep_market_research",
+                    "result": research,
+                    "elapsed": time.time() - start_time
+                })
+
+    except Exception as e:
+        logger.error(f"❌ Streamed analysis failed after {time.time() - start_time:.2f}s: {str(e)}", exc_info=True)
+        yield _sse("error", {"detail": f"Analysis failed: {str(e)}"})
+
+    finally:
+        persisted.set()
+        # Client went away (or we failed) mid-run: stop the workflow instead of finishing unseen work
+        if not handler.is_done():
+            logger.info("Stream closed before the workflow finished - cancelling run")
+            await handler.cancel_run()
+
+@router.post("/jobs", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def submit_analysis_job(request: AnalyzeRequest):
+    """
+    Queue a company analysis and return its job id immediately.
+
+    Poll GET /api/jobs/{job_id} for status and per-agent partial results;
+    DELETE /api/jobs/{job_id} cancels it. Jobs run on a bounded worker pool
+    (JOB_WORKERS, JOB_QUEUE_MAX) - a full queue returns 503.
+    """
+    logger.info(f"🚀 POST /api/jobs - {request.company_url} / {request.crunchbase_url}")
+    manager = get_job_manager()
+    try:
+        job = manager.submit(request, _run_analysis_job)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return JobStatus(**job.snapshot(manager.queue_position(job)))
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_analysis_job(job_id: str):
+    """
+    Status of an analysis job, with agent results as soon as each one finishes
+    and the full AnalysisResult once it has succeeded.
+    """
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return JobStatus(**job.snapshot(manager.queue_position(job)))
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_analysis_job(job_id: str):
+    """
+    Cancel a queued or running analysis job. Finished jobs are returned unchanged.
+    """
+    logger.info(f"DELETE /api/jobs/{job_id}")
+    manager = get_job_manager()
+    job = manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    if job.task is not None:
+        # Let the run unwind (and cancel its workflow) before reporting
+        await asyncio.wait([job.task], timeout=5)
+    return JobStatus(**job.snapshot(manager.queue_position(job)))
+
+async def _run_analysis_job(job: Job) -> dict:
+    """
+    Job body for /api/jobs: run the workflow, recording stage progress and
+    agent results on the job as they are streamed.
+    """
+    request: AnalyzeRequest = job.payload
+
+    stored = await _load_stored_analysis(request)
+    if stored is not None:
+        return stored.model_dump(mode="json")
+
+    result: dict = {}
+    persisted = asyncio.Event()
+
+    async def on_deep_research(research: dict):
+        job.partial["deep_market_research"] = research
+        await _merge_late_deep_research(request, research, persisted, result)
+
+    handler = start_analysis(
+        request.company_url,
+        request.crunchbase_url,
+        force_refresh=request.force_refresh,
+        on_deep_research=on_deep_research
+    )
+    try:
+        async for event in handler.stream_events():
+            if isinstance(event, AgentResultEvent):
+                job.partial[event.agent] = event.result
+            elif isinstance(event, StageEvent):
+                job.stages[event.stage] = {"status": event.status, "elapsed": event.elapsed}
+
+        analysis = AnalysisResult(**(await handler))
+        await _persist_analysis(request, analysis)
+        # Late deep research is merged into this same dict when it lands
+        result.update(_with_diagnostics(request, analysis).model_dump(mode="json"))
+        return result
+
+    finally:
+        persisted.set()
+        if not handler.is_done():
+            logger.info(f"Job {job.id} stopped before the workflow finished - cancelling run")
+            await handler.cancel_run()
+
+@router.get("/analyses", response_model=StoredAnalysisList)
+async def list_analyses(
+    limit: int = Query(50, ge=1, le=500),
+    before: Optional[float] = Query(None, description="created_at cursor from the previous page")
+):
+    """
+    List stored analyses, most recent first. Page with ?before=<next_before>.
+    """
+    logger.debug(f"Listing stored analyses (limit={limit}, before={before})")
+    rows = await get_result_store().alist(limit=limit, before=before)
+    analyses = [
+        StoredAnalysisSummary(
+            name=row.name,
+            company_url=row.company_url,
+            crunchbase_url=row.crunchbase_url,
+            analyzed_at=row.analyzed_at,
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
+    return StoredAnalysisList(
+        analyses=analyses,
+        count=len(analyses),
+        next_before=rows[-1].created_at if len(rows) == limit else None
+    )
+
+@router.get("/admin/http-pool")
+async def http_pool_stats():
+    """
+    Connection pool statistics of the shared outbound HTTP client.
+    Use to tune HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE_CONNECTIONS under load.
+    """
+    logger.debug("HTTP pool stats endpoint called")
+    return get_pool_stats()
+
+@router.get("/admin/llm-pool")
+async def llm_pool_stats():
+    """
+    Shared Perplexity client registry: in-flight and queued completions
+    and queue wait times per model.
+    """
+    logger.debug("LLM pool stats endpoint called")
+    return get_llm_stats()
+
+@router.get("/admin/cache")
+async def cache_stats():
+    """
+    Hit/miss counters and sizes for every cache (Crunchbase scrapes, ...).
+    """
+    logger.debug("Cache stats endpoint called")
+    return get_cache_stats()
+
+@router.get("/admin/singleflight")
+async def singleflight_stats():
+    """
+    In-flight request coalescing: how many calls started work (leaders)
+    and how many joined an identical in-flight call (followers).
+    """
+    logger.debug("Single-flight stats endpoint called")
+    return get_singleflight_stats()
+
+@router.get("/admin/agents")
+async def agent_stats():
+    """
+    Per-agent primary/fallback latency (p50/p95/p99) and win/failure counts,
+    plus end-to-end agent latency in the workflow and how often synthesis went
+    ahead without deep research, prompt sizes before/after trimming, and how
+    many responses needed JSON repair or were unusable. Use to tune
+    HEDGE_DELAY_SECONDS / HEDGE_AGENT_DELAYS, STAGE_BUDGETS,
+    DEEP_RESEARCH_SOFT_DEADLINE_SECONDS and PROMPT_TOKEN_BUDGETS.
+    """
+    logger.debug("Agent stats endpoint called")
+    return {**get_hedging_stats(), "workflow": get_agent_latency_stats(), "prompts": get_prompt_stats(), "json": get_json_extract_stats()}
+
+@router.get("/admin/jobs")
+async def job_stats():
+    """
+    Background job pool: queue depth, running jobs, outcome counts,
+    and queue wait / run time percentiles.
+    """
+    logger.debug("Job stats endpoint called")
+    return get_job_manager().stats()
+
+@router.get("/admin/rate-limits")
+async def rate_limit_stats():
+    """
+    Per-provider rate limiters (Firecrawl scrape/search, Perplexity sonar/sonar-pro):
+    in-flight and waiting calls, 429 count and slot wait percentiles.
+    Use to tune PROVIDER_RATE_LIMITS / PROVIDER_CONCURRENCY.
+    """
+    logger.debug("Rate limit stats endpoint called")
+    return get_rate_limit_stats()
+
+@router.get("/admin/cassettes")
+async def cassette_stats():
+    """
+    Provider record/replay: CASSETTE_MODE, directory, and how many calls were
+    recorded, replayed (exactly or by route) or missing from their cassette.
+    """
+    logger.debug("Cassette stats endpoint called")
+    return get_cassette_stats()
+
+@router.get("/admin/costs")
+async def cost_stats(
+    hours: float = Query(24 * 7, gt=0, le=24 * 365, description="Window of analyses to summarize")
+):
+    """
+    Provider spend of the analyses finished in the last `hours`: totals, cost
+    per analysis (mean/p50/p95/max), per-agent tokens, credits, cost share and
+    time, per-provider figures, daily totals and the most expensive analyses.
+    Also usage per provider since startup (including /api/search) and the
+    prices used for estimates.
+    """
+    logger.debug("Cost stats endpoint called")
+    rows = await get_result_store().alist_usage(time.time() - hours * 3600)
+    return {"analyses": summarize_usage(rows, hours), "process": get_process_usage()}
+
+@router.get("/admin/tracing")
+async def tracing_stats():
+    """
+    Span exporter (TRACE_EXPORTER and its file or OTLP endpoint) and counts of
+    spans started, exported and dropped.
+    """
+    logger.debug("Tracing stats endpoint called")
+    return get_tracing_stats()
+
+@router.get("/admin/logging")
+async def log_levels():
+    """
+    Console and file log levels currently in effect.
+    """
+    return get_log_levels()
+
+@router.put("/admin/logging")
+async def update_log_levels(
+    level: str = Query(..., description="Console level: DEBUG, INFO, WARNING or ERROR"),
+    file_level: Optional[str] = Query(None, description="File level (default: same as level)")
+):
+    """
+    Change log levels at runtime, e.g. ?level=DEBUG while investigating a live
+    issue. Lasts until restart; set LOG_LEVEL / LOG_FILE_LEVEL to persist.
+    """
+    try:
+        levels = set_log_level(level, file_level)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    logger.info(f"🔧 Log levels changed: console={levels['console']}, file={levels['file']}")
+    return levels
@@ -0,0 +1,240 @@
+"""
+Benchmark: /api/search and /api/analyze at fixed concurrency against mock providers.
+
+Starts benchmarks.mock_providers in a subprocess (so its threads don't compete
+with the app for the GIL), points the backend at it, then drives the FastAPI
+app in-process with a fixed number of concurrent clients. Caches, the result
+store and rate limits are disabled by default so every request does the full
+amount of work; logs and cache files go to a temporary directory.
+
+Reports, per endpoint: throughput, p50/p95/p99 latency, errors by status,
+event-loop lag (how late a 10 ms heartbeat wakes up) and provider call counts.
+
+Usage (from backend/):
+    python -m benchmarks.load_test --endpoint search --concurrency 32 --requests 500
+    python -m benchmarks.load_test --endpoint analyze --concurrency 8 --requests 40 \\
+        --latency llm=lognormal:2,0.4 --error-rate scrape=0.05 --seed 1
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.mock_providers import PROVIDERS, add_profile_arguments, profiles_from_args
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of the values (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _summary(values: List[float], scale: float = 1.0, digits: int = 3) -> Dict[str, Optional[float]]:
+    def fmt(value):
+        return None if value is None else round(value * scale, digits)
+
+    return {
+        "p50": fmt(percentile(values, 50)),
+        "p95": fmt(percentile(values, 95)),
+        "p99": fmt(percentile(values, 99)),
+        "max": fmt(max(values) if values else None),
+    }
+
+
+class LoopLagMonitor:
+    """Heartbeat task recording how late each wake-up is; a blocked loop shows up as lag."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            before = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - before - self.interval))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> List[float]:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return self.samples
+
+
+def start_mock_providers(args: argparse.Namespace) -> Tuple[subprocess.Popen, Dict]:
+    """
+    Start the mock providers with the same profile options.
+
+    Returns:
+        (process, {"port", "profiles"}) once it is listening
+    """
+    command = [sys.executable, "-m", "benchmarks.mock_providers", "--port", "0"]
+    for option, values in (("--latency", args.latency), ("--error-rate", args.error_rate),
+                           ("--error-status", args.error_status), ("--payload", args.payload)):
+        for value in values:
+            command += [option, value]
+    if args.seed is not None:
+        command += ["--seed", str(args.seed)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line:
+        raise RuntimeError("Mock providers exited before listening")
+    return process, json.loads(line)
+
+
+def configure_backend(mock_url: str, workdir: str, keep_limits: bool):
+    """Environment for the app under test; explicit env vars still win."""
+    os.environ["FIRECRAWL_API_URL"] = mock_url
+    os.environ["PPLX_API_BASE"] = mock_url
+    defaults = {
+        "FIRECRAWL_API_KEY": "bench",
+        "PPLX_API_KEY": "bench",
+        "LLM_CACHE_ENABLED": "false",
+        "CACHE_DISK_ENABLED": "false",
+        "CACHE_DIR": os.path.join(workdir, "cache"),
+        "RESULT_STORE_PATH": os.path.join(workdir, "analyses.db"),
+        "LOG_DIR": os.path.join(workdir, "logs"),
+        "LOG_LEVEL": "WARNING",
+    }
+    if not keep_limits:
+        defaults["PROVIDER_RATE_LIMITS"] = ",".join(
+            f"{provider}=0" for provider in ("firecrawl_scrape", "firecrawl_search", "sonar", "sonar_pro")
+        )
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def request_for(endpoint: str, index: int, distinct: int) -> Dict:
+    """Request body for the index-th request; `distinct` > 0 cycles through that many companies."""
+    key = index % distinct if distinct else index
+    if endpoint == "search":
+        return {"query": f"benchmark company {key}"}
+    return {
+        "company_url": f"https://www.bench-company-{key}.example",
+        "crunchbase_url": f"https://www.crunchbase.com/organization/bench-company-{key}",
+    }
+
+
+async def drive(client, endpoint: str, total: int, concurrency: int, distinct: int, offset: int = 0) -> Dict:
+    """Issue `total` requests with `concurrency` clients, each starting its next request when one finishes."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = itertools.count(offset)
+
+    async def worker():
+        while True:
+            index = next(counter)
+            if index >= offset + total:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/{endpoint}", json=request_for(endpoint, index, distinct))
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return {"wall": time.perf_counter() - started, "latencies": latencies, "statuses": statuses}
+
+
+async def provider_stats(mock_url: str) -> Dict[str, Dict[str, int]]:
+    import httpx
+    async with httpx.AsyncClient(base_url=mock_url) as client:
+        return (await client.get("/stats")).json()
+
+
+async def run(args: argparse.Namespace, mock_url: str) -> List[Dict]:
+    import httpx
+    from main import app
+
+    reports = []
+    monitor = LoopLagMonitor()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            offset = 0
+            for endpoint in args.endpoint:
+                if args.warmup:
+                    await drive(client, endpoint, args.warmup, args.concurrency, args.distinct, offset=offset)
+                    offset += args.warmup
+                before = await provider_stats(mock_url)
+                monitor.start()
+                result = await drive(client, endpoint, args.requests, args.concurrency, args.distinct, offset=offset)
+                lag = await monitor.stop()
+                after = await provider_stats(mock_url)
+                offset += args.requests
+
+                ok = result["statuses"].get("200", 0)
+                reports.append({
+                    "endpoint": f"/api/{endpoint}",
+                    "concurrency": args.concurrency,
+                    "requests": args.requests,
+                    "ok": ok,
+                    "errors": {status: count for status, count in result["statuses"].items() if status != "200"},
+                    "wall_seconds": round(result["wall"], 3),
+                    "throughput_rps": round(args.requests / result["wall"], 2),
+                    "latency_seconds": _summary(result["latencies"]),
+                    "loop_lag_ms": _summary(lag, scale=1000, digits=1),
+                    "provider_calls": {
+                        provider: {stat: after[provider][stat] - before[provider][stat] for stat in after[provider]}
+                        for provider in PROVIDERS
+                    },
+                })
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", nargs="+", choices=["search", "analyze"], default=["search", "analyze"],
+                        help="Endpoints to benchmark, in order")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=40, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per endpoint first")
+    parser.add_argument("--distinct", type=int, default=0,
+                        help="Distinct companies/queries to cycle through (0 = every request unique, so no cache hits)")
+    parser.add_argument("--keep-rate-limits", action="store_true",
+                        help="Keep the configured PROVIDER_RATE_LIMITS instead of disabling them")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        profiles_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    mock, info = start_mock_providers(args)
+    mock_url = f"http://127.0.0.1:{info['port']}"
+    try:
+        with tempfile.TemporaryDirectory(prefix="investigate-bench-") as workdir:
+            configure_backend(mock_url, workdir, args.keep_rate_limits)
+            print(json.dumps({"providers": info["profiles"]}))
+            for report in asyncio.run(run(args, mock_url)):
+                print(json.dumps(report))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == "__main__":
+    main()
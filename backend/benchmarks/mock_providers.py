@@ -0,0 +1,391 @@
+"""
+Local stand-ins for Firecrawl search/scrape and Perplexity chat completions.
+
+Each provider has its own latency distribution, error rate and payload size,
+so load tests can reproduce slow or flaky upstreams without API credits.
+Point the backend at it with FIRECRAWL_API_URL and PPLX_API_BASE.
+
+Latency specs (seconds):
+    fixed:0.3               always 0.3
+    uniform:0.1,0.8         uniform between 0.1 and 0.8
+    lognormal:1.5,0.4       median 1.5, sigma 0.4 (long right tail, like real LLM calls)
+    exponential:0.5         mean 0.5
+
+Usage (from backend/):
+    python -m benchmarks.mock_providers --port 9100 \\
+        --latency llm=lognormal:1.5,0.4 --error-rate scrape=0.05 --payload search=4000
+
+Endpoints: POST /v2/search, POST /v2/scrape, POST /v2/batch/scrape (finishes
+after one scrape latency; poll GET /v2/batch/scrape/<id>), POST /chat/completions,
+GET /stats.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+PROVIDERS = ("search", "scrape", "llm")
+
+
+@dataclass
+class Latency:
+    """A latency distribution parsed from a "kind:params" spec."""
+
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """
+        Parse a latency spec such as "lognormal:1.5,0.4".
+
+        Raises:
+            ValueError: If the kind is unknown or has the wrong number of parameters
+        """
+        kind, _, raw = spec.partition(":")
+        params = [float(value) for value in raw.split(",") if value.strip()]
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2, "exponential": 1}
+        if kind not in expected:
+            raise ValueError(f"Unknown latency distribution: {kind} (expected one of {', '.join(expected)})")
+        if len(params) != expected[kind]:
+            raise ValueError(f"{kind} latency takes {expected[kind]} parameter(s), got '{raw}'")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        return self.params[0]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{value:g}' for value in self.params)}"
+
+
+@dataclass
+class ProviderProfile:
+    """How one mocked provider behaves."""
+
+    latency: Latency
+    error_rate: float = 0.0  # fraction of requests answered with error_status
+    error_status: int = 500
+    payload_chars: int = 2000  # markdown per page (search/scrape) or summary text per completion
+
+
+DEFAULT_PROFILES = {
+    "search": ProviderProfile(Latency.parse("lognormal:0.6,0.3"), payload_chars=2000),
+    "scrape": ProviderProfile(Latency.parse("lognormal:1.0,0.4"), payload_chars=4000),
+    "llm": ProviderProfile(Latency.parse("lognormal:2.0,0.4"), payload_chars=400),
+}
+
+# Filler for generated pages and completions
+_WORDS = (
+    "platform customers revenue growth market enterprise team product funding launch "
+    "expansion partners pipeline retention pricing competitors regulation hiring"
+).split()
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    words = []
+    length = 0
+    while length < chars:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    # Paragraph breaks so the prompt builder's dedupe sees realistic pages
+    return "\n\n".join(" ".join(words[i:i + 60]) for i in range(0, len(words), 60))[:chars]
+
+
+def _company_from_url(url: str) -> str:
+    slug = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1] or "acme"
+    return slug.replace("-", " ").title()
+
+
+def _completion(prompt: str, rng: random.Random, chars: int) -> Dict:
+    """A schema-valid answer for whichever agent wrote the prompt."""
+    summary = _text(rng, chars)
+    if '"indicators"' in prompt:
+        return {
+            "indicators": {key: rng.randint(30, 90) for key in ("growth", "team", "market", "product")},
+            "outlook": {"overall": rng.choice(["Strong", "Moderate", "Weak"]), "summary": summary, "keyPoints": [_text(rng, 80)]},
+        }
+    if "market_overview" in prompt:
+        return {
+            "market_overview": {"tam": "$40B", "sam": "$6B", "som": "$400M", "sources": []},
+            "competitive_landscape": [{"name": "Rival Inc", "positioning": "Incumbent suite", "strengths": ["brand"], "weaknesses": ["price"]}],
+            "market_trends": [{"trend": "Consolidation", "impact": "Medium", "description": summary}],
+            "growth_trajectory": {"current_rate": "18%", "projected_rate": "22%", "key_drivers": ["adoption"]},
+            "barriers_and_moats": {"entry_barriers": ["capital"], "company_moats": ["data"]},
+            "regulatory_landscape": {"regulations": [], "compliance_requirements": []},
+            "expansion_opportunities": [],
+            "market_risks": [],
+            "sources": [],
+        }
+    if "founders" in prompt and "key_members" in prompt:
+        return {"founders": [{"name": "Alex Doe", "background": _text(rng, 120)}], "key_members": [], "advisors": [], "summary": summary}
+    if "competition_level" in prompt:
+        return {"market_size": "$6B", "competition_level": "High", "target_segment": "Mid-market", "market_trends": ["consolidation"], "summary": summary}
+    if "red_flags" in prompt:
+        return {
+            "technical_risks": [], "market_risks": ["crowded market"], "team_risks": [], "financial_risks": [],
+            "red_flags": [], "overall_risk_level": "Medium", "summary": summary,
+        }
+    return {"revenue": "$5M ARR", "users": "1,200 customers", "growth_rate": "3x YoY", "milestones": ["Series A"], "summary": summary}
+
+
+class MockProviders:
+    """Threaded HTTP server answering Firecrawl and Perplexity requests per the profiles."""
+
+    def __init__(self, profiles: Optional[Dict[str, ProviderProfile]] = None, seed: Optional[int] = None):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {name: {"requests": 0, "errors": 0, "bytes": 0} for name in PROVIDERS}
+        # Batch scrapes: requests counts started jobs, these the pages and status polls
+        self.stats["scrape"].update({"pages": 0, "polls": 0})
+        self._jobs: Dict[str, Dict] = {}
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def _draw(self, provider: str):
+        """(delay, failed, per-request rng) for the next request, drawn under the lock."""
+        profile = self.profiles[provider]
+        with self._lock:
+            self.stats[provider]["requests"] += 1
+            failed = self._rng.random() < profile.error_rate
+            if failed:
+                self.stats[provider]["errors"] += 1
+            return profile.latency.sample(self._rng), failed, random.Random(self._rng.random())
+
+    def respond(self, path: str, body: Dict):
+        """
+        Answer one request.
+
+        Returns:
+            (status, payload dict, provider name)
+        """
+        if path == "/v2/batch/scrape":
+            return self._start_batch(body)
+        if path == "/v2/search":
+            provider = "search"
+        elif path == "/v2/scrape":
+            provider = "scrape"
+        elif path.endswith("/chat/completions"):
+            provider = "llm"
+        else:
+            return 404, {"error": f"Unknown path {path}"}, None
+
+        profile = self.profiles[provider]
+        delay, failed, rng = self._draw(provider)
+        time.sleep(delay)
+        if failed:
+            return profile.error_status, {"success": False, "error": "Injected failure"}, provider
+
+        if provider == "search":
+            query = body.get("query", "")
+            crunchbase = query.startswith("site:crunchbase.com")
+            topic = re.sub(r"^site:\S+\s*", "", query)
+            slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-") or "company"
+            web = [
+                {
+                    "url": f"https://www.crunchbase.com/organization/{slug}-{i}" if crunchbase else f"https://news.example.com/{slug}/{i}",
+                    "title": f"{topic[:40]} {i}" + (" - Crunchbase Company Profile" if crunchbase else ""),
+                    "description": _text(rng, 160),
+                    **({} if crunchbase else {"markdown": _text(rng, profile.payload_chars)}),
+                }
+                for i in range(int(body.get("limit", 5)))
+            ]
+            return 200, {"success": True, "data": {"web": web}}, provider
+
+        if provider == "scrape":
+            url = body.get("url", "")
+            formats = body.get("formats", [])
+            if any(isinstance(item, dict) and item.get("type") == "json" for item in formats):
+                data = {"json": {
+                    "company_name": _company_from_url(url),
+                    "company_description": _text(rng, 300),
+                    "mission": _text(rng, 120),
+                    "founders": "Alex Doe, Sam Roe",
+                    "funding_amount": "$12M",
+                    "employee_count": rng.randint(10, 500),
+                }, "metadata": {"sourceURL": url}}
+            else:
+                data = {"markdown": _text(rng, profile.payload_chars), "metadata": {"title": _company_from_url(url), "sourceURL": url}}
+            return 200, {"success": True, "data": data}, provider
+
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        content = json.dumps(_completion(prompt, rng, profile.payload_chars))
+        completion_tokens = len(content) // 4
+        return 200, {
+            "choices": [{"message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion_tokens, "total_tokens": len(prompt) // 4 + completion_tokens},
+        }, provider
+
+    def _start_batch(self, body: Dict):
+        """Start a batch scrape job; its pages are scraped in parallel, so it takes one scrape latency."""
+        profile = self.profiles["scrape"]
+        delay, failed, rng = self._draw("scrape")
+        if failed:
+            return profile.error_status, {"success": False, "error": "Injected failure"}, "scrape"
+        urls = list(body.get("urls", []))
+        with self._lock:
+            self.stats["scrape"]["pages"] += len(urls)
+            job_id = f"job-{len(self._jobs) + 1}"
+            self._jobs[job_id] = {"urls": urls, "ready_at": time.monotonic() + delay, "rng": rng}
+        return 200, {"success": True, "id": job_id, "url": f"/v2/batch/scrape/{job_id}"}, "scrape"
+
+    def batch_status(self, job_id: str):
+        """
+        Status of a batch scrape job.
+
+        Returns:
+            (status, payload dict, provider name)
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self.stats["scrape"]["polls"] += 1
+        if job is None:
+            return 404, {"success": False, "error": f"Unknown job {job_id}"}, "scrape"
+        total = len(job["urls"])
+        if time.monotonic() < job["ready_at"]:
+            return 200, {"status": "scraping", "total": total, "completed": 0, "creditsUsed": 0, "data": []}, "scrape"
+        rng, chars = job["rng"], self.profiles["scrape"].payload_chars
+        data = [
+            {"markdown": _text(rng, chars), "metadata": {"title": _company_from_url(url), "sourceURL": url, "statusCode": 200}}
+            for url in job["urls"]
+        ]
+        return 200, {"status": "completed", "total": total, "completed": total, "creditsUsed": total, "data": data}, "scrape"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Serve in a daemon thread. Returns the bound port."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+
+            def _send(self, status: int, payload: Dict, provider: Optional[str] = None):
+                body = json.dumps(payload).encode()
+                if provider:
+                    with mock._lock:
+                        mock.stats[provider]["bytes"] += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", "1")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except json.JSONDecodeError:
+                    body = {}
+                self._send(*mock.respond(urlparse(self.path).path, body))
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path == "/stats":
+                    with mock._lock:
+                        self._send(200, {name: dict(stats) for name, stats in mock.stats.items()})
+                elif path.startswith("/v2/batch/scrape/"):
+                    self._send(*mock.batch_status(path.rsplit("/", 1)[-1]))
+                else:
+                    self._send(404, {"error": "Not found"})
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.server.server_address[1]
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Add the per-provider --latency/--error-rate/--error-status/--payload options."""
+    group = parser.add_argument_group("mock providers (search, scrape, llm)")
+    group.add_argument("--latency", action="append", default=[], metavar="PROVIDER=SPEC",
+                       help="Latency distribution, e.g. llm=lognormal:2,0.4 (repeatable)")
+    group.add_argument("--error-rate", action="append", default=[], metavar="PROVIDER=RATE",
+                       help="Fraction of requests that fail, e.g. scrape=0.05 (repeatable)")
+    group.add_argument("--error-status", action="append", default=[], metavar="PROVIDER=STATUS",
+                       help="HTTP status for injected failures, e.g. llm=429 (default 500)")
+    group.add_argument("--payload", action="append", default=[], metavar="PROVIDER=CHARS",
+                       help="Page markdown (search/scrape) or completion summary size in chars")
+    group.add_argument("--seed", type=int, default=None, help="Random seed for reproducible runs")
+
+
+def profiles_from_args(args: argparse.Namespace) -> Dict[str, ProviderProfile]:
+    """
+    Build provider profiles from the options added by add_profile_arguments.
+
+    Raises:
+        ValueError: If an option names an unknown provider or has a bad value
+    """
+    profiles = {
+        name: ProviderProfile(profile.latency, profile.error_rate, profile.error_status, profile.payload_chars)
+        for name, profile in DEFAULT_PROFILES.items()
+    }
+    options = (
+        ("latency", args.latency, Latency.parse),
+        ("error_rate", args.error_rate, float),
+        ("error_status", args.error_status, int),
+        ("payload_chars", args.payload, int),
+    )
+    for attribute, values, convert in options:
+        for item in values:
+            provider, _, value = item.partition("=")
+            if provider not in profiles:
+                raise ValueError(f"Unknown provider '{provider}' in '{item}' (expected one of {', '.join(PROVIDERS)})")
+            setattr(profiles[provider], attribute, convert(value))
+    return profiles
+
+
+def describe(profiles: Dict[str, ProviderProfile]) -> Dict[str, Dict]:
+    return {
+        name: {"latency": str(profile.latency), "error_rate": profile.error_rate, "error_status": profile.error_status, "payload_chars": profile.payload_chars}
+        for name, profile in profiles.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100, help="Port to listen on (0 = any free port)")
+    add_profile_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        profiles = profiles_from_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    mock = MockProviders(profiles, seed=args.seed)
+    port = mock.start(args.host, args.port)
+    # First line is machine-readable so load_test can read the port
+    print(json.dumps({"port": port, "profiles": describe(profiles)}), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
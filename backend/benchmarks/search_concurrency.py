@@ -0,0 +1,125 @@
+"""
+Benchmark: concurrent /api/search calls against a local fake Firecrawl.
+
+Starts a threaded HTTP server that answers every search after a fixed delay,
+then fires N concurrent searches through the FastAPI app while a heartbeat
+task measures how long the event loop is stalled.
+
+Compares the old blocking path (sync search_crunchbase called inline from the
+handler) with the async path now used by /api/search.
+
+Usage (from backend/):
+    python -m benchmarks.search_concurrency --requests 10 --latency 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def start_fake_firecrawl(latency: float) -> ThreadingHTTPServer:
+    """Start a fake Firecrawl search server on a free port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            time.sleep(latency)
+            body = json.dumps({
+                "success": True,
+                "data": {"web": [
+                    {
+                        "url": f"https://www.crunchbase.com/organization/company-{i}",
+                        "title": f"Company {i} - Crunchbase Company Profile",
+                        "description": "Fake search result"
+                    }
+                    for i in range(5)
+                ]}
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def heartbeat(stop: asyncio.Event, interval: float = 0.01) -> float:
+    """Return the worst event-loop stall observed while running."""
+    worst = 0.0
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - before - interval)
+    return worst
+
+
+async def run(mode: str, n: int) -> dict:
+    import httpx
+    from services import crunchbase_scraper
+    from services.http_client import close_http_client
+
+    async def blocking_search(query: str, limit: int = 5):
+        # The pre-async handler called the sync client directly on the loop
+        return crunchbase_scraper.search_crunchbase(query, limit=limit)
+
+    from api import routes
+    original = routes.search_crunchbase_async
+    if mode == "blocking":
+        routes.search_crunchbase_async = blocking_search
+
+    from main import app
+
+    stop = asyncio.Event()
+    hb = asyncio.create_task(heartbeat(stop))
+    start = time.perf_counter()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            responses = await asyncio.gather(*[
+                client.post("/api/search", json={"query": f"company {i}"})
+                for i in range(n)
+            ])
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        routes.search_crunchbase_async = original
+        await close_http_client()
+
+    return {
+        "mode": mode,
+        "requests": n,
+        "ok": sum(1 for r in responses if r.status_code == 200),
+        "wall_seconds": round(elapsed, 3),
+        "max_loop_stall_seconds": round(await hb, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="Concurrent searches to issue")
+    parser.add_argument("--latency", type=float, default=0.5, help="Fake Firecrawl latency in seconds")
+    args = parser.parse_args()
+
+    server = start_fake_firecrawl(args.latency)
+    os.environ["FIRECRAWL_API_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("FIRECRAWL_API_KEY", "bench")
+    os.environ.setdefault("PPLX_API_KEY", "bench")
+
+    for mode in ("blocking", "async"):
+        print(json.dumps(asyncio.run(run(mode, args.requests))))
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
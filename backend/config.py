@@ -5,11 +5,155 @@ from utils.logger import setup_logger
 load_dotenv()
 logger = setup_logger(__name__)
 
+def _env_float_map(name: str) -> dict:
+    """Parse a "key=value,key=value" env var into a dict of floats."""
+    return {
+        key.strip(): float(value)
+        for key, value in (
+            item.split("=", 1) for item in os.getenv(name, "").split(",") if "=" in item
+        )
+    }
+
 class Config:
     # API Keys
     PPLX_API_KEY = os.getenv("PPLX_API_KEY")
     FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY")
 
+    # Firecrawl
+    FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev")
+
+    # Perplexity
+    PPLX_API_BASE = os.getenv("PPLX_API_BASE", "https://api.perplexity.ai")
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))  # per model (default for PROVIDER_CONCURRENCY)
+
+    # LLM completion cache (prompt hash + model + temperature)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "21600"))
+    # Per-agent overrides, e.g. "deep_market_research=86400,synthesis=3600"
+    LLM_CACHE_AGENT_TTLS = _env_float_map("LLM_CACHE_AGENT_TTLS")
+
+    # Agent primary (Fireplexity) / fallback (Perplexity) hedging
+    # sequential: fallback only after the primary fails (original behaviour)
+    # delayed: also start the fallback once the primary runs longer than the hedge delay
+    # parallel: start both at once
+    HEDGE_MODE = os.getenv("HEDGE_MODE", "delayed").lower()
+    HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "20"))
+    # Per-agent overrides, e.g. "synthesis=30,traction=15"
+    HEDGE_AGENT_DELAYS = _env_float_map("HEDGE_AGENT_DELAYS")
+
+    # Shared outbound HTTP client (connection pool)
+    HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "60"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+    # Caching (disk tier lives under CACHE_DIR and survives restarts)
+    CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache"))
+    CACHE_DISK_ENABLED = os.getenv("CACHE_DISK_ENABLED", "true").lower() == "true"
+    SCRAPE_CACHE_TTL_SECONDS = float(os.getenv("SCRAPE_CACHE_TTL_SECONDS", "86400"))
+    SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "512"))
+    SCRAPE_CACHE_MAX_DISK_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_DISK_ENTRIES", "5000"))  # expired files are pruned too
+
+    # Persisted analysis results (/api/analyze max_age)
+    RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "analyses.db"))
+
+    # Search (/api/search)
+    SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
+    SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "30"))
+    SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+    SEARCH_NEGATIVE_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_NEGATIVE_CACHE_TTL_SECONDS", "300"))
+    SEARCH_STALE_WHILE_REVALIDATE_SECONDS = float(os.getenv("SEARCH_STALE_WHILE_REVALIDATE_SECONDS", "86400"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+
+    # Background analysis jobs (/api/jobs)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX = int(os.getenv("JOB_QUEUE_MAX", "100"))
+    JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))  # keep finished jobs pollable
+
+    # Shared retrieval stage (one search per agent, top pages scraped once in one batch job)
+    RETRIEVAL_ENABLED = os.getenv("RETRIEVAL_ENABLED", "true").lower() == "true"
+    RETRIEVAL_RESULTS_PER_AGENT = int(os.getenv("RETRIEVAL_RESULTS_PER_AGENT", "5"))
+    RETRIEVAL_MAX_PAGE_CHARS = int(os.getenv("RETRIEVAL_MAX_PAGE_CHARS", "4000"))
+    RETRIEVAL_MAX_PAGES = int(os.getenv("RETRIEVAL_MAX_PAGES", "15"))  # pages scraped per analysis, across agents
+
+    # Per-provider rate limits shared by every agent, the scraper and search.
+    # Providers: firecrawl_scrape, firecrawl_search, sonar, sonar_pro
+    # Requests per minute (0 = unlimited), e.g. "sonar=50,sonar_pro=50"
+    PROVIDER_RATE_LIMITS = {
+        "firecrawl_scrape": 100, "firecrawl_search": 100, "sonar": 50, "sonar_pro": 50,
+        **_env_float_map("PROVIDER_RATE_LIMITS")
+    }
+    # Concurrent requests per provider, e.g. "firecrawl_scrape=10,sonar=8"
+    PROVIDER_CONCURRENCY = {
+        "firecrawl_scrape": 10, "firecrawl_search": 10,
+        "sonar": LLM_MAX_CONCURRENCY, "sonar_pro": LLM_MAX_CONCURRENCY,
+        **{key: int(value) for key, value in _env_float_map("PROVIDER_CONCURRENCY").items()}
+    }
+    # Token-bucket capacity in seconds of traffic: bursts up to rate * this (at least the concurrency) go out at once
+    RATE_LIMIT_BURST_SECONDS = float(os.getenv("RATE_LIMIT_BURST_SECONDS", "15"))
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "2"))  # 429 retries before giving up
+    RATE_LIMIT_DEFAULT_BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF_SECONDS", "5"))  # 429 without Retry-After
+
+    # Analysis deadline: one budget per analysis, narrowed per stage/agent; outbound
+    # call timeouts shrink to the time left and late agents fall back to defaults
+    ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "240"))
+    SYNTHESIS_RESERVE_SECONDS = float(os.getenv("SYNTHESIS_RESERVE_SECONDS", "45"))  # held back from every earlier stage
+    # Per stage/agent budgets from when it starts, e.g. "deep_market_research=150,traction=60"
+    STAGE_BUDGETS = {
+        "collect_data": 60, "retrieve_sources": 45,
+        "traction": 90, "team": 90, "market": 90, "risks": 90,
+        "deep_market_research": 150, "synthesis": 60,
+        **_env_float_map("STAGE_BUDGETS")
+    }
+
+    # Synthesis starts once traction/team/market/risks are done and waits at most this
+    # long for deep research; later research is merged into the result when it lands
+    # (-1 = always wait for it)
+    DEEP_RESEARCH_SOFT_DEADLINE_SECONDS = float(os.getenv("DEEP_RESEARCH_SOFT_DEADLINE_SECONDS", "10"))
+
+    # Agent prompt token budgets (counted locally; lowest-value context is trimmed first)
+    PROMPT_TOKEN_BUDGET_DEFAULT = int(os.getenv("PROMPT_TOKEN_BUDGET_DEFAULT", "3000"))
+    # Per-agent overrides, e.g. "synthesis=6000,traction=2000"
+    PROMPT_TOKEN_BUDGETS = {
+        "traction": 2500, "team": 2500, "market": 2500, "risks": 2500,
+        "deep_market_research": 1500, "synthesis": 4000,
+        **_env_float_map("PROMPT_TOKEN_BUDGETS")
+    }
+
+    # Batch analysis (/api/analyze/batch)
+    BATCH_MAX_COMPANIES = int(os.getenv("BATCH_MAX_COMPANIES", "200"))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))  # companies analyzed at once
+    BATCH_START_RATE_PER_MINUTE = float(os.getenv("BATCH_START_RATE_PER_MINUTE", "30"))  # 0 = unlimited
+
+    # Provider record/replay (services/cassette.py): off, record or replay.
+    # record writes every Firecrawl/Perplexity call of an analysis to CASSETTE_DIR;
+    # replay answers them from there without network access
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+    CASSETTE_DIR = os.getenv("CASSETTE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "cassettes"))
+    CASSETTE_TIME_SCALE = float(os.getenv("CASSETTE_TIME_SCALE", "1"))  # replayed latency x this (0 = instant)
+    # exact: only identical requests match; route: a changed request (e.g. edited prompt)
+    # gets the next response recorded for the same agent and model
+    CASSETTE_MATCH = os.getenv("CASSETTE_MATCH", "route").lower()
+
+    # Cost accounting (services/usage.py): prices used to estimate each analysis's spend
+    # when the provider does not report it. USD per Firecrawl credit (Standard plan rate)
+    FIRECRAWL_CREDIT_PRICE = float(os.getenv("FIRECRAWL_CREDIT_PRICE", "0.00083"))
+    # Perplexity USD per million tokens, and per request (low search context), by model
+    LLM_INPUT_PRICES = {"sonar": 1, "sonar_pro": 3, **_env_float_map("LLM_INPUT_PRICES")}
+    LLM_OUTPUT_PRICES = {"sonar": 1, "sonar_pro": 15, **_env_float_map("LLM_OUTPUT_PRICES")}
+    LLM_REQUEST_PRICES = {"sonar": 0.005, "sonar_pro": 0.006, **_env_float_map("LLM_REQUEST_PRICES")}
+
+    # Tracing (utils/tracing.py): none, file (OTLP JSON lines in TRACE_FILE) or
+    # otlp (OTLP/HTTP JSON to TRACE_OTLP_ENDPOINT, e.g. a local OpenTelemetry Collector)
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none").lower()
+    TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "traces.jsonl"))
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "investigate-backend")
+    TRACE_EXPORT_INTERVAL_SECONDS = float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", "2"))
+    TRACE_QUEUE_MAX = int(os.getenv("TRACE_QUEUE_MAX", "10000"))  # finished spans waiting for export; more are dropped
+
     # Server Config
     HOST = "0.0.0.0"
     PORT = 8000
@@ -31,6 +175,18 @@ class Config:
         if not self.PPLX_API_KEY:
             missing.append("PPLX_API_KEY")
 
+        if self.HEDGE_MODE not in ("sequential", "delayed", "parallel"):
+            logger.error(f"Invalid HEDGE_MODE: {self.HEDGE_MODE}")
+            raise ValueError(f"HEDGE_MODE must be sequential, delayed or parallel (got {self.HEDGE_MODE})")
+
+        if self.CASSETTE_MODE not in ("off", "record", "replay"):
+            logger.error(f"Invalid CASSETTE_MODE: {self.CASSETTE_MODE}")
+            raise ValueError(f"CASSETTE_MODE must be off, record or replay (got {self.CASSETTE_MODE})")
+
+        if self.TRACE_EXPORTER not in ("none", "file", "otlp"):
+            logger.error(f"Invalid TRACE_EXPORTER: {self.TRACE_EXPORTER}")
+            raise ValueError(f"TRACE_EXPORTER must be none, file or otlp (got {self.TRACE_EXPORTER})")
+
         if missing:
             logger.error(f"Missing required environment variables: {missing}")
             raise ValueError(f"Missing environment variables: {missing}")
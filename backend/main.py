@@ -1,8 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 from config import config
+from services.http_client import init_http_client, close_http_client
+from services.jobs import get_job_manager
 from utils.logger import setup_logger
+from utils.metrics import render_metrics
+from utils.prompt_builder import load_tokenizer
+from utils.tracing import TracingMiddleware
+import asyncio
 import os
 
 logger = setup_logger(__name__)
@@ -27,8 +34,20 @@ async def lifespan(app: FastAPI):
     logger.info(f"Server starting on http://{config.HOST}:{config.PORT}")
     logger.info(f"CORS origins: {config.CORS_ORIGINS}")
 
+    # Shared keep-alive HTTP client for all outbound provider calls
+    await init_http_client()
+
+    # Worker pool for /api/jobs
+    await get_job_manager().start()
+
+    # Local tokenizer for prompt budgets; loading may download the BPE file, so keep it off the loop
+    asyncio.get_running_loop().run_in_executor(None, load_tokenizer)
+
     yield
 
+    await get_job_manager().stop()
+    await close_http_client()
+
     logger.info("=" * 80)
     logger.info("👋 Shutting down AI Fund Scan Backend API")
     logger.info("=" * 80)
@@ -47,8 +66,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "traceparent"],
 )
 
+# Request id on every log line, root trace span per API request
+app.add_middleware(TracingMiddleware)
+
 # Include API routes
 from api.routes import router as api_router
 app.include_router(api_router)
@@ -64,8 +87,8 @@ async def health_check():
     return {
         "status": "ok",
         "phase": "8 - Complete Analysis Workflow (All Agents + Synthesis)",
-        "endpoints_available": ["/api/health", "/api/search", "/api/analyze"],
-        "workflow_stages": ["Data Collection", "5 Parallel Agents", "Synthesis"],
+        "endpoints_available": ["/api/health", "/api/search", "/api/analyze", "/api/analyze/stream", "/api/analyze/batch", "/api/jobs", "/metrics"],
+        "workflow_stages": ["Data Collection + Shared Web Retrieval + Deep Market Research (concurrent)", "4 Parallel Agents", "Synthesis"],
         "agents_active": [
             "Traction (Sonar)",
             "Team (Sonar)",
@@ -83,6 +106,16 @@ async def health_check():
         ]
     }
 
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Stage, agent (primary/fallback path) and outbound provider latency
+    histograms, plus fallback and JSON extraction counters, in the
+    Prometheus text format.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
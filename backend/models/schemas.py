@@ -23,6 +23,22 @@ class AnalyzeRequest(BaseModel):
     """Request model for /api/analyze"""
     company_url: str = Field(..., description="Company website URL")
     crunchbase_url: str = Field(..., description="Crunchbase profile URL")
+    force_refresh: bool = Field(False, description="Bypass cached scrapes and stored results and re-fetch")
+    max_age: Optional[int] = Field(None, ge=0, description="Return a stored analysis if it is at most this many seconds old")
+    include_diagnostics: bool = Field(False, description="Add provider usage and estimated cost per agent to the result")
+
+class BatchCompany(BaseModel):
+    """One company in a /api/analyze/batch request"""
+    company_url: str = Field(..., description="Company website URL")
+    crunchbase_url: str = Field(..., description="Crunchbase profile URL")
+
+class BatchAnalyzeRequest(BaseModel):
+    """Request model for /api/analyze/batch"""
+    companies: List[BatchCompany] = Field(..., min_length=1, description="Companies to analyze")
+    force_refresh: bool = Field(False, description="Bypass cached scrapes and stored results for every company")
+    max_age: Optional[int] = Field(None, ge=0, description="Reuse stored analyses at most this many seconds old")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Companies analyzed at once (capped by BATCH_MAX_CONCURRENCY)")
+    include_diagnostics: bool = Field(False, description="Add provider usage and estimated cost per agent to each result")
 
 class TractionData(BaseModel):
     """Traction analysis data"""
@@ -127,6 +143,45 @@ class DeepMarketResearch(BaseModel):
     market_risks: List[MarketRisk] = []
     sources: List[Source] = []
 
+class Outlook(BaseModel):
+    """Investment outlook from synthesis"""
+    overall: str  # "Strong", "Moderate", or "Weak"
+    summary: str
+    keyPoints: List[str] = []
+
+class SynthesisOutput(BaseModel):
+    """Synthesis agent response"""
+    indicators: Dict[str, int]  # growth, team, market, product (0-100)
+    outlook: Outlook
+
+class UsageFigures(BaseModel):
+    """Provider usage of an analysis, an agent or a provider"""
+    calls: int = 0
+    errors: int = 0
+    provider_seconds: float = 0.0  # time spent in provider calls (summed over concurrent calls)
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    search_results: int = 0
+    pages: int = 0  # pages scraped by Firecrawl
+    credits: float = 0.0  # Firecrawl credits
+    cost_usd: float = 0.0  # estimated, see FIRECRAWL_CREDIT_PRICE / LLM_*_PRICES
+    coalesced: int = 0  # results shared from a concurrent analysis's identical call (counted here too)
+
+class AgentUsage(UsageFigures):
+    """Usage of one agent or stage (collect_data, retrieve_sources)"""
+    elapsed_seconds: Optional[float] = None  # the agent's wall-clock time
+
+class AnalysisDiagnostics(BaseModel):
+    """Provider usage and estimated cost of one analysis run"""
+    total: UsageFigures
+    agents: Dict[str, AgentUsage] = {}
+    providers: Dict[str, UsageFigures] = {}
+    stages: Dict[str, float] = {}  # stage -> elapsed seconds
+    elapsed_seconds: float
+    complete: bool = True  # False while deep research is still spending
+    replayed: bool = False  # provider calls came from a cassette
+    coalesced: bool = False  # joined another request's run of the same company; the figures are that run's
+
 class AnalysisResult(BaseModel):
     """Full analysis result - Phase 7: Added Deep Market Research"""
     name: str
@@ -136,9 +191,41 @@ class AnalysisResult(BaseModel):
     market: MarketData
     risks: RiskData
     deep_market_research: Optional[DeepMarketResearch] = None  # NEW in Phase 7
+    deep_market_research_pending: bool = False  # True while deep research is still running after synthesis
     indicators: Dict[str, int] = {"growth": 0, "team": 0, "market": 0, "product": 0}
     outlook: Dict[str, Any] = {
         "overall": "Unknown",
         "summary": "Analysis in progress",
         "keyPoints": []
     }
+    analyzed_at: Optional[str] = None  # ISO timestamp of the run that produced this result
+    cached: bool = False  # True when served from the result store
+    diagnostics: Optional[AnalysisDiagnostics] = None  # with include_diagnostics, for analyses that ran
+
+class StoredAnalysisSummary(BaseModel):
+    """One entry in /api/analyses"""
+    name: Optional[str] = None
+    company_url: str
+    crunchbase_url: str
+    analyzed_at: str
+    created_at: float
+
+class StoredAnalysisList(BaseModel):
+    """Response model for /api/analyses"""
+    analyses: List[StoredAnalysisSummary]
+    count: int
+    next_before: Optional[float] = None  # pass as ?before= to fetch the next page
+
+# Job-related schemas
+class JobStatus(BaseModel):
+    """Response model for /api/jobs"""
+    job_id: str
+    status: str  # "queued", "running", "succeeded", "failed" or "cancelled"
+    queue_position: Optional[int] = None  # 1-based, only while queued
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    stages: Dict[str, Dict[str, Any]] = {}  # stage -> {"status", "elapsed"}
+    partial: Dict[str, Dict[str, Any]] = {}  # agent -> result, filled in as agents finish
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
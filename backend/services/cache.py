@@ -0,0 +1,332 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from utils.logger import setup_logger
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """A cached value with the time it was stored and how long it stays fresh"""
+    value: Any
+    stored_at: float
+    ttl: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age < self.ttl
+
+
+def make_cache_key(*parts: Any) -> str:
+    """
+    Content-addressed cache key: SHA-256 of the JSON-encoded parts.
+
+    Args:
+        *parts: JSON-serializable values identifying the cached content
+
+    Returns:
+        Hex digest string
+    """
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    Two-tier TTL cache: in-memory LRU plus an optional on-disk tier that survives restarts.
+
+    Values must be JSON-serializable when the disk tier is enabled. Entries are kept
+    past their TTL until evicted so callers can serve stale data (get_entry);
+    get() only returns fresh values.
+
+    Disk files carry their expiry time as mtime. A file read more than
+    `disk_stale_seconds` past expiry is removed, and every `max_disk_entries // 10`
+    writes a sweep removes expired files and then the soonest-expiring ones
+    beyond `max_disk_entries`. Disk I/O is blocking: on the event loop use the
+    a* methods, which run it in a thread.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        ttl_seconds: float,
+        disk_dir: Optional[str] = None,
+        max_disk_entries: Optional[int] = None,
+        disk_stale_seconds: float = 0.0
+    ):
+        """
+        Args:
+            name: Cache name (stats key and disk subdirectory)
+            max_entries: In-memory LRU size
+            ttl_seconds: Default freshness
+            disk_dir: Directory for the disk tier (None = memory only)
+            max_disk_entries: Disk tier size cap (default: 10 x max_entries)
+            disk_stale_seconds: How long past expiry disk files are kept for stale reads
+        """
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else 10 * max_entries
+        self.disk_stale_seconds = disk_stale_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self._stats = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+            "disk_pruned": 0
+        }
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_sweep()
+        _caches.append(self)
+
+    def _memory_get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _memory_set(self, key: str, entry: CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            entry = CacheEntry(value=raw["value"], stored_at=raw["stored_at"], ttl=raw["ttl"])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️  Unreadable {self.name} cache file {path}: {e}")
+            self._disk_delete(key)
+            return None
+        if entry.age >= entry.ttl + self.disk_stale_seconds:
+            self._disk_delete(key)
+            with self._lock:
+                self._stats["disk_pruned"] += 1
+            return None
+        return entry
+
+    def _disk_set(self, key: str, entry: CacheEntry):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": entry.stored_at, "ttl": entry.ttl, "value": entry.value}, f)
+            # mtime = expiry, so sweeps can prune without reading files
+            expires_at = entry.stored_at + entry.ttl
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to write {self.name} cache file {path}: {e}")
+            return
+        with self._lock:
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= max(1, self.max_disk_entries // 10)
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self._disk_sweep()
+
+    def _disk_sweep(self):
+        """Remove expired disk files, then the soonest-expiring ones beyond max_disk_entries."""
+        if not self._sweep_lock.acquire(blocking=False):
+            return  # another thread is already sweeping
+        try:
+            cutoff = time.time() - self.disk_stale_seconds
+            files = []
+            removed = 0
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        expires_at = os.path.getmtime(path)
+                        # Leftover temp files from interrupted writes go too
+                        if expires_at < cutoff or (name.endswith(".tmp") and time.time() - os.path.getctime(path) > 60):
+                            os.remove(path)
+                            removed += 1
+                        elif name.endswith(".json"):
+                            files.append((expires_at, path))
+                    except FileNotFoundError:
+                        continue
+            if len(files) > self.max_disk_entries:
+                files.sort()
+                for _, path in files[:len(files) - self.max_disk_entries]:
+                    try:
+                        os.remove(path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+            if removed:
+                with self._lock:
+                    self._stats["disk_pruned"] += removed
+                logger.debug(f"🧹 Pruned {removed} {self.name} cache files")
+        except Exception as e:
+            logger.warning(f"⚠️  {self.name} cache sweep failed: {e}")
+        finally:
+            self._sweep_lock.release()
+
+    def _disk_delete(self, key: str):
+        if not self.disk_dir:
+            return
+        try:
+            os.remove(self._disk_path(key))
+        except FileNotFoundError:
+            pass
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up an entry regardless of freshness (memory first, then disk).
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry or None if the key is unknown
+        """
+        tier = "hits_memory"
+        entry = self._memory_get(key)
+        if entry is None:
+            tier = "hits_disk"
+            entry = self._disk_get(key)
+            if entry is not None:
+                self._memory_set(key, entry)
+
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+            elif not entry.is_fresh:
+                self._stats["expired"] += 1
+            else:
+                self._stats[tier] += 1
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a fresh value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on miss or expiry
+        """
+        entry = self.get_entry(key)
+        if entry is None or not entry.is_fresh:
+            return None
+        return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value
+            ttl: Freshness in seconds (default: cache TTL)
+        """
+        entry = CacheEntry(value=value, stored_at=time.time(), ttl=ttl if ttl is not None else self.ttl_seconds)
+        self._memory_set(key, entry)
+        self._disk_set(key, entry)
+        with self._lock:
+            self._stats["writes"] += 1
+
+    def delete(self, key: str):
+        """Remove a key from both tiers."""
+        with self._lock:
+            self._entries.pop(key, None)
+        self._disk_delete(key)
+
+    def disk_entries(self) -> int:
+        """Number of files in the disk tier (walks the directory)."""
+        if not self.disk_dir:
+            return 0
+        return sum(1 for _, _, names in os.walk(self.disk_dir) for name in names if name.endswith(".json"))
+
+    async def aget_entry(self, key: str) -> Optional[CacheEntry]:
+        """get_entry() that serves memory hits inline and reads disk off the event loop."""
+        if self.disk_dir and self._memory_get(key) is None:
+            return await asyncio.to_thread(self.get_entry, key)
+        return self.get_entry(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() that reads the disk tier off the event loop."""
+        entry = await self.aget_entry(key)
+        if entry is None or not entry.is_fresh:
+            return None
+        return entry.value
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        """set() that writes the disk tier (and runs any sweep) off the event loop."""
+        if self.disk_dir:
+            await asyncio.to_thread(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    async def adelete(self, key: str):
+        """delete() that removes the disk file off the event loop."""
+        if self.disk_dir:
+            await asyncio.to_thread(self.delete, key)
+        else:
+            self.delete(key)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and size for stats endpoints."""
+        with self._lock:
+            stats = dict(self._stats)
+            size = len(self._entries)
+        hits = stats["hits_memory"] + stats["hits_disk"]
+        lookups = hits + stats["misses"] + stats["expired"]
+        return {
+            "name": self.name,
+            "entries_in_memory": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "disk_tier": bool(self.disk_dir),
+            "max_disk_entries": self.max_disk_entries if self.disk_dir else None,
+            **stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None
+        }
+
+
+# Every cache registers itself here so one endpoint can report them all
+_caches: List[TTLCache] = []
+
+
+def get_cache_stats() -> Dict:
+    """Stats for every cache created in this process, keyed by cache name."""
+    return {cache.name: cache.stats() for cache in _caches}
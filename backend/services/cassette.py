@@ -0,0 +1,464 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, TypeVar
+from config import config
+from services.cache import make_cache_key
+from utils.deadline import current_deadline
+from utils.logger import setup_logger
+from utils.singleflight import SingleFlight
+from utils.urls import company_name_from_urls, normalize_url
+import asyncio
+import builtins
+import gzip
+import httpx
+import json
+import os
+import re
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+CASSETTE_VERSION = 1
+
+# Response headers worth replaying (the rest describe the original connection)
+_KEPT_HEADERS = ("content-type", "retry-after")
+
+# Counters, exposed through /api/admin/cassettes
+_cassette_stats = {"sessions": 0, "recorded": 0, "replayed": 0, "replayed_by_route": 0, "misses": 0}
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when a provider call has no recorded response"""
+    pass
+
+
+class CassetteReplayError(Exception):
+    """A recorded provider failure re-raised on replay when its original type can't be rebuilt"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def cassette_path(company_url: str, crunchbase_url: str) -> str:
+    """
+    Cassette file for a company: readable name plus a hash of both URLs.
+
+    Args:
+        company_url: Company website URL
+        crunchbase_url: Crunchbase profile URL
+
+    Returns:
+        Path under CASSETTE_DIR, e.g. ".../acme-robotics-3f2a9c1e.jsonl.gz"
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", company_name_from_urls(company_url, crunchbase_url).lower()).strip("-")
+    digest = make_cache_key(normalize_url(company_url), normalize_url(crunchbase_url))[:8]
+    return os.path.join(config.CASSETTE_DIR, f"{slug or 'company'}-{digest}.jsonl.gz")
+
+
+class Cassette:
+    """
+    Provider traffic of one analysis, stored as gzip-compressed JSON lines.
+
+    The first line is a header; every other line is one provider call: its
+    key (hash of the request), its route (call kind, model and the workflow
+    stage or agent that made it), the response status and body or the error
+    raised, and how long it took. Entries are appended as calls finish, so a
+    cassette is usable even if late deep research never lands; the file is
+    written off the event loop by a background task (await flush() to wait
+    for it).
+
+    On replay a call takes the next unused entry with the same key. With
+    CASSETTE_MATCH=route a call whose request changed (e.g. an edited prompt)
+    takes the next unused entry of its route instead; once a key's entries
+    are used up, the last one is served again.
+    """
+
+    def __init__(self, path: str, mode: str, name: str, entries: Optional[List[Dict]] = None):
+        """
+        Args:
+            path: Cassette file
+            mode: "record" or "replay"
+            name: Company name (for logs)
+            entries: Recorded calls (replay)
+        """
+        self.path = path
+        self.mode = mode
+        self.name = name
+        self.entries = entries or []
+        self._lock = threading.Lock()
+        self._pending: List[str] = []
+        self._truncate = False
+        self._writer: Optional[asyncio.Task] = None
+        self._used = set()
+        self._by_key: Dict[str, Deque[int]] = {}
+        self._by_route: Dict[str, Deque[int]] = {}
+        self._last_by_key: Dict[str, int] = {}
+        for index, entry in enumerate(self.entries):
+            self._by_key.setdefault(entry["key"], deque()).append(index)
+            self._by_route.setdefault(entry["route"], deque()).append(index)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @classmethod
+    def create(cls, path: str, name: str) -> "Cassette":
+        """Start a new recording, replacing any cassette at `path` (on the first write)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = {"version": CASSETTE_VERSION, "company": name, "recorded_at": time.time()}
+        cassette = cls(path, "record", name)
+        cassette._pending.append(json.dumps(header) + "\n")
+        cassette._truncate = True
+        cassette._schedule_write()
+        return cassette
+
+    @classmethod
+    def load(cls, path: str, name: str) -> "Cassette":
+        """Open a cassette for replay; a missing file gives an empty cassette (every call misses)."""
+        if not os.path.exists(path):
+            logger.warning(f"📼 No cassette for {name} at {path} - provider calls will fail")
+            return cls(path, "replay", name)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        entries = [line for line in lines[1:] if "key" in line]
+        logger.info(f"📼 Replaying {len(entries)} provider calls for {name}")
+        return cls(path, "replay", name, entries)
+
+    def add(self, entry: Dict):
+        """Record one call; it is appended to the file in the background."""
+        line = json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self.entries.append(entry)
+            self._pending.append(line)
+        _cassette_stats["recorded"] += 1
+        captured = _captured.get()
+        if captured is not None:
+            captured.append(entry)
+        self._schedule_write()
+
+    async def flush(self):
+        """Wait until every call recorded so far is in the file."""
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    def _schedule_write(self):
+        if self._writer is not None and not self._writer.done():
+            return  # the running writer picks up new lines before it finishes
+        try:
+            self._writer = asyncio.get_running_loop().create_task(self._write_pending())
+        except RuntimeError:
+            self._write_lines()  # no event loop (e.g. a script): write in place
+
+    async def _write_pending(self):
+        while self._pending:
+            try:
+                await asyncio.to_thread(self._write_lines)
+            except OSError as e:
+                logger.error(f"❌ Could not write cassette {self.path}: {str(e)}")
+                return
+
+    def _write_lines(self):
+        with self._lock:
+            lines, self._pending = self._pending, []
+            mode, self._truncate = ("wt" if self._truncate else "at"), False
+        # Each append is its own gzip member; gzip readers concatenate them
+        with gzip.open(self.path, mode, encoding="utf-8") as f:
+            f.writelines(lines)
+
+    def take(self, key: str, route: str) -> Dict:
+        """
+        Recorded entry for a call.
+
+        Args:
+            key: Request key
+            route: Request route
+
+        Returns:
+            Entry dict
+
+        Raises:
+            CassetteMiss: If nothing recorded matches
+        """
+        with self._lock:
+            index = self._next_unused(self._by_key.get(key))
+            by_route = False
+            if index is None and config.CASSETTE_MATCH == "route":
+                index = self._next_unused(self._by_route.get(route))
+                by_route = index is not None
+            if index is None:
+                index = self._last_by_key.get(key)
+            if index is None:
+                _cassette_stats["misses"] += 1
+                raise CassetteMiss(f"No recorded response for {route} in cassette of {self.name}")
+            self._used.add(index)
+            self._last_by_key[key] = index
+        _cassette_stats["replayed"] += 1
+        if by_route:
+            _cassette_stats["replayed_by_route"] += 1
+            logger.debug(f"📼 Request changed - replaying the next {route} response")
+        return self.entries[index]
+
+    def _next_unused(self, indexes: Optional[Deque[int]]) -> Optional[int]:
+        while indexes:
+            index = indexes.popleft()
+            if index not in self._used:
+                return index
+        return None
+
+
+_current: ContextVar[Optional[Cassette]] = ContextVar("cassette", default=None)
+# Entries recorded by a shared call, copied into the cassettes of the callers that joined it
+_captured: ContextVar[Optional[List[Dict]]] = ContextVar("cassette_captured", default=None)
+
+
+def current_cassette() -> Optional[Cassette]:
+    """The cassette in scope for the running analysis, if any."""
+    return _current.get()
+
+
+@contextmanager
+def cassette_scope(company_url: str, crunchbase_url: str) -> Iterator[Optional[Cassette]]:
+    """
+    Record or replay this analysis's provider calls, per CASSETTE_MODE.
+
+    The cassette is put in scope for this task and the tasks it creates, so
+    wrap the call that starts the workflow. With CASSETTE_MODE=off this is a
+    no-op and yields None.
+
+    Args:
+        company_url: Company website URL
+        crunchbase_url: Crunchbase profile URL
+    """
+    cassette = None
+    if config.CASSETTE_MODE in ("record", "replay"):
+        path = cassette_path(company_url, crunchbase_url)
+        name = company_name_from_urls(company_url, crunchbase_url)
+        if config.CASSETTE_MODE == "record":
+            cassette = Cassette.create(path, name)
+            logger.info(f"📼 Recording provider calls for {name} to {path}")
+        else:
+            cassette = Cassette.load(path, name)
+        _cassette_stats["sessions"] += 1
+    token = _current.set(cassette)
+    try:
+        yield cassette
+    finally:
+        _current.reset(token)
+
+
+def _route(kind: str, model: Optional[str] = None) -> str:
+    deadline = current_deadline()
+    return ":".join([kind, model or "", deadline.name if deadline is not None else ""])
+
+
+def _rerouted(entry: Dict) -> Dict:
+    """Entry with its route's stage/agent part replaced by the current one."""
+    kind_and_model = entry["route"].rsplit(":", 1)[0]
+    deadline = current_deadline()
+    return {**entry, "route": f"{kind_and_model}:{deadline.name if deadline is not None else ''}"}
+
+
+async def shared_call(
+    flights: SingleFlight,
+    key: str,
+    call: Callable[[], Awaitable[T]],
+    on_shared: Optional[Callable[[T], Any]] = None
+) -> T:
+    """
+    flights.do() for provider calls, keeping every caller's cassette complete.
+
+    While recording, the entries the shared call records in the leader's
+    cassette are also added to the cassette of each caller that joined it
+    (its failures included), so any of the analyses replays on its own.
+    While replaying, calls are not coalesced: each replays its own cassette.
+
+    Args:
+        flights: Single-flight group
+        key: Identity of the call
+        call: Makes the call
+        on_shared: Called with the result by callers that joined another caller's call
+
+    Returns:
+        The result of the shared call
+    """
+    cassette = _current.get()
+    if cassette is None:
+        return await flights.do(key, call, on_shared=on_shared)
+    if cassette.replaying:
+        return await call()
+
+    async def recorded_call():
+        # Runs in the shared call's own task, so the capture list is not seen by the callers
+        captured: List[Dict] = []
+        _captured.set(captured)
+        try:
+            return await call(), None, captured
+        except Exception as e:
+            return None, e, captured
+
+    joined = []
+    result, error, entries = await flights.do(key, recorded_call, on_shared=joined.append)
+    if joined:
+        for entry in entries:
+            cassette.add(_rerouted(entry))
+    if error is not None:
+        raise error
+    if joined and on_shared is not None:
+        on_shared(result)
+    return result
+
+
+def _error_entry(error: BaseException) -> Dict:
+    return {
+        "type": type(error).__name__,
+        "message": str(error),
+        "status_code": getattr(error, "status_code", None)
+    }
+
+
+def _rebuild_error(error: Dict, request: Optional[httpx.Request] = None) -> Exception:
+    """The recorded exception: same httpx or builtin type if possible, else CassetteReplayError."""
+    error_type = getattr(httpx, error["type"], None)
+    if isinstance(error_type, type) and issubclass(error_type, httpx.RequestError):
+        return error_type(error["message"], request=request)
+    error_type = getattr(builtins, error["type"], None)
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        return error_type(error["message"])
+    return CassetteReplayError(f"{error['type']}: {error['message']}", status_code=error.get("status_code"))
+
+
+async def _replay_delay(entry: Dict, timeout: Optional[float] = None) -> bool:
+    """
+    Wait the recorded call duration times CASSETTE_TIME_SCALE.
+
+    Returns:
+        False if the call would have outlasted `timeout` (after waiting that long)
+    """
+    delay = entry["elapsed"] * config.CASSETTE_TIME_SCALE
+    if timeout is not None and delay > timeout:
+        await asyncio.sleep(timeout)
+        return False
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return True
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Transport for the shared HTTP client that records or replays provider calls.
+
+    Calls made while a cassette is in scope (see cassette_scope) are recorded
+    to it or answered from it; replayed calls never reach the network. Calls
+    outside an analysis (e.g. /api/search) pass straight through.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        cassette = _current.get()
+        if cassette is None:
+            return await self._transport.handle_async_request(request)
+
+        try:
+            body = json.loads(request.content) if request.content else None
+        except ValueError:
+            body = request.content.decode("utf-8", "replace")
+        key = make_cache_key(request.method, request.url.path, body)
+        route = _route(request.url.path, body.get("model") if isinstance(body, dict) else None)
+
+        if cassette.replaying:
+            entry = cassette.take(key, route)
+            if not await _replay_delay(entry, (request.extensions.get("timeout") or {}).get("read")):
+                raise httpx.ReadTimeout("Replayed response slower than the request timeout", request=request)
+            if "error" in entry:
+                raise _rebuild_error(entry["error"], request)
+            content = entry["body"] if isinstance(entry["body"], str) else json.dumps(entry["body"])
+            return httpx.Response(
+                entry["status"], headers=entry.get("headers"), content=content.encode("utf-8"), request=request
+            )
+
+        started = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+            await response.aread()
+        except Exception as e:
+            cassette.add({"key": key, "route": route, "error": _error_entry(e), "elapsed": time.perf_counter() - started})
+            raise
+        try:
+            response_body = json.loads(response.content)
+        except ValueError:
+            response_body = response.content.decode("utf-8", "replace")
+        cassette.add({
+            "key": key,
+            "route": route,
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers},
+            "body": response_body,
+            "elapsed": time.perf_counter() - started
+        })
+        return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+async def replayable(
+    kind: str,
+    request: Any,
+    call: Callable[[], Awaitable[Any]],
+    serialize: Callable[[Any], Any] = lambda result: result
+) -> Any:
+    """
+    Record or replay a provider call made outside the shared HTTP client (SDK calls).
+
+    Args:
+        kind: Call kind, part of the key and route (e.g. "firecrawl_sdk_scrape")
+        request: JSON-serializable description of the request
+        call: Makes the real call
+        serialize: Converts the result to JSON-serializable data; replays return
+                   that data, so callers must accept it in place of the result
+
+    Returns:
+        The call's result, or its recorded (serialized) result on replay
+
+    Raises:
+        CassetteMiss: On replay, if the call was not recorded
+    """
+    cassette = _current.get()
+    if cassette is None:
+        return await call()
+
+    key = make_cache_key(kind, request)
+    route = _route(kind)
+    if cassette.replaying:
+        entry = cassette.take(key, route)
+        await _replay_delay(entry)
+        if "error" in entry:
+            raise _rebuild_error(entry["error"])
+        return entry["body"]
+
+    started = time.perf_counter()
+    try:
+        result = await call()
+    except Exception as e:
+        cassette.add({"key": key, "route": route, "error": _error_entry(e), "elapsed": time.perf_counter() - started})
+        raise
+    cassette.add({"key": key, "route": route, "status": 200, "body": serialize(result), "elapsed": time.perf_counter() - started})
+    return result
+
+
+def get_cassette_stats() -> Dict:
+    """Record/replay mode, directory and call counters."""
+    return {
+        "mode": config.CASSETTE_MODE,
+        "dir": config.CASSETTE_DIR,
+        "match": config.CASSETTE_MATCH,
+        "time_scale": config.CASSETTE_TIME_SCALE,
+        **_cassette_stats
+    }
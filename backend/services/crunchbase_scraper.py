@@ -1,10 +1,21 @@
 from firecrawl import Firecrawl
 from typing import List, Dict, Optional
 from config import config
-from utils.logger import setup_logger
+from services.firecrawl import firecrawl_search
+from services.rate_limits import get_limiter, parse_retry_after
+from services.cache import TTLCache, make_cache_key
+from services.http_client import record_provider_call
+from services.cassette import replayable, shared_call
+from services.usage import record_firecrawl_usage
+from utils.urls import normalize_url
+from utils.singleflight import SingleFlight
+from utils.deadline import DeadlineExceeded, call_timeout
+from utils.logger import setup_logger, lazy_json
 from pydantic import BaseModel
-import json
 import asyncio
+import re
+import time
+from urllib.parse import urlparse
 
 logger = setup_logger(__name__)
 
@@ -21,10 +32,94 @@ class CrunchbaseJsonSchema(BaseModel):
     funding_amount: str
     employee_count: int
 
+# Structured scrapes are slow (10-35s) and cost credits; analysts re-run the same
+# companies all day, so results are cached per normalized URL + extraction schema.
+_scrape_cache = TTLCache(
+    "crunchbase_scrape",
+    max_entries=config.SCRAPE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.SCRAPE_CACHE_TTL_SECONDS,
+    disk_dir=config.CACHE_DIR if config.CACHE_DISK_ENABLED else None,
+    max_disk_entries=config.SCRAPE_CACHE_MAX_DISK_ENTRIES
+)
+
+def _scrape_cache_key(url: str) -> str:
+    """Cache key for a profile scrape: normalized URL plus the extraction schema it was scraped with."""
+    return make_cache_key("crunchbase_scrape", normalize_url(url), CrunchbaseJsonSchema.model_json_schema())
+
+# Concurrent analyses of the same company share one in-flight scrape
+_scrape_flights = SingleFlight("crunchbase_scrape")
+# Concurrent searches for the same normalized query share one Firecrawl search
+_search_flights = SingleFlight("crunchbase_search")
+
+# Users re-type the same company names all day; search results are cached in
+# memory by normalized query (see search_crunchbase_async).
+_search_cache = TTLCache(
+    "crunchbase_search",
+    max_entries=config.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.SEARCH_CACHE_TTL_SECONDS
+)
+_search_refreshing = set()  # cache keys with a background revalidation in flight
+_background_tasks = set()  # strong references so revalidation tasks are not garbage collected
+
+# Bounds concurrent outbound searches so a burst of /api/search calls cannot
+# exhaust Firecrawl's concurrency limit or pile up sockets.
+_search_semaphore = asyncio.Semaphore(config.SEARCH_MAX_CONCURRENCY)
+
+def _extract_search_results(response, limit: int) -> List[Dict]:
+    """
+    Normalize a Firecrawl search response (SDK object or raw dict) into result dicts.
+
+    Args:
+        response: Firecrawl search response
+        limit: Max results to return
+
+    Returns:
+        List of company search results with url, title, description fields
+
+    Raises:
+        CrunchbaseScraperError: If the response format is not recognized
+    """
+    # Handle different response formats
+    if hasattr(response, 'data'):
+        raw_results = response.data
+    elif hasattr(response, 'web'):
+        raw_results = response.web
+    else:
+        try:
+            response_dict = dict(response) if not isinstance(response, dict) else response
+            raw_results = response_dict.get('web', response_dict.get('data', []))
+        except:
+            logger.error("⚠️  Unable to parse Firecrawl response format")
+            raise CrunchbaseScraperError("Invalid response format from Firecrawl")
+
+    if not raw_results:
+        logger.warning("⚠️  No results found in Firecrawl response")
+        return []
+
+    # Process results
+    results = []
+    logger.debug(f"Processing {len(raw_results)} raw results")
+    for item in raw_results[:limit]:
+        # Extract fields from response item
+        url = item.url if hasattr(item, 'url') else (item.get('url') if isinstance(item, dict) else None)
+        title = item.title if hasattr(item, 'title') else (item.get('title') if isinstance(item, dict) else None)
+        description = item.description if hasattr(item, 'description') else (item.get('description') if isinstance(item, dict) else None)
+
+        if url:
+            results.append({
+                'url': url,
+                'title': title,
+                'description': description
+            })
+
+    return results
+
 def search_crunchbase(query: str, limit: int = 5) -> List[Dict]:
     """
     Search Crunchbase for companies matching the query using Firecrawl search API.
 
+    Blocking - use search_crunchbase_async from request handlers.
+
     Args:
         query: Company name or URL
         limit: Max results to return (default 5)
@@ -41,7 +136,7 @@ def search_crunchbase(query: str, limit: int = 5) -> List[Dict]:
     try:
         # Initialize Firecrawl
         logger.debug("Initializing Firecrawl client")
-        firecrawl = Firecrawl(api_key=config.FIRECRAWL_API_KEY)
+        firecrawl = Firecrawl(api_key=config.FIRECRAWL_API_KEY, api_url=config.FIRECRAWL_API_URL)
 
         # Search Crunchbase using Firecrawl's search API
         logger.info(f"Searching Crunchbase via Firecrawl...")
@@ -51,43 +146,10 @@ def search_crunchbase(query: str, limit: int = 5) -> List[Dict]:
             logger.warning("⚠️  No response from Firecrawl search")
             raise CrunchbaseScraperError("Empty response from Firecrawl")
 
-        # Extract results from response
-        results = []
-        
-        # Handle different response formats
-        if hasattr(response, 'data'):
-            raw_results = response.data
-        elif hasattr(response, 'web'):
-            raw_results = response.web
-        else:
-            try:
-                response_dict = dict(response) if not isinstance(response, dict) else response
-                raw_results = response_dict.get('web', response_dict.get('data', []))
-            except:
-                logger.error("⚠️  Unable to parse Firecrawl response format")
-                raise CrunchbaseScraperError("Invalid response format from Firecrawl")
-
-        if not raw_results:
-            logger.warning("⚠️  No results found in Firecrawl response")
-            return []
-
-        # Process results
-        logger.debug(f"Processing {len(raw_results)} raw results")
-        for item in raw_results[:limit]:
-            # Extract fields from response item
-            url = item.url if hasattr(item, 'url') else (item.get('url') if isinstance(item, dict) else None)
-            title = item.title if hasattr(item, 'title') else (item.get('title') if isinstance(item, dict) else None)
-            description = item.description if hasattr(item, 'description') else (item.get('description') if isinstance(item, dict) else None)
-            
-            if url:
-                results.append({
-                    'url': url,
-                    'title': title,
-                    'description': description
-                })
+        results = _extract_search_results(response, limit)
 
         logger.info(f"✅ Found {len(results)} companies matching '{query}'")
-        logger.debug(f"Search results: {json.dumps(results, indent=2)}")
+        logger.debug("Search results: %s", lazy_json(results))
 
         return results
 
@@ -95,6 +157,137 @@ def search_crunchbase(query: str, limit: int = 5) -> List[Dict]:
         logger.error(f"❌ Crunchbase search failed: {str(e)}", exc_info=True)
         raise CrunchbaseScraperError(f"Search failed: {str(e)}") from e
 
+def normalize_search_query(query: str) -> str:
+    """
+    Canonical form of a search query, used for the cache and single-flight key
+    (the search itself is sent as the user typed it).
+
+    Case-folds, collapses whitespace and reduces URLs to what identifies the company:
+    Crunchbase profile URLs become their slug ("openai"), other URLs their host and path.
+
+    Args:
+        query: Raw user query (company name or URL)
+
+    Returns:
+        Normalized query string
+    """
+    text = " ".join((query or "").split()).casefold()
+    if " " not in text and ("://" in text or text.startswith("www.") or re.match(r"^[a-z0-9-]+(\.[a-z0-9-]+)+(/.*)?$", text)):
+        normalized = normalize_url(text)
+        parsed = urlparse(normalized)
+        match = re.match(r"^/(?:organization|person|company)/([^/]+)", parsed.path)
+        if parsed.hostname and parsed.hostname.endswith("crunchbase.com") and match:
+            return match.group(1).replace("-", " ")
+        return f"{parsed.netloc}{parsed.path}"
+    return text
+
+async def _fetch_crunchbase_search(query: str, limit: int) -> List[Dict]:
+    """
+    Run one Firecrawl search for a company query.
+
+    Args:
+        query: Company name or URL, as the user typed it
+        limit: Max results to return
+
+    Returns:
+        List of company search results with url, title, description fields
+
+    Raises:
+        CrunchbaseScraperError: If search fails
+    """
+    try:
+        async with _search_semaphore:
+            logger.info("Searching Crunchbase via Firecrawl (async)...")
+            payload = await firecrawl_search(
+                {
+                    'query': f"site:crunchbase.com {query}",
+                    'limit': limit
+                },
+                timeout=config.SEARCH_TIMEOUT_SECONDS
+            )
+
+        if not payload:
+            logger.warning("⚠️  No response from Firecrawl search")
+            raise CrunchbaseScraperError("Empty response from Firecrawl")
+
+        return _extract_search_results(payload.get('data', {}), limit)
+
+    except CrunchbaseScraperError:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Crunchbase search failed: {str(e)}", exc_info=True)
+        raise CrunchbaseScraperError(f"Search failed: {str(e)}") from e
+
+async def _refresh_search_cache(cache_key: str, query: str, limit: int):
+    """Background revalidation of a stale search cache entry."""
+    try:
+        results = await _fetch_crunchbase_search(query, limit)
+        _store_search_results(cache_key, results)
+        logger.debug(f"Revalidated search cache for '{query}'")
+    except Exception as e:
+        logger.warning(f"⚠️  Background search revalidation failed for '{query}': {str(e)}")
+    finally:
+        _search_refreshing.discard(cache_key)
+
+async def _fetch_and_store(cache_key: str, query: str, limit: int) -> List[Dict]:
+    results = await _fetch_crunchbase_search(query, limit)
+    _store_search_results(cache_key, results)
+    return results
+
+def _store_search_results(cache_key: str, results: List[Dict]):
+    """Cache search results; empty results are cached for the shorter negative TTL."""
+    ttl = config.SEARCH_CACHE_TTL_SECONDS if results else config.SEARCH_NEGATIVE_CACHE_TTL_SECONDS
+    _search_cache.set(cache_key, results, ttl=ttl)
+
+async def search_crunchbase_async(query: str, limit: int = 5) -> List[Dict]:
+    """
+    Search Crunchbase for companies matching the query without blocking the event loop.
+
+    Calls the Firecrawl v2 search REST endpoint through the shared HTTP client. Concurrent
+    searches are bounded by SEARCH_MAX_CONCURRENCY; callers beyond the limit wait their turn
+    instead of stalling other requests.
+
+    Results are cached, and concurrent searches coalesced, by normalized query (case,
+    whitespace, URL form); Firecrawl still gets the query as given. Fresh entries are served
+    directly, stale ones within SEARCH_STALE_WHILE_REVALIDATE_SECONDS are served while a
+    background refresh runs, and empty results are cached for SEARCH_NEGATIVE_CACHE_TTL_SECONDS.
+
+    Args:
+        query: Company name or URL
+        limit: Max results to return (default 5)
+
+    Returns:
+        List of company search results with url, title, description fields
+
+    Raises:
+        CrunchbaseScraperError: If search fails
+    """
+    normalized_query = normalize_search_query(query)
+    logger.info(f"🔍 Starting async Crunchbase search for query: '{query}' (normalized: '{normalized_query}')")
+    logger.debug(f"Search parameters: limit={limit}")
+
+    cache_key = make_cache_key("crunchbase_search", normalized_query, limit)
+    entry = _search_cache.get_entry(cache_key)
+    if entry is not None:
+        if entry.is_fresh:
+            logger.info(f"⚡ Search cache hit for '{normalized_query}' ({len(entry.value)} results)")
+            return list(entry.value)
+        if entry.age < entry.ttl + config.SEARCH_STALE_WHILE_REVALIDATE_SECONDS:
+            logger.info(f"⚡ Serving stale search results for '{normalized_query}' while revalidating")
+            if cache_key not in _search_refreshing:
+                _search_refreshing.add(cache_key)
+                task = asyncio.create_task(_refresh_search_cache(cache_key, query, limit))
+                _background_tasks.add(task)
+                task.add_done_callback(_background_tasks.discard)
+            return list(entry.value)
+
+    results = await _search_flights.do(cache_key, lambda: _fetch_and_store(cache_key, query, limit))
+
+    logger.info(f"✅ Found {len(results)} companies matching '{query}'")
+    logger.debug("Search results: %s", lazy_json(results))
+
+    return results
+
 
 def convert_to_serializable(obj):
     """Convert objects to JSON-serializable format."""
@@ -110,14 +303,20 @@ def convert_to_serializable(obj):
         return str(obj)
 
 
-async def scrape_company_url(url: str, max_retries: int = 2, timeout_seconds: int = 30) -> Dict:
+async def scrape_company_url(url: str, max_retries: int = 2, timeout_seconds: int = 30, force_refresh: bool = False) -> Dict:
     """
     Scrape detailed company information from Crunchbase URL using Firecrawl.
+
+    Successful scrapes are cached (memory LRU + disk) for SCRAPE_CACHE_TTL_SECONDS.
+    Concurrent scrapes of the same profile share one in-flight Firecrawl call
+    (not while replaying a provider cassette).
     
     Args:
         url: Crunchbase company profile URL
         max_retries: Maximum number of retry attempts (default: 2)
-        timeout_seconds: Client-side timeout in seconds (default: 30)
+        timeout_seconds: Client-side timeout per attempt in seconds (default: 30),
+                         capped at the time left on the current deadline
+        force_refresh: Skip the cache lookup and scrape again (default: False)
         
     Returns:
         Dict with company data including name, description, funding, etc.
@@ -126,38 +325,82 @@ async def scrape_company_url(url: str, max_retries: int = 2, timeout_seconds: in
         CrunchbaseScraperError: If scraping fails after all retries
     """
     logger.info(f"🌐 Starting detailed scrape of: {url}")
-    
+
+    cache_key = _scrape_cache_key(url)
+    if force_refresh:
+        logger.info("🔄 force_refresh set - bypassing scrape cache")
+    else:
+        cached = await _scrape_cache.aget(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Scrape cache hit for {url}: {cached.get('name', 'Unknown')}")
+            return {**cached, 'url': url}
+
+    company_data = await shared_call(
+        _scrape_flights,
+        cache_key,
+        lambda: _scrape_company_url(url, cache_key, max_retries, timeout_seconds),
+        # Only the extracted fields are shared, so credits are estimated as one JSON scrape
+        on_shared=lambda _: record_firecrawl_usage("firecrawl_scrape", {"data": {"json": {}}}, shared=True)
+    )
+    return {**company_data, 'url': url}
+
+
+async def _scrape_company_url(url: str, cache_key: str, max_retries: int, timeout_seconds: int) -> Dict:
+    """Scrape with retries and write successful extractions to the scrape cache."""
+    limiter = get_limiter("firecrawl_scrape")
+    rate_limited = False
     for attempt in range(max_retries + 1):
         try:
-            if attempt > 0:
+            if attempt > 0 and not rate_limited:
                 wait_time = 2 ** attempt  # Exponential backoff: 2, 4, 8 seconds
                 logger.info(f"⏳ Retry {attempt}/{max_retries} - Waiting {wait_time}s before retry...")
                 await asyncio.sleep(wait_time)
+            rate_limited = False
+
+            # Each attempt gets at most the time left on the analysis deadline
+            try:
+                attempt_timeout = call_timeout(timeout_seconds)
+            except DeadlineExceeded:
+                raise CrunchbaseScraperError(f"Deadline exceeded before scrape attempt {attempt + 1}")
             
             # Initialize Firecrawl
             logger.debug("Initializing Firecrawl client for scraping")
-            firecrawl = Firecrawl(api_key=config.FIRECRAWL_API_KEY)
+            firecrawl = Firecrawl(api_key=config.FIRECRAWL_API_KEY, api_url=config.FIRECRAWL_API_URL)
             
             # Scrape the URL with structured JSON extraction
-            logger.info(f"Scraping company page with structured extraction (attempt {attempt + 1}/{max_retries + 1}, timeout: {timeout_seconds}s)...")
+            logger.info(f"Scraping company page with structured extraction (attempt {attempt + 1}/{max_retries + 1}, timeout: {attempt_timeout:.0f}s)...")
             
             # Wrap the blocking scrape call with asyncio timeout
             try:
-                result = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        firecrawl.scrape,
-                        url,
-                        formats=[{
-                            "type": "json",
-                            "schema": CrunchbaseJsonSchema
-                        }],
-                        only_main_content=False,
-                        timeout=timeout_seconds * 1000  # Firecrawl expects milliseconds
-                    ),
-                    timeout=timeout_seconds + 5  # Add 5s buffer for network overhead
-                )
+                async with limiter.slot():
+                    started = time.perf_counter()
+                    try:
+                        # The SDK call bypasses the shared client, so record/replay it here
+                        result = await asyncio.wait_for(
+                            replayable(
+                                "firecrawl_sdk_scrape",
+                                {"url": url, "formats": ["json"]},
+                                lambda: asyncio.to_thread(
+                                    firecrawl.scrape,
+                                    url,
+                                    formats=[{
+                                        "type": "json",
+                                        "schema": CrunchbaseJsonSchema
+                                    }],
+                                    only_main_content=False,
+                                    timeout=int(attempt_timeout * 1000)  # Firecrawl expects milliseconds
+                                ),
+                                serialize=convert_to_serializable
+                            ),
+                            timeout=attempt_timeout + 5  # Add 5s buffer for network overhead
+                        )
+                    except Exception as e:
+                        record_provider_call(limiter.name, started, error=e, attempt=attempt + 1)
+                        raise
+                    record_provider_call(limiter.name, started, attempt=attempt + 1)
+                    record_firecrawl_usage(limiter.name, {"data": result})
             except asyncio.TimeoutError:
-                logger.warning(f"⏰ Client-side timeout after {timeout_seconds}s")
+                logger.warning(f"⏰ Client-side timeout after {attempt_timeout:.0f}s")
                 if attempt < max_retries:
                     continue  # Retry
                 raise CrunchbaseScraperError(f"Scraping timed out after {timeout_seconds}s (tried {max_retries + 1} times)")
@@ -200,7 +443,11 @@ async def scrape_company_url(url: str, max_retries: int = 2, timeout_seconds: in
             }
             
             logger.info(f"✅ Successfully scraped company: {company_data['name']}")
-            logger.debug(f"Scraped data: {json.dumps(company_data, indent=2)}")
+            logger.debug("Scraped data: %s", lazy_json(company_data))
+
+            # Only cache real extractions, never the 'Unknown' placeholder
+            if json_data:
+                await _scrape_cache.aset(cache_key, company_data)
             
             return company_data
             
@@ -209,6 +456,11 @@ async def scrape_company_url(url: str, max_retries: int = 2, timeout_seconds: in
             raise
         except Exception as e:
             logger.warning(f"⚠️  Attempt {attempt + 1} failed: {str(e)}")
+            if getattr(e, 'status_code', None) == 429:
+                # The limiter pause replaces the exponential backoff for this retry
+                response = getattr(e, 'response', None)
+                limiter.throttle(parse_retry_after(response.headers.get('Retry-After') if response is not None else None))
+                rate_limited = True
             if attempt < max_retries:
                 continue  # Retry
             # Last attempt failed, raise error
@@ -0,0 +1,176 @@
+from typing import Dict, Optional
+from config import config
+from services.http_client import get_http_client, record_provider_call
+from services.cache import make_cache_key
+from services.cassette import shared_call
+from services.rate_limits import get_limiter, parse_retry_after
+from services.usage import record_firecrawl_usage
+from utils.deadline import call_timeout, current_deadline
+from utils.logger import setup_logger
+from utils.singleflight import SingleFlight
+import asyncio
+import httpx
+import time
+
+logger = setup_logger(__name__)
+
+class FirecrawlError(Exception):
+    """Raised when a Firecrawl REST call returns a non-200 response"""
+    pass
+
+# Identical concurrent calls (same payload) share one request
+_search_flights = SingleFlight("firecrawl_search")
+_scrape_flights = SingleFlight("firecrawl_scrape")
+
+async def firecrawl_search(payload: Dict, timeout: Optional[float] = None) -> Dict:
+    """
+    Call the Firecrawl v2 search endpoint through the shared HTTP client.
+
+    Concurrent calls with an identical payload are coalesced into one request
+    (not while replaying a provider cassette); each caller waits at most
+    until its own deadline.
+    Requests go through the firecrawl_search rate limiter; a 429 pauses the
+    limiter for Retry-After and is retried up to RATE_LIMIT_MAX_RETRIES times.
+
+    Args:
+        payload: JSON body for /v2/search (query, limit, sources, scrapeOptions...)
+        timeout: Per-request timeout in seconds (default: HTTP_TIMEOUT_SECONDS),
+                 capped at the time left on the current deadline
+
+    Returns:
+        Parsed JSON response
+
+    Raises:
+        FirecrawlError: If Firecrawl returns a non-200 status
+        DeadlineExceeded: If the current deadline passes before a request is sent
+        httpx.HTTPError: On transport errors and timeouts
+    """
+    return await _shared(_search_flights, "/v2/search", "firecrawl_search", payload, timeout)
+
+async def firecrawl_scrape(payload: Dict, timeout: Optional[float] = None) -> Dict:
+    """
+    Call the Firecrawl v2 scrape endpoint through the shared HTTP client.
+
+    Same coalescing, rate limiting (firecrawl_scrape) and 429 handling as
+    firecrawl_search.
+
+    Args:
+        payload: JSON body for /v2/scrape (url, formats, onlyMainContent, maxAge...)
+        timeout: Per-request timeout in seconds (default: HTTP_TIMEOUT_SECONDS),
+                 capped at the time left on the current deadline
+
+    Returns:
+        Parsed JSON response
+
+    Raises:
+        FirecrawlError: If Firecrawl returns a non-200 status
+        DeadlineExceeded: If the current deadline passes before a request is sent
+        httpx.HTTPError: On transport errors and timeouts
+    """
+    return await _shared(_scrape_flights, "/v2/scrape", "firecrawl_scrape", payload, timeout)
+
+async def firecrawl_batch_scrape(payload: Dict, timeout: Optional[float] = None, poll_interval: float = 1.0) -> Dict:
+    """
+    Scrape many URLs with one Firecrawl v2 batch scrape job.
+
+    Starts the job, then polls its status every `poll_interval` seconds until
+    it completes or fails. If the current deadline would pass before the next
+    poll, the pages finished so far are returned. Each request goes through the
+    firecrawl_scrape rate limiter.
+
+    Args:
+        payload: JSON body for /v2/batch/scrape (urls, formats, onlyMainContent, maxAge...)
+        timeout: Per-request timeout in seconds (default: HTTP_TIMEOUT_SECONDS),
+                 capped at the time left on the current deadline
+        poll_interval: Seconds between status polls
+
+    Returns:
+        {"status", "data": [scraped documents], "creditsUsed"?}; each document's
+        metadata.sourceURL is the URL it was requested as
+
+    Raises:
+        FirecrawlError: If Firecrawl returns a non-200 status or no job id
+        DeadlineExceeded: If the current deadline passes before the job is started
+        httpx.HTTPError: On transport errors and timeouts
+    """
+    job = await _request("POST", "/v2/batch/scrape", "firecrawl_scrape", payload, timeout, record_usage=False)
+    job_id = job.get("id")
+    if not job_id:
+        raise FirecrawlError(f"Firecrawl batch scrape returned no job id: {str(job)[:200]}")
+
+    path = f"/v2/batch/scrape/{job_id}"
+    documents = []
+    while True:
+        status = await _request("GET", path, "firecrawl_scrape", None, timeout, record_usage=False)
+        if status.get("status") in ("completed", "failed"):
+            documents.extend(status.get("data") or [])
+            # Large results are paginated; "next" is the URL of the following page
+            while status.get("next"):
+                url = httpx.URL(status["next"])
+                status = await _request("GET", url.raw_path.decode(), "firecrawl_scrape", None, timeout, record_usage=False)
+                documents.extend(status.get("data") or [])
+            break
+        deadline = current_deadline()
+        if deadline is not None and deadline.remaining() <= poll_interval + 1:
+            documents.extend(status.get("data") or [])
+            logger.warning(f"⏱️  Batch scrape {job_id}: deadline near, using {len(documents)}/{status.get('total', '?')} pages")
+            break
+        await asyncio.sleep(poll_interval)
+
+    result = {"status": status.get("status"), "data": documents}
+    if status.get("creditsUsed") is not None:
+        result["creditsUsed"] = status["creditsUsed"]
+    record_firecrawl_usage("firecrawl_scrape", result)
+    return result
+
+async def _shared(flights: SingleFlight, path: str, provider: str, payload: Dict, timeout: Optional[float]) -> Dict:
+    """_request, coalesced with identical in-flight calls (not while replaying a cassette)."""
+    return await shared_call(
+        flights,
+        make_cache_key(provider, payload),
+        lambda: _request("POST", path, provider, payload, timeout),
+        on_shared=lambda data: record_firecrawl_usage(provider, data, shared=True)
+    )
+
+async def _request(
+    method: str,
+    path: str,
+    provider: str,
+    payload: Optional[Dict],
+    timeout: Optional[float],
+    record_usage: bool = True
+) -> Dict:
+    client = get_http_client()
+    limiter = get_limiter(provider)
+    for attempt in range(config.RATE_LIMIT_MAX_RETRIES + 1):
+        async with limiter.slot():
+            started = time.perf_counter()
+            try:
+                response = await client.request(
+                    method,
+                    f"{config.FIRECRAWL_API_URL}{path}",
+                    headers={
+                        'Authorization': f'Bearer {config.FIRECRAWL_API_KEY}',
+                        'Content-Type': 'application/json'
+                    },
+                    json=payload,
+                    # Shortened to the analysis deadline in scope, if any
+                    timeout=call_timeout(timeout if timeout is not None else config.HTTP_TIMEOUT_SECONDS)
+                )
+            except Exception as e:
+                record_provider_call(provider, started, error=e, attempt=attempt + 1)
+                raise
+            record_provider_call(provider, started, response, attempt=attempt + 1)
+        if response.status_code != 429:
+            break
+        limiter.throttle(parse_retry_after(response.headers.get("Retry-After")))
+
+    if response.status_code != 200:
+        error_data = response.text[:500] if response.text else ""
+        logger.warning(f"Firecrawl API returned status {response.status_code}: {error_data}")
+        raise FirecrawlError(f"Firecrawl API error: {response.status_code}")
+
+    data = response.json()
+    if record_usage:
+        record_firecrawl_usage(provider, data)
+    return data
@@ -0,0 +1,176 @@
+import httpx
+import time
+from typing import Dict, Optional
+from config import config
+from services.cassette import CassetteTransport
+from services.usage import record_call
+from utils.logger import setup_logger
+from utils.metrics import PROVIDER_REQUEST_DURATION, PROVIDER_RESPONSE_BYTES, provider_status
+from utils.tracing import record_span
+
+logger = setup_logger(__name__)
+
+# Process-wide client, created in main.lifespan and shared by every outbound call
+_client: Optional[httpx.AsyncClient] = None
+
+# Request counters collected through httpx event hooks
+_request_stats = {
+    "requests_total": 0,
+    "responses_total": 0,
+    "responses_by_status": {}
+}
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+async def _on_request(request: httpx.Request):
+    _request_stats["requests_total"] += 1
+
+async def _on_response(response: httpx.Response):
+    _request_stats["responses_total"] += 1
+    by_status = _request_stats["responses_by_status"]
+    by_status[response.status_code] = by_status.get(response.status_code, 0) + 1
+
+def _build_client() -> httpx.AsyncClient:
+    """Build the pooled client from config."""
+    http2 = config.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("⚠️  HTTP2_ENABLED is set but the 'h2' package is not installed - using HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY_SECONDS
+    )
+    logger.info(f"Creating shared HTTP client (max_connections={limits.max_connections}, "
+                f"max_keepalive={limits.max_keepalive_connections}, http2={http2})")
+    transport = None
+    if config.CASSETTE_MODE != "off":
+        # Record/replay wraps the pooled transport (which then owns the limits)
+        logger.info(f"📼 Provider cassettes enabled (CASSETTE_MODE={config.CASSETTE_MODE})")
+        transport = CassetteTransport(httpx.AsyncHTTPTransport(limits=limits, http2=http2))
+    return httpx.AsyncClient(
+        timeout=config.HTTP_TIMEOUT_SECONDS,
+        limits=limits,
+        http2=http2,
+        transport=transport,
+        event_hooks={"request": [_on_request], "response": [_on_response]}
+    )
+
+def record_provider_call(
+    provider: str,
+    started: float,
+    response: Optional[httpx.Response] = None,
+    error: Optional[BaseException] = None,
+    attempt: Optional[int] = None
+):
+    """
+    Record one outbound provider call in the /metrics histograms, as a trace span
+    and in the usage ledger of the analysis making it.
+
+    Args:
+        provider: Provider name (rate limiter name: firecrawl_search, sonar_pro, ...)
+        started: time.perf_counter() when the request was sent
+        response: The response, if one arrived (its status and body size are recorded)
+        error: The exception raised instead, if any (recorded as timeout or error);
+               with neither, the call is recorded as a 200 (SDK calls that returned)
+        attempt: 1-based attempt number when the caller retries
+    """
+    elapsed = time.perf_counter() - started
+    status = provider_status(response.status_code if response is not None else (200 if error is None else None), error)
+    PROVIDER_REQUEST_DURATION.observe(elapsed, provider=provider, status=status)
+    if response is not None:
+        PROVIDER_RESPONSE_BYTES.observe(len(response.content), provider=provider)
+    record_call(provider, elapsed, failed=error is not None or (response is not None and response.status_code >= 400))
+    record_span(
+        provider,
+        elapsed,
+        error=error,
+        failed=response is not None and response.status_code >= 400,
+        provider=provider,
+        attempt=attempt,
+        **{"http.response.status_code": response.status_code if response is not None else None}
+    )
+
+async def init_http_client() -> httpx.AsyncClient:
+    """
+    Create the shared HTTP client. Called once from main.lifespan on startup.
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+async def close_http_client():
+    """Close the shared HTTP client and its pooled connections. Called on shutdown."""
+    global _client
+    if _client is not None and not _client.is_closed:
+        logger.info("Closing shared HTTP client")
+        await _client.aclose()
+    _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client.
+
+    Falls back to creating it lazily when the app lifespan has not run
+    (scripts, benchmarks).
+
+    Returns:
+        The shared httpx.AsyncClient
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+def get_pool_stats() -> Dict:
+    """
+    Snapshot of connection pool usage for tuning pool limits under load.
+
+    Returns:
+        Dict with pool limits, connection counts by state, queued requests and request counters
+    """
+    stats = {
+        "initialized": _client is not None and not _client.is_closed,
+        "limits": {
+            "max_connections": config.HTTP_MAX_CONNECTIONS,
+            "max_keepalive_connections": config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry_seconds": config.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        },
+        "connections": {"total": 0, "active": 0, "idle": 0, "http2": 0},
+        "queued_requests": 0,
+        "requests_total": _request_stats["requests_total"],
+        "responses_total": _request_stats["responses_total"],
+        "responses_by_status": dict(_request_stats["responses_by_status"])
+    }
+    if not stats["initialized"]:
+        return stats
+
+    # httpcore does not expose pool state publicly; read it defensively
+    pool = getattr(_client._transport, "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    stats["connections"]["total"] = len(connections)
+    for connection in connections:
+        try:
+            if connection.is_idle():
+                stats["connections"]["idle"] += 1
+            else:
+                stats["connections"]["active"] += 1
+            if "HTTP/2" in connection.info():
+                stats["connections"]["http2"] += 1
+        except Exception:
+            continue
+    stats["queued_requests"] = sum(
+        1 for r in getattr(pool, "_requests", []) if getattr(r, "connection", None) is None
+    )
+    return stats
@@ -0,0 +1,264 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from config import config
+from utils.logger import setup_logger
+from utils.stats import LatencyStats
+import asyncio
+import contextvars
+import time
+import uuid
+
+logger = setup_logger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while JOB_QUEUE_MAX jobs are already waiting"""
+    pass
+
+
+def _iso(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    """One submitted unit of background work and everything known about its progress"""
+    id: str
+    seq: int
+    payload: Any
+    run: Callable[["Job"], Awaitable[Any]]
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stages: Dict[str, Dict] = field(default_factory=dict)
+    partial: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = None
+    # Submitting request's context (request id, trace span), so the run's logs and spans belong to it
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def snapshot(self, queue_position: Optional[int] = None) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "queue_position": queue_position,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "stages": self.stages,
+            "partial": self.partial,
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobManager:
+    """
+    Bounded in-process worker pool for long-running jobs.
+
+    Submitted jobs wait in a FIFO queue of at most max_queue entries and are
+    picked up by a fixed number of worker tasks. A job's run callable receives
+    the Job and may fill in job.stages / job.partial as it progresses; its
+    return value becomes job.result. Finished jobs stay pollable for
+    retention_seconds.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retention_seconds: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+        self._stopping = False
+        self._submitted = 0
+        self._dequeued = 0
+        self.counters = {SUCCEEDED: 0, FAILED: 0, CANCELLED: 0, "rejected": 0}
+        self.queue_wait = LatencyStats()
+        self.run_time = LatencyStats()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self):
+        """Create the queue and start the worker tasks (call from the app lifespan)."""
+        if self.started:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"👷 Job pool started: {self.workers} workers, queue max {self.max_queue}")
+
+    async def stop(self):
+        """Cancel running jobs and stop the workers."""
+        self._stopping = True
+        for job in self._jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Job pool stopped")
+
+    def submit(self, payload: Any, run: Callable[[Job], Awaitable[Any]]) -> Job:
+        """
+        Queue a job without waiting for it.
+
+        Args:
+            payload: Job input, available to run() as job.payload
+            run: Coroutine function executed by a worker with the Job
+
+        Returns:
+            The queued Job
+
+        Raises:
+            JobQueueFullError: If max_queue jobs are already waiting
+        """
+        if not self.started:
+            raise RuntimeError("Job pool is not running")
+        self._prune()
+
+        self._submitted += 1
+        job = Job(id=uuid.uuid4().hex, seq=self._submitted, payload=payload, run=run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._submitted -= 1
+            self.counters["rejected"] += 1
+            logger.warning(f"⚠️  Job queue full ({self.max_queue} waiting) - rejecting job")
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+        self._jobs[job.id] = job
+        logger.info(f"📥 Job {job.id} queued (queue depth {self._queue.qsize()})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def queue_position(self, job: Job) -> Optional[int]:
+        """1-based position in the queue, or None once the job has been picked up."""
+        if job.status != QUEUED:
+            return None
+        return max(1, job.seq - self._dequeued)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job. Queued jobs are skipped by the workers; running jobs have
+        their task cancelled, which cancels the work they started.
+
+        Args:
+            job_id: Job id returned by submit()
+
+        Returns:
+            The Job, or None if unknown
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        if job.status == QUEUED:
+            self._finish(job, CANCELLED)
+            logger.info(f"🛑 Job {job.id} cancelled while queued")
+        elif job.task is not None:
+            job.task.cancel()
+            logger.info(f"🛑 Job {job.id} cancellation requested")
+        return job
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            self._dequeued += 1
+            try:
+                if job.finished:
+                    continue  # cancelled while queued
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        self.queue_wait.record(job.started_at - job.created_at)
+        logger.info(f"▶️  Job {job.id} started after {job.started_at - job.created_at:.2f}s in queue")
+
+        job.task = job.context.run(asyncio.create_task, job.run(job))
+        try:
+            job.result = await job.task
+            self._finish(job, SUCCEEDED)
+        except asyncio.CancelledError:
+            self._finish(job, CANCELLED)
+            if self._stopping:
+                raise
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED)
+            logger.error(f"❌ Job {job.id} failed: {str(e)}", exc_info=True)
+        finally:
+            job.task = None
+
+        self.run_time.record(job.finished_at - job.started_at)
+        logger.info(f"🏁 Job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s")
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        self.counters[status] += 1
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self) -> Dict:
+        running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+        return {
+            "workers": self.workers,
+            "queue_max": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "running": running,
+            "tracked_jobs": len(self._jobs),
+            **self.counters,
+            "queue_wait": self.queue_wait.snapshot(),
+            "run_time": self.run_time.snapshot()
+        }
+
+
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Process-wide job pool sized by JOB_WORKERS / JOB_QUEUE_MAX."""
+    global _manager
+    if _manager is None:
+        _manager = JobManager(
+            workers=config.JOB_WORKERS,
+            max_queue=config.JOB_QUEUE_MAX,
+            retention_seconds=config.JOB_RETENTION_SECONDS
+        )
+    return _manager
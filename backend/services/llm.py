@@ -1,10 +1,255 @@
 from llama_index.llms.perplexity import Perplexity
+from llama_index.core.base.llms.types import CompletionResponse
+from llama_index.core.llms.callbacks import llm_completion_callback
+from tenacity import retry, retry_if_exception_type, retry_if_not_exception_type, stop_after_attempt, wait_fixed
+from typing import Any, Dict, Optional, Tuple
 from config import config
+from services.http_client import get_http_client, record_provider_call
+from services.cache import TTLCache, make_cache_key
+from services.cassette import CassetteMiss, current_cassette
+from services.rate_limits import get_limiter, parse_retry_after
+from services.usage import record_llm_usage
+from utils.deadline import DeadlineExceeded, call_timeout
 from utils.logger import setup_logger
+from utils.stats import LatencyStats
+import threading
+import time
 
 logger = setup_logger(__name__)
 
-def get_sonar_llm(temperature: float = 0.2):
+
+class PooledPerplexity(Perplexity):
+    """
+    Perplexity LLM that sends async completions over the shared pooled HTTP client
+    instead of opening a new httpx.AsyncClient (and TLS handshake) per call.
+
+    Each attempt (including retries) takes a slot from the model's rate limiter,
+    and a 429 pauses that limiter for Retry-After. Attempt timeouts are capped
+    at the time left on the current deadline, and no retry starts once it has
+    passed or the call is cancelled.
+    """
+
+    @llm_completion_callback()
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        @retry(
+            stop=stop_after_attempt(self.max_retries),
+            wait=wait_fixed(1),
+            # Exception only: a cancelled call (CancelledError) must not be retried
+            retry=retry_if_exception_type(Exception) & retry_if_not_exception_type((DeadlineExceeded, CassetteMiss))
+        )
+        async def _acomplete_retry(prompt, **kwargs):
+            attempts.append(len(attempts) + 1)
+            return await self._acomplete(prompt, attempt=attempts[-1], **kwargs)
+
+        attempts = []
+        return await _acomplete_retry(prompt, **kwargs)
+
+    async def _acomplete(self, prompt: str, attempt: int = 1, **kwargs: Any) -> CompletionResponse:
+        url = f"{self.api_base}/chat/completions"
+        messages = [{"role": "user", "content": prompt}]
+        if self.system_prompt:
+            messages.insert(0, {"role": "system", "content": self.system_prompt})
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            **self._get_all_kwargs(**kwargs),
+        }
+
+        client = get_http_client()
+        limiter = get_limiter(self.model)
+        async with limiter.slot():
+            started = time.perf_counter()
+            try:
+                response = await client.post(
+                    url, json=payload, headers=self.headers, timeout=call_timeout(self.timeout)
+                )
+            except Exception as e:
+                record_provider_call(limiter.name, started, error=e, attempt=attempt)
+                raise
+            record_provider_call(limiter.name, started, response, attempt=attempt)
+        if response.status_code == 429:
+            limiter.throttle(parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        data = response.json()
+        record_llm_usage(limiter.name, data)
+        return CompletionResponse(
+            text=data["choices"][0]["message"]["content"], raw=data
+        )
+
+
+class _ModelStats:
+    """Completion counters shared by all clients of one model."""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.latency = LatencyStats()
+
+    def snapshot(self) -> Dict:
+        limiter = get_limiter(self.model)
+        return {
+            "max_concurrency": limiter.max_concurrency,
+            "rate_per_minute": limiter.rate_per_minute,
+            "in_flight": self.in_flight,
+            "queued": limiter.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queue_wait": limiter.wait_time.snapshot(),
+            "latency": self.latency.snapshot()
+        }
+
+
+# Agent prompts are built from deterministic inputs, so an identical prompt to the
+# same model/temperature can be answered from cache. Memory-only and size-bounded.
+_completion_cache = TTLCache(
+    "llm_completion",
+    max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.LLM_CACHE_TTL_SECONDS
+)
+_agent_cache_stats: Dict[str, Dict[str, int]] = {}
+
+
+def _record_cache_lookup(agent: str, hit: bool):
+    stats = _agent_cache_stats.setdefault(agent, {"hits": 0, "misses": 0})
+    stats["hits" if hit else "misses"] += 1
+
+
+class LLMClient:
+    """
+    Shared handle on one (model, temperature) Perplexity configuration.
+
+    Instances are created once by the registry and reused by every agent call.
+    Requests are bounded per model by the sonar / sonar_pro rate limiter
+    (PROVIDER_RATE_LIMITS, PROVIDER_CONCURRENCY); time spent waiting for a slot
+    is recorded as queue time. Responses are cached by prompt hash,
+    model and temperature with a per-agent TTL (not while a provider
+    cassette is recording or replaying).
+    """
+
+    def __init__(self, model: str, temperature: float, stats: _ModelStats):
+        self.model = model
+        self.temperature = temperature
+        self._stats = stats
+        self._llm = PooledPerplexity(
+            api_key=config.PPLX_API_KEY,
+            api_base=config.PPLX_API_BASE,
+            model=model,
+            temperature=temperature
+        )
+
+    async def acomplete(self, prompt: str, agent: Optional[str] = None, **kwargs: Any) -> CompletionResponse:
+        """
+        Run a completion through the shared client, serving repeats from cache.
+
+        Args:
+            prompt: Prompt text
+            agent: Calling agent name, selects the cache TTL and hit-ratio bucket
+            **kwargs: Extra Perplexity API parameters
+
+        Returns:
+            CompletionResponse from Perplexity (or the cache)
+        """
+        agent = agent or "default"
+        # A recorded or replayed analysis must see every provider call
+        if not config.LLM_CACHE_ENABLED or current_cassette() is not None:
+            return await self._acomplete_uncached(prompt, **kwargs)
+
+        cache_key = make_cache_key("llm_completion", self.model, self.temperature, prompt, kwargs)
+        cached = _completion_cache.get(cache_key)
+        _record_cache_lookup(agent, cached is not None)
+        if cached is not None:
+            logger.info(f"⚡ LLM cache hit ({agent}, {self.model})")
+            return CompletionResponse(text=cached, additional_kwargs={"cached": True})
+
+        response = await self._acomplete_uncached(prompt, **kwargs)
+        # Every agent expects a JSON object back; don't pin a malformed answer in cache
+        if "{" in response.text:
+            ttl = config.LLM_CACHE_AGENT_TTLS.get(agent, config.LLM_CACHE_TTL_SECONDS)
+            _completion_cache.set(cache_key, response.text, ttl=ttl)
+        return response
+
+    async def _acomplete_uncached(self, prompt: str, **kwargs: Any) -> CompletionResponse:
+        stats = self._stats
+        started_at = time.perf_counter()
+        stats.in_flight += 1
+        try:
+            response = await self._llm.acomplete(prompt, **kwargs)
+            stats.completed += 1
+            return response
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+            stats.latency.record(time.perf_counter() - started_at)
+
+
+# Client registry keyed by (model, temperature); guarded for concurrent first use
+_clients: Dict[Tuple[str, float], LLMClient] = {}
+_model_stats: Dict[str, _ModelStats] = {}
+_registry_lock = threading.Lock()
+
+
+def get_llm(model: str, temperature: float) -> LLMClient:
+    """
+    Get the shared client for a model/temperature pair, creating it on first use.
+
+    Args:
+        model: Perplexity model name (e.g. "sonar", "sonar-pro")
+        temperature: Controls randomness in responses (0.0-1.0)
+
+    Returns:
+        Shared LLMClient instance
+    """
+    key = (model, float(temperature))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _registry_lock:
+        client = _clients.get(key)
+        if client is None:
+            logger.debug(f"Creating {model} LLM client (temperature={temperature})")
+            stats = _model_stats.get(model)
+            if stats is None:
+                stats = _model_stats[model] = _ModelStats(model)
+            client = _clients[key] = LLMClient(model, float(temperature), stats)
+        return client
+
+
+def get_llm_stats() -> Dict:
+    """
+    Registry and per-model completion statistics.
+
+    Returns:
+        Dict with registered clients, per-model in-flight/queued counts and queue wait times,
+        and completion cache hit ratio per agent
+    """
+    return {
+        "completion_cache": {
+            "enabled": config.LLM_CACHE_ENABLED,
+            **_completion_cache.stats(),
+            "agents": {
+                agent: {
+                    **counts,
+                    "hit_ratio": round(counts["hits"] / (counts["hits"] + counts["misses"]), 4)
+                }
+                for agent, counts in _agent_cache_stats.items()
+            }
+        },
+        "clients": [
+            {"model": model, "temperature": temperature}
+            for model, temperature in _clients
+        ],
+        "models": {model: stats.snapshot() for model, stats in _model_stats.items()}
+    }
+
+
+def get_sonar_llm(temperature: float = 0.2) -> LLMClient:
     """
     Get Perplexity Sonar (basic) for standard analysis.
     Used for: Traction, Team, Market, Risk, Synthesis agents.
@@ -13,16 +258,12 @@ def get_sonar_llm(temperature: float = 0.2):
         temperature: Controls randomness in responses (0.0-1.0)
 
     Returns:
-        Perplexity LLM instance configured with Sonar model
+        Shared LLMClient configured with Sonar model
     """
-    logger.debug(f"Creating Sonar LLM instance (temperature={temperature})")
-    return Perplexity(
-        api_key=config.PPLX_API_KEY,
-        model="sonar",
-        temperature=temperature
-    )
+    return get_llm("sonar", temperature)
+
 
-def get_sonar_pro_llm(temperature: float = 0.7):
+def get_sonar_pro_llm(temperature: float = 0.7) -> LLMClient:
     """
     Get Perplexity Sonar Pro (reasoning) for deep research.
     Used for: Deep Market Research agent (Phase 7).
@@ -31,11 +272,6 @@ def get_sonar_pro_llm(temperature: float = 0.7):
         temperature: Controls randomness in responses (0.0-1.0)
 
     Returns:
-        Perplexity LLM instance configured with Sonar Pro model
-    """
-    logger.debug(f"Creating Sonar Pro LLM instance (temperature={temperature})")
-    return Perplexity(
-        api_key=config.PPLX_API_KEY,
-        model="sonar-pro",
-        temperature=temperature
-    )
+        Shared LLMClient configured with Sonar Pro model
+    """
+    return get_llm("sonar-pro", temperature)
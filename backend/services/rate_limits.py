@@ -0,0 +1,146 @@
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+from config import config
+from utils.logger import setup_logger
+from utils.rate_limit import TokenBucket
+from utils.stats import LatencyStats
+import asyncio
+import time
+
+logger = setup_logger(__name__)
+
+
+class ProviderLimiter:
+    """
+    Concurrency and request-rate governor for one external provider.
+
+    Every outbound call takes a slot: first a concurrency permit, then a token
+    from the provider's bucket, so requests leave at most at the configured
+    rate no matter how many agents, scrapes or batch companies are running.
+    A 429 pauses the bucket for the provider's Retry-After, holding back every
+    caller instead of letting each one hit the limit again.
+    """
+
+    def __init__(self, name: str, rate_per_minute: float, max_concurrency: int):
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(
+            name,
+            rate=rate_per_minute / 60,
+            capacity=max(max_concurrency, rate_per_minute / 60 * config.RATE_LIMIT_BURST_SECONDS)
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.throttled = 0
+        self.wait_time = LatencyStats()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one concurrency permit and one rate token for the duration of a call."""
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+            try:
+                await self.bucket.acquire()
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - queued_at
+        self.wait_time.record(waited)
+        if waited > 1.0:
+            logger.info(f"⏳ {self.name} call waited {waited:.2f}s for rate limit / concurrency")
+
+        self.in_flight += 1
+        self.calls += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """
+        Back off after the provider answered 429.
+
+        Args:
+            retry_after: Seconds from the Retry-After header (default: RATE_LIMIT_DEFAULT_BACKOFF_SECONDS)
+        """
+        delay = retry_after if retry_after is not None else config.RATE_LIMIT_DEFAULT_BACKOFF_SECONDS
+        self.throttled += 1
+        self.bucket.pause(delay)
+        logger.warning(f"🚦 {self.name} rate limited (429) - pausing requests for {delay:.1f}s")
+
+    def stats(self) -> Dict:
+        return {
+            "rate_per_minute": self.rate_per_minute,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "throttled": self.throttled,
+            "wait_time": self.wait_time.snapshot(),
+            "bucket": self.bucket.stats()
+        }
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header (delta-seconds or HTTP date).
+
+    Args:
+        value: Header value, or None
+
+    Returns:
+        Non-negative seconds, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[str, ProviderLimiter] = {}
+
+
+def get_limiter(provider: str) -> ProviderLimiter:
+    """
+    Shared limiter for a provider, created on first use from PROVIDER_RATE_LIMITS
+    and PROVIDER_CONCURRENCY.
+
+    Args:
+        provider: firecrawl_scrape, firecrawl_search, sonar or sonar_pro
+                  (Perplexity model names like "sonar-pro" are accepted)
+
+    Returns:
+        ProviderLimiter
+    """
+    provider = provider.replace("-", "_")
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = ProviderLimiter(
+            provider,
+            rate_per_minute=config.PROVIDER_RATE_LIMITS.get(provider, 0),
+            max_concurrency=config.PROVIDER_CONCURRENCY.get(provider, config.LLM_MAX_CONCURRENCY)
+        )
+    return limiter
+
+
+def get_rate_limit_stats() -> Dict:
+    """Per-provider limits, in-flight/waiting calls, 429 counts and slot wait percentiles."""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from config import config
+from utils.logger import setup_logger
+from utils.urls import normalize_url
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+logger = setup_logger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analysis_results (
+    company_key TEXT NOT NULL,
+    crunchbase_key TEXT NOT NULL,
+    company_url TEXT NOT NULL,
+    crunchbase_url TEXT NOT NULL,
+    name TEXT,
+    result_json TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (company_key, crunchbase_key)
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_results_created_at
+    ON analysis_results (created_at DESC);
+CREATE TABLE IF NOT EXISTS analysis_usage (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company_url TEXT NOT NULL,
+    crunchbase_url TEXT NOT NULL,
+    name TEXT,
+    cost_usd REAL NOT NULL,
+    usage_json TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analysis_usage_created_at
+    ON analysis_usage (created_at DESC);
+"""
+
+
+@dataclass
+class StoredAnalysis:
+    """A persisted AnalysisResult and when it was produced"""
+    company_url: str
+    crunchbase_url: str
+    name: Optional[str]
+    result: Optional[Dict]
+    created_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def analyzed_at(self) -> str:
+        return datetime.fromtimestamp(self.created_at, tz=timezone.utc).isoformat()
+
+
+class ResultStore:
+    """
+    SQLite-backed store of the latest AnalysisResult per (company_url, crunchbase_url),
+    and of the provider usage of every analysis run (one row per run, kept for
+    /api/admin/costs even when the result is replaced).
+
+    Lookups use the primary key and listing walks the created_at index, so both stay
+    O(log n) as the table grows. Sync methods hold a lock around one shared
+    connection; the a* variants run them off the event loop.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        logger.info(f"📦 Result store ready at {path}")
+
+    @staticmethod
+    def _keys(company_url: str, crunchbase_url: str):
+        return normalize_url(company_url), normalize_url(crunchbase_url)
+
+    def get(self, company_url: str, crunchbase_url: str) -> Optional[StoredAnalysis]:
+        """
+        Latest stored analysis for a company.
+
+        Args:
+            company_url: Company website URL
+            crunchbase_url: Crunchbase profile URL
+
+        Returns:
+            StoredAnalysis or None if the company was never analyzed
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT company_url, crunchbase_url, name, result_json, created_at "
+                "FROM analysis_results WHERE company_key = ? AND crunchbase_key = ?",
+                self._keys(company_url, crunchbase_url)
+            ).fetchone()
+        if row is None:
+            return None
+        return StoredAnalysis(row[0], row[1], row[2], json.loads(row[3]), row[4])
+
+    def save(self, company_url: str, crunchbase_url: str, result: Dict) -> StoredAnalysis:
+        """
+        Store (or replace) the analysis for a company.
+
+        Args:
+            company_url: Company website URL
+            crunchbase_url: Crunchbase profile URL
+            result: AnalysisResult as a JSON-serializable dict
+
+        Returns:
+            The stored record
+        """
+        created_at = time.time()
+        company_key, crunchbase_key = self._keys(company_url, crunchbase_url)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_results "
+                "(company_key, crunchbase_key, company_url, crunchbase_url, name, result_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (company_key, crunchbase_key, company_url, crunchbase_url,
+                 result.get("name"), json.dumps(result, separators=(",", ":")), created_at)
+            )
+            self._conn.commit()
+        return StoredAnalysis(company_url, crunchbase_url, result.get("name"), result, created_at)
+
+    def merge_deep_research(self, company_url: str, crunchbase_url: str, research: Dict) -> Optional[StoredAnalysis]:
+        """
+        Fill in deep market research that landed after the analysis was stored.
+
+        Only the result body changes; created_at keeps the time the analysis ran,
+        so max_age checks and /api/analyses ordering are unaffected.
+
+        Args:
+            company_url: Company website URL
+            crunchbase_url: Crunchbase profile URL
+            research: DeepMarketResearch as a JSON-serializable dict
+
+        Returns:
+            The updated record, or None if there is no stored analysis still pending research
+        """
+        keys = self._keys(company_url, crunchbase_url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT company_url, crunchbase_url, name, result_json, created_at "
+                "FROM analysis_results WHERE company_key = ? AND crunchbase_key = ?",
+                keys
+            ).fetchone()
+            if row is None:
+                return None
+            result = json.loads(row[3])
+            if not result.get("deep_market_research_pending"):
+                return None
+            result.update(deep_market_research=research, deep_market_research_pending=False)
+            self._conn.execute(
+                "UPDATE analysis_results SET result_json = ? WHERE company_key = ? AND crunchbase_key = ?",
+                (json.dumps(result, separators=(",", ":")), *keys)
+            )
+            self._conn.commit()
+        return StoredAnalysis(row[0], row[1], row[2], result, row[4])
+
+    def list(self, limit: int = 50, before: Optional[float] = None) -> List[StoredAnalysis]:
+        """
+        Most recent analyses first, without result bodies.
+
+        Args:
+            limit: Max rows to return
+            before: Only return analyses created before this UNIX timestamp (keyset pagination)
+
+        Returns:
+            List of StoredAnalysis with result=None
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT company_url, crunchbase_url, name, created_at FROM analysis_results "
+                "WHERE created_at < ? ORDER BY created_at DESC LIMIT ?",
+                (before if before is not None else float("inf"), limit)
+            ).fetchall()
+        return [StoredAnalysis(r[0], r[1], r[2], None, r[3]) for r in rows]
+
+    def save_usage(
+        self, company_url: str, crunchbase_url: str, name: Optional[str], usage: Dict, created_at: float
+    ):
+        """
+        Store the provider usage of one analysis run.
+
+        Args:
+            company_url: Company website URL
+            crunchbase_url: Crunchbase profile URL
+            name: Company name
+            usage: UsageLedger snapshot
+            created_at: UNIX timestamp the run finished
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO analysis_usage (company_url, crunchbase_url, name, cost_usd, usage_json, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (company_url, crunchbase_url, name, usage["total"]["cost_usd"],
+                 json.dumps(usage, separators=(",", ":")), created_at)
+            )
+            self._conn.commit()
+
+    def list_usage(self, since: float, limit: int = 10000) -> List[Dict]:
+        """
+        Usage of the analysis runs finished since a point in time, newest first.
+
+        Args:
+            since: UNIX timestamp
+            limit: Max rows to return
+
+        Returns:
+            List of {"company_url", "crunchbase_url", "name", "usage", "created_at"}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT company_url, crunchbase_url, name, usage_json, created_at FROM analysis_usage "
+                "WHERE created_at >= ? ORDER BY created_at DESC LIMIT ?",
+                (since, limit)
+            ).fetchall()
+        return [
+            {"company_url": r[0], "crunchbase_url": r[1], "name": r[2], "usage": json.loads(r[3]), "created_at": r[4]}
+            for r in rows
+        ]
+
+    async def aget(self, company_url: str, crunchbase_url: str) -> Optional[StoredAnalysis]:
+        return await asyncio.to_thread(self.get, company_url, crunchbase_url)
+
+    async def asave(self, company_url: str, crunchbase_url: str, result: Dict) -> StoredAnalysis:
+        return await asyncio.to_thread(self.save, company_url, crunchbase_url, result)
+
+    async def amerge_deep_research(self, company_url: str, crunchbase_url: str, research: Dict) -> Optional[StoredAnalysis]:
+        return await asyncio.to_thread(self.merge_deep_research, company_url, crunchbase_url, research)
+
+    async def alist(self, limit: int = 50, before: Optional[float] = None) -> List[StoredAnalysis]:
+        return await asyncio.to_thread(self.list, limit, before)
+
+    async def asave_usage(
+        self, company_url: str, crunchbase_url: str, name: Optional[str], usage: Dict, created_at: float
+    ):
+        await asyncio.to_thread(self.save_usage, company_url, crunchbase_url, name, usage, created_at)
+
+    async def alist_usage(self, since: float, limit: int = 10000) -> List[Dict]:
+        return await asyncio.to_thread(self.list_usage, since, limit)
+
+
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_result_store() -> ResultStore:
+    """Process-wide result store, opened on first use at RESULT_STORE_PATH."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ResultStore(config.RESULT_STORE_PATH)
+    return _store
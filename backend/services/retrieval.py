@@ -0,0 +1,220 @@
+from typing import Dict, Iterable, List, Optional
+from config import config
+from services.firecrawl import firecrawl_batch_scrape, firecrawl_search
+from utils.logger import setup_logger
+from utils.urls import normalize_url
+import asyncio
+import time
+
+logger = setup_logger(__name__)
+
+# Firecrawl v2 search request per agent; {company_name} is filled in at call time
+AGENT_SEARCHES: Dict[str, Dict] = {
+    "traction": {
+        "query": "{company_name} revenue ARR users growth metrics milestones funding traction",
+        "limit": 5,
+        "tbs": "qdr:y",  # Last year for recent traction data
+        "lang": "en",
+        "country": "us",
+        "location": "United States",
+        "timeout": 60000
+    },
+    "team": {
+        "query": "{company_name} founders CEO team executives leadership background experience",
+        "sources": ["web", "news"],
+        "limit": 5
+    },
+    "market": {
+        "query": "{company_name} market size competition trends industry analysis",
+        "sources": ["web", "news"],
+        "limit": 5
+    },
+    "risks": {
+        "query": "{company_name} risks challenges problems controversies failures issues concerns",
+        "sources": ["web", "news"],
+        "limit": 5
+    },
+    "synthesis": {
+        "query": "{company_name} investment analysis valuation funding investors industry outlook",
+        "sources": ["web", "news"],
+        "limit": 5
+    }
+}
+
+# Agents read the article text only, so leave page chrome and images out of
+# the markdown Firecrawl returns
+_SCRAPE_OPTIONS = {
+    "formats": ["markdown"],
+    "onlyMainContent": True,
+    "excludeTags": ["nav", "header", "footer", "aside", "form", "script", "style", "svg", "iframe"],
+    "removeBase64Images": True,
+    "blockAds": True,
+    "maxAge": 86400000  # 24 hours
+}
+
+
+def _search_payload(agent: str, company_name: str, scrape: bool) -> Dict:
+    payload = {**AGENT_SEARCHES[agent]}
+    payload["query"] = payload["query"].format(company_name=company_name)
+    if scrape:
+        payload["scrapeOptions"] = _SCRAPE_OPTIONS
+    return payload
+
+
+def _search_items(response: Dict) -> List[Dict]:
+    """Web results followed by news results from a v2 search response."""
+    data = response.get("data", {})
+    if isinstance(data, list):
+        return data
+    return data.get("web", []) + data.get("news", [])
+
+
+async def search_agent_sources(agent: str, company_name: str) -> List[Dict]:
+    """
+    Run one agent's own search with page markdown scraped by Firecrawl.
+
+    Used when an agent runs outside the workflow's shared retrieval stage.
+
+    Args:
+        agent: Key of AGENT_SEARCHES
+        company_name: Company to search for
+
+    Returns:
+        Search result dicts (url, title, description, markdown...)
+    """
+    logger.debug(f"Fireplexity search for {agent}: {AGENT_SEARCHES[agent]['query'].format(company_name=company_name)}")
+    response = await firecrawl_search(_search_payload(agent, company_name, scrape=True))
+    return _search_items(response)
+
+
+async def get_agent_sources(data: dict, agent: str) -> List[Dict]:
+    """
+    Ranked web sources for an agent: its slice from the shared retrieval stage
+    (data["web_sources"]) when the workflow ran one, otherwise its own search.
+
+    Args:
+        data: Agent input dict with keys: crunchbase, web_sources (optional), ...
+        agent: Key of AGENT_SEARCHES
+
+    Returns:
+        Search result dicts (url, title, description, markdown...)
+    """
+    retrieved = data.get("web_sources") or {}
+    if agent in retrieved:
+        return retrieved[agent]
+    company_name = data.get("crunchbase", {}).get("name", "Unknown Company")
+    return await search_agent_sources(agent, company_name)
+
+
+def _pages_to_scrape(ranked: Dict[str, List[str]], max_pages: int) -> List[str]:
+    """Unique URL keys, taking each agent's next-best result in turn, up to max_pages."""
+    selected: Dict[str, None] = {}
+    for rank in range(max((len(keys) for keys in ranked.values()), default=0)):
+        for keys in ranked.values():
+            if rank < len(keys):
+                selected.setdefault(keys[rank])
+    return list(selected)[:max_pages]
+
+
+async def _scrape_pages(urls: List[str]) -> Dict[str, str]:
+    """
+    Markdown of each URL from one batch scrape job.
+
+    Returns:
+        Dict normalized URL -> markdown, for pages that scraped successfully
+    """
+    response = await firecrawl_batch_scrape({"urls": urls, **_SCRAPE_OPTIONS})
+    markdown: Dict[str, str] = {}
+    for document in response.get("data") or []:
+        metadata = document.get("metadata") or {}
+        if metadata.get("error") or (metadata.get("statusCode") or 200) >= 400 or not document.get("markdown"):
+            continue
+        key = normalize_url(metadata.get("sourceURL") or metadata.get("url") or "")
+        if key:
+            markdown[key] = document["markdown"]
+    return markdown
+
+
+async def retrieve_sources(
+    company_name: str,
+    agents: Optional[Iterable[str]] = None,
+    per_agent: Optional[int] = None,
+    max_pages: Optional[int] = None
+) -> Dict[str, List[Dict]]:
+    """
+    Shared retrieval for all agents: search once per agent, scrape each page once.
+
+    All agent queries run concurrently without server-side scraping. Results are
+    deduplicated by normalized URL, and at most `max_pages` of the pages in
+    some agent's top `per_agent` (each agent's best results first) are scraped
+    in a single batch scrape job, each once however many queries returned it.
+    Other results keep their search snippet. Each agent gets its results in
+    search rank order, with scraped pages ahead of the rest.
+
+    Args:
+        company_name: Company to search for
+        agents: Agents to retrieve for (default: all of AGENT_SEARCHES)
+        per_agent: Results kept per agent (default: RETRIEVAL_RESULTS_PER_AGENT)
+        max_pages: Pages scraped in total (default: RETRIEVAL_MAX_PAGES)
+
+    Returns:
+        Dict agent -> ranked list of result dicts with markdown. Agents whose
+        search failed are left out so they can fall back to their own search.
+    """
+    agents = list(agents or AGENT_SEARCHES)
+    per_agent = per_agent or config.RETRIEVAL_RESULTS_PER_AGENT
+    max_pages = max_pages if max_pages is not None else config.RETRIEVAL_MAX_PAGES
+    start_time = time.time()
+
+    responses = await asyncio.gather(
+        *[firecrawl_search(_search_payload(agent, company_name, scrape=False)) for agent in agents],
+        return_exceptions=True
+    )
+
+    pages: Dict[str, Dict] = {}
+    ranked: Dict[str, List[str]] = {}
+    result_count = 0
+    for agent, response in zip(agents, responses):
+        if isinstance(response, Exception):
+            logger.warning(f"⚠️  Retrieval search for {agent} failed: {str(response)}")
+            continue
+        keys: List[str] = []
+        for item in _search_items(response):
+            key = normalize_url(item.get("url", ""))
+            if not key or key in keys:
+                continue
+            result_count += 1
+            pages.setdefault(key, dict(item))
+            keys.append(key)
+        ranked[agent] = keys[:per_agent]
+
+    to_scrape = _pages_to_scrape(ranked, max_pages)
+    scraped: Dict[str, str] = {}
+    if to_scrape:
+        try:
+            scraped = await _scrape_pages([pages[key]["url"] for key in to_scrape])
+        except Exception as e:
+            logger.warning(f"⚠️  Retrieval batch scrape failed, using search snippets: {str(e)}")
+    scraped_bytes = 0
+    scraped_keys = set()
+    for key, page in pages.items():
+        markdown = scraped.get(key)
+        if not markdown:
+            # Fall back to the search snippet so the agent still sees something
+            page["markdown"] = page.get("description") or page.get("snippet") or ""
+            continue
+        scraped_bytes += len(markdown)
+        scraped_keys.add(key)
+        page["markdown"] = markdown[:config.RETRIEVAL_MAX_PAGE_CHARS]
+
+    sources = {
+        agent: [pages[key] for key in sorted(keys, key=lambda key: key not in scraped_keys)]
+        for agent, keys in ranked.items()
+    }
+
+    logger.info(
+        f"✅ Retrieval for {company_name}: {len(agents)} searches, {result_count} results, "
+        f"{len(pages)} unique URLs, scraped {len(scraped_keys)}/{len(to_scrape)} pages "
+        f"({scraped_bytes / 1024:.0f} KB) in {time.time() - start_time:.2f}s"
+    )
+    return sources
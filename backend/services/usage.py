@@ -0,0 +1,388 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from config import config
+from services.result_store import get_result_store
+from utils.deadline import current_deadline
+from utils.logger import setup_logger
+from utils.metrics import PROVIDER_COST, PROVIDER_TOKENS
+import asyncio
+import math
+import time
+
+logger = setup_logger(__name__)
+
+# Figures kept per (agent, provider); cost_usd is an estimate from config prices
+# unless the provider reports the actual cost
+FIGURES = (
+    "calls", "errors", "provider_seconds", "prompt_tokens", "completion_tokens",
+    "search_results", "pages", "credits", "cost_usd", "coalesced"
+)
+
+# Calls made outside a workflow stage or agent (e.g. the workflow itself)
+_UNATTRIBUTED = "other"
+
+# Process-wide totals per provider since startup, including calls outside
+# analyses (/api/search); exposed through /api/admin/costs
+_process_totals: Dict[str, Dict[str, float]] = {}
+_process_started = time.time()
+
+# Ledgers being persisted; referenced until their store write is done
+_pending_writes: set = set()
+
+
+def _empty() -> Dict[str, float]:
+    return {figure: 0 for figure in FIGURES}
+
+
+def _add(into: Dict[str, float], figures: Dict[str, float]):
+    for figure, value in figures.items():
+        into[figure] = into.get(figure, 0) + value
+
+
+def _rounded(figures: Dict[str, float]) -> Dict[str, float]:
+    return {
+        figure: round(value, 6 if figure.startswith("cost_usd") else 3) if isinstance(value, float) else value
+        for figure, value in figures.items()
+    }
+
+
+class UsageLedger:
+    """
+    Provider usage of one analysis: calls, provider time, tokens, Firecrawl
+    pages and credits, and estimated cost per agent and provider.
+
+    Calls are attributed to the workflow stage or agent whose deadline is in
+    scope (collect_data, retrieve_sources, traction, ..., synthesis). Deep
+    research can keep spending after synthesis, so the ledger is only closed
+    (and persisted) once the last of the run's work has finished.
+    """
+
+    def __init__(self, company_url: str, crunchbase_url: str, name: Optional[str] = None, replayed: bool = False):
+        """
+        Args:
+            company_url: Company website URL
+            crunchbase_url: Crunchbase profile URL
+            name: Company name (for logs and /api/admin/costs)
+            replayed: Provider calls are answered from a cassette (nothing is spent)
+        """
+        self.company_url = company_url
+        self.crunchbase_url = crunchbase_url
+        self.name = name
+        self.replayed = replayed
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._figures: Dict[tuple, Dict[str, float]] = {}
+        self._agent_elapsed: Dict[str, float] = {}
+        self._stage_elapsed: Dict[str, float] = {}
+        self._on_close: List[Callable[["UsageLedger"], Any]] = []
+
+    def add(self, provider: str, agent: str, **figures: float):
+        """
+        Add figures for one provider call.
+
+        Args:
+            provider: Provider name (firecrawl_search, firecrawl_scrape, sonar, sonar_pro)
+            agent: Stage or agent that made the call
+            **figures: Values to add, keyed by FIGURES
+        """
+        _add(self._figures.setdefault((agent, provider), _empty()), figures)
+
+    def record_agent(self, agent: str, seconds: float):
+        """Wall-clock time of an agent, shown next to its spend."""
+        self._agent_elapsed[agent] = seconds
+
+    def record_stage(self, stage: str, seconds: float):
+        """Wall-clock time of a workflow stage."""
+        self._stage_elapsed[stage] = seconds
+
+    def snapshot(self) -> Dict:
+        """
+        Figures so far, totalled and broken down per agent and provider.
+
+        Returns:
+            Dict shaped like AnalysisDiagnostics
+        """
+        total, agents, providers = _empty(), {}, {}
+        for (agent, provider), figures in self._figures.items():
+            _add(total, figures)
+            _add(agents.setdefault(agent, _empty()), figures)
+            _add(providers.setdefault(provider, _empty()), figures)
+        for agent, seconds in self._agent_elapsed.items():
+            agents.setdefault(agent, _empty())["elapsed_seconds"] = seconds
+        return {
+            "total": _rounded(total),
+            "agents": {agent: _rounded(figures) for agent, figures in sorted(agents.items())},
+            "providers": {provider: _rounded(figures) for provider, figures in sorted(providers.items())},
+            "stages": {stage: round(seconds, 3) for stage, seconds in self._stage_elapsed.items()},
+            "elapsed_seconds": round((self.finished or time.time()) - self.started, 3),
+            "complete": self.finished is not None,
+            "replayed": self.replayed
+        }
+
+    def on_close(self, callback: Callable[["UsageLedger"], Any]):
+        self._on_close.append(callback)
+
+    def close(self):
+        """Mark the run's spending finished and hand the ledger to its close callbacks."""
+        if self.finished is not None:
+            return
+        self.finished = time.time()
+        total = self.snapshot()["total"]
+        logger.info(
+            f"💰 Analysis of {self.name or self.company_url}: ${total['cost_usd']:.4f} estimated, "
+            f"{total['prompt_tokens'] + total['completion_tokens']} tokens, {total['credits']} Firecrawl credits "
+            f"in {total['calls']} calls"
+        )
+        for callback in self._on_close:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.warning(f"⚠️  Usage ledger close callback failed: {str(e)}")
+
+
+_current: ContextVar[Optional[UsageLedger]] = ContextVar("usage_ledger", default=None)
+
+
+def current_usage() -> Optional[UsageLedger]:
+    """The usage ledger of the running analysis, if any."""
+    return _current.get()
+
+
+@contextmanager
+def usage_scope(ledger: UsageLedger) -> Iterator[UsageLedger]:
+    """
+    Attribute provider calls to `ledger` in this task and the tasks it creates;
+    wrap the call that starts the workflow.
+    """
+    token = _current.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current.reset(token)
+
+
+def _record(provider: str, shared: bool = False, **figures: float):
+    ledger = _current.get()
+    if shared:
+        # Served by another caller's in-flight request: this analysis used the
+        # result, but the spend was already counted once for the process
+        if ledger is not None:
+            deadline = current_deadline()
+            ledger.add(provider, deadline.name if deadline is not None else _UNATTRIBUTED, coalesced=1, **figures)
+        return
+    if ledger is None:
+        agent = "none"
+    else:
+        deadline = current_deadline()
+        agent = deadline.name if deadline is not None else _UNATTRIBUTED
+        ledger.add(provider, agent, **figures)
+        # Replayed cassettes cost nothing; keep them out of the process totals and spend counters
+        if ledger.replayed:
+            return
+    _add(_process_totals.setdefault(provider, _empty()), figures)
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if figures.get(kind):
+            PROVIDER_TOKENS.inc(figures[kind], provider=provider, agent=agent, type=kind.split("_")[0])
+    if figures.get("cost_usd"):
+        PROVIDER_COST.inc(figures["cost_usd"], provider=provider, agent=agent)
+
+
+def record_call(provider: str, elapsed: float, failed: bool = False):
+    """
+    Count one outbound call and its duration (see http_client.record_provider_call).
+
+    Args:
+        provider: Provider name
+        elapsed: Seconds the call took
+        failed: Error or non-2xx response
+    """
+    _record(provider, calls=1, errors=int(failed), provider_seconds=elapsed)
+
+
+def record_llm_usage(provider: str, data: Dict):
+    """
+    Tokens and cost of a Perplexity chat completion.
+
+    Uses the response's usage.cost.total_cost when Perplexity reports it, else
+    prices the tokens with LLM_INPUT_PRICES / LLM_OUTPUT_PRICES (USD per
+    million tokens) plus the LLM_REQUEST_PRICES per-request fee.
+
+    Args:
+        provider: sonar or sonar_pro
+        data: Parsed /chat/completions response
+    """
+    usage = data.get("usage") or {}
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    completion_tokens = int(usage.get("completion_tokens") or 0)
+    cost = usage.get("cost")
+    reported = cost.get("total_cost") if isinstance(cost, dict) else None
+    if reported is not None:
+        cost = float(reported)
+    else:
+        cost = (
+            prompt_tokens * config.LLM_INPUT_PRICES.get(provider, 0)
+            + completion_tokens * config.LLM_OUTPUT_PRICES.get(provider, 0)
+        ) / 1_000_000 + config.LLM_REQUEST_PRICES.get(provider, 0)
+    _record(provider, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=cost)
+
+
+def _reported_credits(data: Any) -> Optional[float]:
+    """creditsUsed from a response or its metadata (REST dicts or SDK objects)."""
+    for source in (data, _field(data, "metadata")):
+        credits = _field(source, "creditsUsed")
+        if credits is None:
+            credits = _field(source, "credits_used")
+        if credits is not None:
+            return credits
+    return None
+
+
+def _field(data: Any, name: str) -> Any:
+    if isinstance(data, dict):
+        return data.get(name)
+    return getattr(data, name, None)
+
+
+def record_firecrawl_usage(provider: str, data: Dict, shared: bool = False):
+    """
+    Results, scraped pages and credits of a Firecrawl search or scrape.
+
+    Uses the creditsUsed Firecrawl reports when present, else estimates
+    them: a search costs 2 credits per 10 results plus 1 per scraped result,
+    a scrape 1 credit plus 4 for JSON (LLM) extraction, a batch scrape 1 per
+    page. Credits are priced at FIRECRAWL_CREDIT_PRICE.
+
+    Args:
+        provider: firecrawl_search or firecrawl_scrape
+        data: Parsed v2 response ({"success", "data", ...}); for a batch
+              scrape, "data" is the list of scraped documents
+        shared: The response came from another analysis's in-flight call
+                (SingleFlight); it is added to this analysis's ledger as
+                coalesced, but not to process totals and /metrics again
+    """
+    body = data.get("data") if isinstance(data, dict) else None
+    credits = _reported_credits(data)
+    if provider == "firecrawl_search":
+        results = []
+        if isinstance(body, dict):
+            for kind in ("web", "news", "images"):
+                results.extend(body.get(kind) or [])
+        pages = sum(1 for item in results if isinstance(item, dict) and item.get("markdown"))
+        if credits is None:
+            credits = 2 * math.ceil(len(results) / 10) + pages
+        figures = {"search_results": len(results), "pages": pages}
+    elif isinstance(body, list):
+        # Batch scrape: one document per page
+        if credits is None:
+            credits = len(body)
+        figures = {"pages": len(body)}
+    else:
+        if credits is None:
+            credits = _reported_credits(body)
+        if credits is None:
+            credits = 1 + (4 if _field(body, "json") is not None else 0)
+        figures = {"pages": 1}
+    _record(provider, shared=shared, credits=credits, cost_usd=credits * config.FIRECRAWL_CREDIT_PRICE, **figures)
+
+
+def persist_on_close(ledger: UsageLedger):
+    """Save a closed ledger to the result store (off the event loop); replays are not stored."""
+    if ledger.replayed:
+        return
+
+    async def save():
+        try:
+            await get_result_store().asave_usage(
+                ledger.company_url, ledger.crunchbase_url, ledger.name, ledger.snapshot(), ledger.finished
+            )
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to persist analysis usage: {str(e)}")
+
+    task = asyncio.ensure_future(save())
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+def summarize_usage(rows: List[Dict], hours: float) -> Dict:
+    """
+    Spend over a window of stored analyses.
+
+    Args:
+        rows: Stored usage rows ({"name", "company_url", "usage", "created_at"}), newest first
+        hours: Window the rows cover (for the response)
+
+    Returns:
+        Dict with totals, per-agent and per-provider figures (with each agent's
+        share of cost, and its cost and time per analysis it ran in), cost per
+        analysis percentiles, daily totals and the most expensive analyses
+    """
+    total, agents, providers, days = _empty(), {}, {}, {}
+    costs = []
+    for row in rows:
+        usage = row["usage"]
+        _add(total, usage["total"])
+        for agent, figures in usage["agents"].items():
+            _add(agents.setdefault(agent, {**_empty(), "analyses": 0}), {**figures, "analyses": 1})
+        for provider, figures in usage["providers"].items():
+            _add(providers.setdefault(provider, _empty()), figures)
+        day = datetime.fromtimestamp(row["created_at"], tz=timezone.utc).date().isoformat()
+        _add(days.setdefault(day, {"analyses": 0, "cost_usd": 0.0}), {"analyses": 1, "cost_usd": usage["total"]["cost_usd"]})
+        costs.append(usage["total"]["cost_usd"])
+
+    count = len(rows)
+    total_cost = total["cost_usd"]
+    for figures in agents.values():
+        figures["cost_share"] = figures["cost_usd"] / total_cost if total_cost else 0.0
+        figures["cost_usd_per_analysis"] = figures["cost_usd"] / figures["analyses"]
+        # Only agents report their own wall-clock time (stages like collect_data don't)
+        if "elapsed_seconds" in figures:
+            figures["elapsed_seconds_per_analysis"] = figures.pop("elapsed_seconds") / figures["analyses"]
+    return {
+        "window_hours": hours,
+        "analyses": count,
+        "total": _rounded(total),
+        "cost_usd_per_analysis": {
+            "mean": round(total_cost / count, 6) if count else None,
+            "p50": _percentile(costs, 50),
+            "p95": _percentile(costs, 95),
+            "max": max(costs) if costs else None
+        },
+        "agents": {
+            agent: _rounded(figures)
+            for agent, figures in sorted(agents.items(), key=lambda item: -item[1]["cost_usd"])
+        },
+        "providers": {provider: _rounded(figures) for provider, figures in sorted(providers.items())},
+        "days": {day: _rounded(figures) for day, figures in sorted(days.items())},
+        "most_expensive": [
+            {
+                "name": row["name"],
+                "company_url": row["company_url"],
+                "cost_usd": row["usage"]["total"]["cost_usd"],
+                "analyzed_at": datetime.fromtimestamp(row["created_at"], tz=timezone.utc).isoformat()
+            }
+            for row in sorted(rows, key=lambda row: -row["usage"]["total"]["cost_usd"])[:5]
+        ]
+    }
+
+
+def get_process_usage() -> Dict:
+    """Provider usage since startup, including calls outside analyses but not replayed ones."""
+    return {
+        "since": datetime.fromtimestamp(_process_started, tz=timezone.utc).isoformat(),
+        "providers": {provider: _rounded(figures) for provider, figures in sorted(_process_totals.items())},
+        "prices": {
+            "firecrawl_credit_usd": config.FIRECRAWL_CREDIT_PRICE,
+            "llm_input_usd_per_million_tokens": config.LLM_INPUT_PRICES,
+            "llm_output_usd_per_million_tokens": config.LLM_OUTPUT_PRICES,
+            "llm_request_usd": config.LLM_REQUEST_PRICES
+        }
+    }
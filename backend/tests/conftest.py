@@ -0,0 +1,29 @@
+"""
+Test setup: the backend is imported as top-level modules (config, services, utils),
+and every file it would write (logs, caches, result store, cassettes, traces)
+goes to a temporary directory. Provider URLs point at an unroutable address so
+a test that forgets to stub a call fails instead of reaching the real APIs.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_workdir = tempfile.mkdtemp(prefix="investigate-tests-")
+for key, value in {
+    "FIRECRAWL_API_KEY": "test",
+    "PPLX_API_KEY": "test",
+    "FIRECRAWL_API_URL": "http://127.0.0.1:9",
+    "PPLX_API_BASE": "http://127.0.0.1:9",
+    "LOG_DIR": os.path.join(_workdir, "logs"),
+    "LOG_LEVEL": "WARNING",
+    "CACHE_DIR": os.path.join(_workdir, "cache"),
+    "CACHE_DISK_ENABLED": "false",
+    "RESULT_STORE_PATH": os.path.join(_workdir, "analyses.db"),
+    "CASSETTE_DIR": os.path.join(_workdir, "cassettes"),
+    "TRACE_EXPORTER": "none",
+}.items():
+    os.environ.setdefault(key, value)
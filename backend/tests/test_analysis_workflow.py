@@ -0,0 +1,51 @@
+import asyncio
+
+from agents.deep_market_research_agent import fallback_deep_market_research_result
+from analysis_workflows import analysis_workflow
+from analysis_workflows.analysis_workflow import CompanyAnalysisWorkflow
+
+
+def _workflow():
+    return CompanyAnalysisWorkflow(timeout=30, verbose=False)
+
+
+def test_failing_deep_research_gives_the_fallback_result(monkeypatch):
+    async def failing(data):
+        raise RuntimeError("sonar-pro down")
+
+    monkeypatch.setattr(analysis_workflow, "analyze_deep_market_research", failing)
+    result = asyncio.run(_workflow()._run_deep_research({"crunchbase": {"name": "Acme"}}))
+    assert result == fallback_deep_market_research_result()
+
+
+def test_synthesis_wait_survives_a_failed_or_cancelled_task():
+    async def failed():
+        raise RuntimeError("boom")
+
+    async def main(make_task):
+        workflow = _workflow()
+        workflow._deep_research = make_task()
+        await asyncio.sleep(0.01)
+        return await workflow._await_deep_research()
+
+    def cancelled():
+        task = asyncio.ensure_future(asyncio.sleep(10))
+        task.cancel()
+        return task
+
+    assert asyncio.run(main(lambda: asyncio.ensure_future(failed()))) == fallback_deep_market_research_result()
+    assert asyncio.run(main(cancelled)) == fallback_deep_market_research_result()
+
+
+def test_synthesis_does_not_wait_past_the_soft_deadline(monkeypatch):
+    monkeypatch.setattr(analysis_workflow.config, "DEEP_RESEARCH_SOFT_DEADLINE_SECONDS", 0.01)
+
+    async def main():
+        workflow = _workflow()
+        workflow._deep_research = asyncio.ensure_future(asyncio.sleep(10))
+        try:
+            return await workflow._await_deep_research()
+        finally:
+            workflow._deep_research.cancel()
+
+    assert asyncio.run(main()) is None
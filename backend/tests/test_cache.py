@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+from services.cache import TTLCache, make_cache_key
+
+
+def test_make_cache_key_ignores_dict_order():
+    assert make_cache_key({"a": 1, "b": 2}) == make_cache_key({"b": 2, "a": 1})
+    assert make_cache_key("x", 1) != make_cache_key("x", 2)
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = TTLCache("test_lru", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_kept_for_stale_reads_but_not_served_fresh():
+    cache = TTLCache("test_stale", max_entries=4, ttl_seconds=60)
+    cache.set("k", "v", ttl=0)
+    assert cache.get("k") is None
+    entry = cache.get_entry("k")
+    assert entry is not None and entry.value == "v" and not entry.is_fresh
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    TTLCache("test_disk", max_entries=4, ttl_seconds=60, disk_dir=str(tmp_path)).set("k", {"x": 1})
+    assert TTLCache("test_disk", max_entries=4, ttl_seconds=60, disk_dir=str(tmp_path)).get("k") == {"x": 1}
+
+
+def test_expired_disk_file_is_removed_on_read(tmp_path):
+    cache = TTLCache("test_disk_expiry", max_entries=4, ttl_seconds=60, disk_dir=str(tmp_path))
+    cache.set("k", "v", ttl=0.01)
+    path = cache._disk_path("k")
+    assert os.path.exists(path)
+    time.sleep(0.02)
+
+    fresh = TTLCache("test_disk_expiry", max_entries=4, ttl_seconds=60, disk_dir=str(tmp_path))
+    assert fresh.get_entry("k") is None
+    assert not os.path.exists(path)
+
+
+def test_sweep_prunes_expired_files_and_caps_the_disk_tier(tmp_path):
+    cache = TTLCache("test_disk_cap", max_entries=100, ttl_seconds=60, disk_dir=str(tmp_path), max_disk_entries=10)
+    for i in range(5):
+        cache.set(f"old{i}", i, ttl=0.01)
+    time.sleep(0.02)
+    for i in range(30):
+        cache.set(f"new{i}", i, ttl=60 + i)
+
+    assert cache.disk_entries() <= 10
+    assert not any(os.path.exists(cache._disk_path(f"old{i}")) for i in range(5))
+    # The longest-lived entries are the ones kept
+    assert os.path.exists(cache._disk_path("new29"))
+    assert cache.stats()["disk_pruned"] >= 25
+
+
+def test_async_methods_do_disk_io_in_a_thread(tmp_path, monkeypatch):
+    cache = TTLCache("test_disk_async", max_entries=4, ttl_seconds=60, disk_dir=str(tmp_path))
+    threads = []
+    real_to_thread = asyncio.to_thread
+
+    async def to_thread(fn, *args):
+        threads.append(fn.__name__)
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(asyncio, "to_thread", to_thread)
+
+    async def main():
+        await cache.aset("k", "v")
+        cache._entries.clear()  # force the next read to the disk tier
+        assert await cache.aget("k") == "v"
+        await cache.adelete("k")
+        assert await cache.aget("k") is None
+
+    asyncio.run(main())
+    assert threads == ["set", "get_entry", "delete", "get_entry"]
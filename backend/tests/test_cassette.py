@@ -0,0 +1,168 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from config import config
+from services.cassette import Cassette, CassetteMiss, CassetteTransport, cassette_path, cassette_scope, replayable
+
+COMPANY, CRUNCHBASE = "https://acme.com", "https://www.crunchbase.com/organization/acme"
+OTHER, OTHER_CRUNCHBASE = "https://globex.com", "https://www.crunchbase.com/organization/globex"
+
+
+@pytest.fixture
+def cassettes(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CASSETTE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "CASSETTE_TIME_SCALE", 0.0)
+    monkeypatch.setattr(config, "CASSETTE_MATCH", "exact")
+
+    def use(mode):
+        monkeypatch.setattr(config, "CASSETTE_MODE", mode)
+    return use
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=CassetteTransport(httpx.MockTransport(handler)))
+
+
+def _offline(request):
+    raise AssertionError(f"replay reached the network: {request.url}")
+
+
+def test_recorded_calls_replay_in_order_without_the_network(cassettes):
+    polls = iter(["scraping", "completed"])
+
+    def handler(request):
+        if request.method == "POST":
+            return httpx.Response(200, json={"id": "job1"})
+        return httpx.Response(200, json={"status": next(polls)})
+
+    async def calls(client):
+        with cassette_scope(COMPANY, CRUNCHBASE) as cassette:
+            started = (await client.post("http://fc/v2/batch/scrape", json={"urls": ["a"]})).json()
+            polled = [(await client.get("http://fc/v2/batch/scrape/job1")).json() for _ in range(2)]
+            await cassette.flush()
+            return [started] + polled
+
+    cassettes("record")
+    recorded = asyncio.run(calls(_client(handler)))
+    cassettes("replay")
+    replayed = asyncio.run(calls(_client(_offline)))
+
+    assert replayed == recorded == [{"id": "job1"}, {"status": "scraping"}, {"status": "completed"}]
+
+
+def test_recorded_transport_errors_are_raised_again(cassettes):
+    def handler(request):
+        raise httpx.ConnectTimeout("connect timed out", request=request)
+
+    async def call(client):
+        with cassette_scope(COMPANY, CRUNCHBASE) as cassette:
+            try:
+                await client.post("http://pplx/chat/completions", json={"model": "sonar"})
+            finally:
+                await cassette.flush()
+
+    cassettes("record")
+    with pytest.raises(httpx.ConnectTimeout):
+        asyncio.run(call(_client(handler)))
+    cassettes("replay")
+    with pytest.raises(httpx.ConnectTimeout):
+        asyncio.run(call(_client(_offline)))
+
+
+def test_unrecorded_call_misses_on_replay(cassettes):
+    async def call():
+        with cassette_scope(COMPANY, CRUNCHBASE):
+            await _client(_offline).post("http://fc/v2/search", json={"query": "never recorded"})
+
+    cassettes("replay")
+    with pytest.raises(CassetteMiss):
+        asyncio.run(call())
+
+
+def test_replayable_sdk_calls_return_the_serialized_result(cassettes):
+    async def sdk_call():
+        return {"json": {"company_name": "Acme"}}
+
+    async def call(make_call):
+        with cassette_scope(COMPANY, CRUNCHBASE) as cassette:
+            result = await replayable("firecrawl_sdk_scrape", {"url": CRUNCHBASE}, make_call)
+            await cassette.flush()
+            return result
+
+    async def offline():
+        raise AssertionError("replay made the SDK call")
+
+    cassettes("record")
+    assert asyncio.run(call(sdk_call)) == {"json": {"company_name": "Acme"}}
+    cassettes("replay")
+    assert asyncio.run(call(offline)) == {"json": {"company_name": "Acme"}}
+
+
+def test_calls_outside_a_cassette_pass_through(cassettes):
+    cassettes("off")
+
+    async def call():
+        with cassette_scope(COMPANY, CRUNCHBASE) as cassette:
+            assert cassette is None
+            return (await _client(lambda request: httpx.Response(200, json={"ok": True})).get("http://fc/x")).json()
+
+    assert asyncio.run(call()) == {"ok": True}
+
+
+def test_shared_calls_are_recorded_in_every_cassette_in_scope(cassettes, monkeypatch):
+    from services import firecrawl
+
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"success": True, "data": {"web": []}})
+
+    payload = {"query": "robotics funding", "limit": 5}
+
+    async def analysis(company_url, crunchbase_url):
+        with cassette_scope(company_url, crunchbase_url) as cassette:
+            result = await firecrawl.firecrawl_search(payload)
+            await cassette.flush()
+            return result
+
+    async def both():
+        return await asyncio.gather(analysis(COMPANY, CRUNCHBASE), analysis(OTHER, OTHER_CRUNCHBASE))
+
+    client = _client(handler)
+    monkeypatch.setattr(firecrawl, "get_http_client", lambda: client)
+    cassettes("record")
+    recorded = asyncio.run(both())
+    assert len(requests) == 1
+
+    # The analysis that joined the call replays it from its own cassette
+    client = _client(_offline)
+    cassettes("replay")
+    assert asyncio.run(analysis(OTHER, OTHER_CRUNCHBASE)) == recorded[1]
+
+
+def test_entries_are_written_off_the_event_loop(cassettes, monkeypatch):
+    threads = []
+    write_lines = Cassette._write_lines
+
+    def tracked(self):
+        threads.append(threading.get_ident())
+        write_lines(self)
+
+    monkeypatch.setattr(Cassette, "_write_lines", tracked)
+
+    async def record():
+        with cassette_scope(COMPANY, CRUNCHBASE) as cassette:
+            for index in range(3):
+                cassette.add({"key": str(index), "route": "x::", "status": 200, "body": index, "elapsed": 0})
+            await cassette.flush()
+
+    cassettes("record")
+    asyncio.run(record())
+    assert threads and threading.get_ident() not in threads
+    replay = Cassette.load(cassette_path(COMPANY, CRUNCHBASE), "Acme")
+    assert [entry["body"] for entry in replay.entries] == [0, 1, 2]
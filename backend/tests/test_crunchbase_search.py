@@ -0,0 +1,28 @@
+import asyncio
+
+from services import crunchbase_scraper
+
+
+def test_search_sends_the_query_as_typed_but_caches_and_coalesces_by_normalized_form(monkeypatch):
+    queries = []
+
+    async def fake_search(payload, timeout=None):
+        queries.append(payload["query"])
+        await asyncio.sleep(0.01)
+        return {"success": True, "data": {"web": [
+            {"url": "https://www.crunchbase.com/organization/openai", "title": "OpenAI - Crunchbase Company Profile", "description": "AI"}
+        ]}}
+
+    monkeypatch.setattr(crunchbase_scraper, "firecrawl_search", fake_search)
+
+    async def main():
+        first = await asyncio.gather(
+            crunchbase_scraper.search_crunchbase_async("OpenAI Inc", limit=3),
+            crunchbase_scraper.search_crunchbase_async("  openai   inc ", limit=3)
+        )
+        cached = await crunchbase_scraper.search_crunchbase_async("OPENAI INC", limit=3)
+        return first, cached
+
+    (first, second), cached = asyncio.run(main())
+    assert queries == ["site:crunchbase.com OpenAI Inc"]
+    assert first == second == cached and len(first) == 1
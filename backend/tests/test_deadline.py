@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.deadline import Deadline, DeadlineExceeded, call_timeout, current_deadline, deadline_scope
+
+
+def test_child_is_never_later_than_its_parent():
+    parent = Deadline(10)
+    assert parent.child("stage", seconds=60).expires_at == parent.expires_at
+    assert parent.child("stage", seconds=1).remaining() <= 1
+    assert parent.child("stage", reserve=4).remaining() <= 6
+
+
+def test_call_timeout_is_capped_by_the_deadline_in_scope():
+    assert call_timeout(30) == 30
+    with deadline_scope(Deadline(2, name="traction")):
+        assert call_timeout(30) <= 2
+        assert call_timeout(1) == 1
+    assert current_deadline() is None
+
+
+def test_call_timeout_raises_once_the_deadline_has_passed():
+    with deadline_scope(Deadline(0, name="synthesis")):
+        time.sleep(0.001)
+        with pytest.raises(DeadlineExceeded, match="synthesis"):
+            call_timeout(30)
+
+
+def test_deadline_propagates_to_created_tasks_only_within_scope():
+    async def seen():
+        deadline = current_deadline()
+        return deadline.name if deadline is not None else None
+
+    async def main():
+        with deadline_scope(Deadline(5, name="market")):
+            inside = asyncio.create_task(seen())
+        outside = asyncio.create_task(seen())
+        return await inside, await outside
+
+    assert asyncio.run(main()) == ("market", None)
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.hedging import get_hedging_stats, run_hedged
+
+
+def _path(result, seconds, calls, name):
+    async def run():
+        calls.append(name)
+        await asyncio.sleep(seconds)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return run
+
+
+def test_delayed_mode_does_not_hedge_a_fast_primary():
+    calls = []
+    result = asyncio.run(run_hedged(
+        "test_fast_primary", _path("primary", 0.01, calls, "primary"), _path("fallback", 0, calls, "fallback"),
+        mode="delayed", delay=0.5
+    ))
+    assert result == "primary"
+    assert calls == ["primary"]
+    assert get_hedging_stats()["agents"]["test_fast_primary"]["hedges_started"] == 0
+
+
+def test_delayed_mode_starts_fallback_after_threshold():
+    calls = []
+    start = time.perf_counter()
+    result = asyncio.run(run_hedged(
+        "test_slow_primary", _path("primary", 1, calls, "primary"), _path("fallback", 0.01, calls, "fallback"),
+        mode="delayed", delay=0.05
+    ))
+    assert result == "fallback"
+    assert calls == ["primary", "fallback"]
+    assert time.perf_counter() - start < 0.5
+    stats = get_hedging_stats()["agents"]["test_slow_primary"]
+    assert stats["hedges_started"] == 1 and stats["fallback_wins"] == 1 and stats["primary_cancelled"] == 1
+    assert stats["p50_seconds"] is not None and stats["p99_seconds"] is not None
+
+
+def test_delayed_mode_falls_back_at_once_when_primary_fails():
+    calls = []
+    result = asyncio.run(run_hedged(
+        "test_failed_primary", _path(ValueError("bad json"), 0, calls, "primary"),
+        _path("fallback", 0, calls, "fallback"), mode="delayed", delay=10
+    ))
+    assert result == "fallback"
+    assert get_hedging_stats()["agents"]["test_failed_primary"]["primary_failures"] == 1
+
+
+def test_parallel_mode_takes_the_first_answer():
+    calls = []
+    result = asyncio.run(run_hedged(
+        "test_parallel", _path("primary", 1, calls, "primary"), _path("fallback", 0.01, calls, "fallback"),
+        mode="parallel"
+    ))
+    assert result == "fallback"
+    assert sorted(calls) == ["fallback", "primary"]
+
+
+def test_all_paths_failing_raises_the_fallback_error():
+    with pytest.raises(RuntimeError, match="fallback down"):
+        asyncio.run(run_hedged(
+            "test_all_failed", _path(ValueError("primary down"), 0, [], "primary"),
+            _path(RuntimeError("fallback down"), 0, [], "fallback"), mode="parallel"
+        ))
+    assert get_hedging_stats()["agents"]["test_all_failed"]["all_failed"] == 1
+
+
+def test_winner_is_returned_without_waiting_for_the_loser_to_unwind():
+    unwound = []
+
+    async def slow_to_cancel():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.3)
+            unwound.append(1)
+            raise
+
+    async def main():
+        start = time.perf_counter()
+        result = await run_hedged("test_unwind", slow_to_cancel, _path("fallback", 0.01, [], "fallback"), mode="parallel")
+        elapsed = time.perf_counter() - start
+        assert not unwound
+        await asyncio.sleep(0.4)
+        assert unwound == [1]
+        return result, elapsed
+
+    result, elapsed = asyncio.run(main())
+    assert result == "fallback"
+    assert elapsed < 0.2
@@ -0,0 +1,68 @@
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from utils.json_extract import (
+    IncrementalJsonParser, JsonExtractionError, extract_json, get_json_extract_stats, repair_json
+)
+
+
+class _Team(BaseModel):
+    founders: List[str]
+    summary: str = ""
+    size: Optional[int] = None
+
+
+def test_object_is_found_inside_prose_and_fences():
+    text = 'Here is the analysis:\n```json\n{"founders": ["Ada"], "summary": "ok"}\n```\nHope this helps!'
+    assert extract_json(text, _Team) == {"founders": ["Ada"], "summary": "ok", "size": None}
+
+
+def test_common_llm_mistakes_are_repaired():
+    assert repair_json('{"a": True, "b": None, "c": [1, 2,],}') == '{"a": true, "b": null, "c": [1, 2]}'
+    # Curly quotes as delimiters are fixed, inside strings they are kept
+    value = extract_json('{“summary”: “the “best” team”, "founders": []}', agent="test_repair")
+    assert value == {"summary": "the “best” team", "founders": []}
+    assert get_json_extract_stats()["test_repair"]["repaired"] == 1
+
+
+def test_repair_leaves_literals_inside_strings_alone():
+    assert extract_json('{"founders": ["None, True"], "summary": "a, }",}', _Team)["founders"] == ["None, True"]
+
+
+def test_first_object_matching_the_model_wins():
+    text = '{"note": "draft"} then {"founders": ["Ada"]}'
+    assert extract_json(text, _Team)["founders"] == ["Ada"]
+
+
+def test_truncated_response_keeps_only_complete_members():
+    text = '{"founders": ["Ada", "Grace"], "size": 12, "summary": "Strong tech'
+    # The cut-off summary is dropped rather than accepted as if complete
+    assert extract_json(text, _Team) == {"founders": ["Ada", "Grace"], "size": 12, "summary": ""}
+
+
+def test_truncated_response_missing_required_fields_is_rejected():
+    with pytest.raises(JsonExtractionError):
+        extract_json('{"summary": "Strong team", "founders": ["Ad', _Team)
+
+
+def test_no_json_raises():
+    with pytest.raises(JsonExtractionError, match="No JSON object"):
+        extract_json("I could not find any information.", agent="test_none")
+    assert get_json_extract_stats()["test_none"]["failed"] == 1
+
+
+def test_incremental_parser_returns_the_object_once_it_closes():
+    parser = IncrementalJsonParser(_Team)
+    chunks = ['Sure! {"found', 'ers": ["Ada"], "summary": "a } in', ' a string"}', " Let me know"]
+    assert [parser.feed(chunk) for chunk in chunks[:2]] == [None, None]
+    assert parser.feed(chunks[2]) == {"founders": ["Ada"], "summary": "a } in a string", "size": None}
+    assert parser.complete and parser.feed(chunks[3]) is None
+
+
+def test_incremental_parser_drops_a_string_cut_off_when_the_stream_ends():
+    parser = IncrementalJsonParser(_Team)
+    for chunk in ['{"founders": ["Ada"], ', '"size": 3, "summary": "Strong te']:
+        assert parser.feed(chunk) is None
+    assert parser.result() == {"founders": ["Ada"], "size": 3, "summary": ""}
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from services.llm import PooledPerplexity
+from utils.deadline import DeadlineExceeded
+
+
+def _llm():
+    return PooledPerplexity(api_key="test", api_base="http://127.0.0.1:9", model="sonar", max_retries=3)
+
+
+def test_cancelled_call_is_not_retried(monkeypatch):
+    attempts = []
+
+    async def slow(self, prompt, attempt=1, **kwargs):
+        attempts.append(attempt)
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(PooledPerplexity, "_acomplete", slow)
+
+    async def main():
+        task = asyncio.create_task(_llm().acomplete("hello"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.sleep(0.1)
+        assert task.cancelled()
+
+    asyncio.run(main())
+    assert attempts == [1]
+
+
+def test_failures_are_retried_but_not_past_the_deadline(monkeypatch):
+    attempts = []
+
+    async def failing(self, prompt, attempt=1, **kwargs):
+        attempts.append(attempt)
+        raise DeadlineExceeded("traction deadline exceeded")
+
+    monkeypatch.setattr(PooledPerplexity, "_acomplete", failing)
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(_llm().acomplete("hello"))
+    assert attempts == [1]
@@ -0,0 +1,41 @@
+import httpx
+
+from utils.metrics import Counter, Histogram, provider_status, render_metrics
+
+
+def test_counter_renders_labels_escaped():
+    counter = Counter("test_requests_total", "Requests", ["route"])
+    counter.inc(route='/api/"x"')
+    counter.inc(2, route='/api/"x"')
+    assert counter.render() == [
+        "# HELP test_requests_total Requests",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/api/\\"x\\""} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_and_upper_inclusive():
+    histogram = Histogram("test_duration_seconds", "Duration", ["stage"], buckets=(1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value, stage="synthesize")
+    assert histogram.render()[2:] == [
+        'test_duration_seconds_bucket{stage="synthesize",le="1"} 2',
+        'test_duration_seconds_bucket{stage="synthesize",le="5"} 3',
+        'test_duration_seconds_bucket{stage="synthesize",le="+Inf"} 4',
+        'test_duration_seconds_sum{stage="synthesize"} 14.5',
+        'test_duration_seconds_count{stage="synthesize"} 4',
+    ]
+
+
+def test_render_metrics_includes_every_registered_family():
+    Counter("test_unlabelled_total", "Unlabelled").inc()
+    text = render_metrics()
+    assert text.endswith("\n")
+    assert "test_unlabelled_total 1\n" in text
+    assert "# TYPE investigate_agent_fallbacks_total counter" in text
+
+
+def test_provider_status_labels():
+    assert provider_status(429) == "429"
+    assert provider_status(error=httpx.ReadTimeout("slow")) == "timeout"
+    assert provider_status(error=ConnectionError("reset")) == "error"
@@ -0,0 +1,38 @@
+import time
+
+from services.result_store import ResultStore
+
+
+def _pending_result(name="Acme"):
+    return {"name": name, "deep_market_research": None, "deep_market_research_pending": True}
+
+
+def test_save_and_get_normalize_urls(tmp_path):
+    store = ResultStore(str(tmp_path / "a.db"))
+    store.save("https://www.acme.com/", "https://crunchbase.com/organization/acme", {"name": "Acme"})
+    stored = store.get("https://acme.com", "https://www.crunchbase.com/organization/acme/")
+    assert stored is not None and stored.result == {"name": "Acme"}
+
+
+def test_merge_deep_research_keeps_created_at(tmp_path):
+    store = ResultStore(str(tmp_path / "a.db"))
+    saved = store.save("https://acme.com", "https://crunchbase.com/organization/acme", _pending_result())
+    time.sleep(0.01)
+
+    merged = store.merge_deep_research("https://acme.com", "https://crunchbase.com/organization/acme", {"sources": []})
+
+    assert merged is not None
+    stored = store.get("https://acme.com", "https://crunchbase.com/organization/acme")
+    assert stored.created_at == saved.created_at
+    assert stored.result["deep_market_research"] == {"sources": []}
+    assert stored.result["deep_market_research_pending"] is False
+    assert [row.created_at for row in store.list()] == [saved.created_at]
+
+
+def test_merge_deep_research_ignores_analyses_not_pending(tmp_path):
+    store = ResultStore(str(tmp_path / "a.db"))
+    assert store.merge_deep_research("https://acme.com", "https://cb.com/acme", {}) is None
+
+    store.save("https://acme.com", "https://cb.com/acme", {"name": "Acme", "deep_market_research_pending": False})
+    assert store.merge_deep_research("https://acme.com", "https://cb.com/acme", {"sources": []}) is None
+    assert "deep_market_research" not in store.get("https://acme.com", "https://cb.com/acme").result
@@ -0,0 +1,71 @@
+import asyncio
+
+import httpx
+
+from services import firecrawl, retrieval
+
+
+def _search(urls):
+    return {"success": True, "data": {"web": [{"url": url, "description": f"snippet {url}"} for url in urls]}}
+
+
+def test_results_are_deduplicated_and_scraped_once_in_one_batch(monkeypatch):
+    searches = {
+        "traction": ["https://acme.com/a", "https://www.acme.com/b/", "https://news.com/1"],
+        "team": ["https://acme.com/a?utm_source=x", "https://acme.com/team"],
+        "market": ["https://acme.com/b", "https://market.com/report"],
+    }
+    batches = []
+
+    async def fake_search(payload, timeout=None):
+        agent = next(agent for agent in searches if payload["query"] == retrieval.AGENT_SEARCHES[agent]["query"].format(company_name="Acme"))
+        return _search(searches[agent])
+
+    async def fake_batch_scrape(payload, timeout=None):
+        batches.append(payload["urls"])
+        return {"status": "completed", "data": [
+            {"markdown": f"page {url}", "metadata": {"sourceURL": url, "statusCode": 200}}
+            for url in payload["urls"] if "market.com" not in url
+        ] + [{"markdown": "", "metadata": {"sourceURL": "https://market.com/report", "statusCode": 404}}]}
+
+    monkeypatch.setattr(retrieval, "firecrawl_search", fake_search)
+    monkeypatch.setattr(retrieval, "firecrawl_batch_scrape", fake_batch_scrape)
+
+    sources = asyncio.run(retrieval.retrieve_sources("Acme", agents=list(searches), max_pages=10))
+
+    assert len(batches) == 1
+    assert sorted(retrieval.normalize_url(url) for url in batches[0]) == sorted({
+        "https://acme.com/a", "https://acme.com/b", "https://news.com/1", "https://acme.com/team", "https://market.com/report"
+    })
+    # Scraped pages first, a failed page keeps its search snippet
+    assert [page["markdown"] for page in sources["market"]] == ["page https://www.acme.com/b/", "snippet https://market.com/report"]
+    assert [page["url"] for page in sources["team"]] == ["https://acme.com/a", "https://acme.com/team"]
+
+
+def test_page_cap_keeps_each_agents_best_results():
+    ranked = {"traction": ["a", "b", "c"], "team": ["a", "d"], "market": ["e", "f"]}
+    assert retrieval._pages_to_scrape(ranked, 4) == ["a", "e", "b", "d"]
+
+
+def test_batch_scrape_polls_until_the_job_completes(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        if request.method == "POST":
+            return httpx.Response(200, json={"success": True, "id": "job1"})
+        if len([r for r in requests if r[0] == "GET"]) == 1:
+            return httpx.Response(200, json={"status": "scraping", "total": 2, "completed": 1, "data": []})
+        return httpx.Response(200, json={"status": "completed", "total": 2, "creditsUsed": 2, "data": [
+            {"markdown": "one", "metadata": {"sourceURL": "https://a.com"}},
+            {"markdown": "two", "metadata": {"sourceURL": "https://b.com"}}
+        ]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(firecrawl, "get_http_client", lambda: client)
+
+    result = asyncio.run(firecrawl.firecrawl_batch_scrape({"urls": ["https://a.com", "https://b.com"]}, poll_interval=0))
+
+    assert [document["markdown"] for document in result["data"]] == ["one", "two"]
+    assert result["creditsUsed"] == 2
+    assert requests == [("POST", "/v2/batch/scrape"), ("GET", "/v2/batch/scrape/job1"), ("GET", "/v2/batch/scrape/job1")]
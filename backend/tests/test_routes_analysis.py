@@ -0,0 +1,79 @@
+import asyncio
+import json
+
+import pytest
+
+from api import routes
+from models.schemas import AnalysisDiagnostics, AnalysisResult, AnalyzeRequest, UsageFigures
+from utils.deadline import Deadline, DeadlineExceeded
+
+
+def _request():
+    return AnalyzeRequest(company_url="https://acme.com", crunchbase_url="https://www.crunchbase.com/organization/acme")
+
+
+@pytest.fixture
+def slow_run(monkeypatch):
+    runs = []
+
+    async def run(request, deadline=None):
+        runs.append(request)
+        await asyncio.sleep(0.1)
+        return AnalysisResult.model_construct(
+            name="Acme", diagnostics=AnalysisDiagnostics(total=UsageFigures(calls=3), elapsed_seconds=0.1)
+        )
+
+    monkeypatch.setattr(routes, "_run_analysis", run)
+    return runs
+
+
+def test_requests_joining_a_run_get_coalesced_diagnostics(slow_run):
+    async def main():
+        return await asyncio.gather(routes._run_analysis_shared(_request()), routes._run_analysis_shared(_request()))
+
+    leader, follower = asyncio.run(main())
+    assert len(slow_run) == 1
+    assert leader.diagnostics.coalesced is False
+    assert follower.diagnostics.coalesced is True
+    assert follower.diagnostics.total.calls == 3
+
+
+def test_joining_request_waits_only_until_its_own_deadline(slow_run):
+    async def main():
+        leader = asyncio.create_task(routes._run_analysis_shared(_request()))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await routes._run_analysis_shared(_request(), Deadline(0.02))
+        return await leader
+
+    assert asyncio.run(main()).name == "Acme"
+    assert len(slow_run) == 1
+
+
+def test_batch_takes_start_tokens_only_for_new_runs(slow_run, monkeypatch):
+    acquired = []
+
+    async def acquire(self, tokens=1):
+        acquired.append(tokens)
+
+    async def load_stored(request):
+        if "stored" in request.company_url:
+            return AnalysisResult.model_construct(name="Stored", diagnostics=None)
+        return None
+
+    monkeypatch.setattr(routes.TokenBucket, "acquire", acquire)
+    monkeypatch.setattr(routes, "_load_stored_analysis", load_stored)
+    monkeypatch.setattr(routes, "_with_diagnostics", lambda request, analysis: analysis)
+    companies = [
+        {"company_url": "https://acme.com", "crunchbase_url": "https://www.crunchbase.com/organization/acme"},
+        {"company_url": "https://acme.com/", "crunchbase_url": "https://www.crunchbase.com/organization/acme"},
+        {"company_url": "https://stored.com", "crunchbase_url": "https://www.crunchbase.com/organization/stored"},
+    ]
+
+    async def main():
+        return [json.loads(line) async for line in routes._stream_batch(routes.BatchAnalyzeRequest(companies=companies))]
+
+    lines = asyncio.run(main())
+    assert len(slow_run) == 1
+    assert acquired == [1]
+    assert lines[-1]["unique"] == 2 and lines[-1]["succeeded"] == 3
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from utils.deadline import Deadline, DeadlineExceeded, deadline_scope
+from utils.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight("test_share")
+    calls = []
+    shared = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*[flights.do("k", work, on_shared=shared.append) for _ in range(3)])
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert len(calls) == 1
+    # Only the two followers account for the shared result
+    assert shared == ["result", "result"]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "followers": 2}
+
+
+def test_follower_gives_up_at_its_own_deadline():
+    flights = SingleFlight("test_deadline")
+
+    async def work():
+        await asyncio.sleep(0.2)
+        return "result"
+
+    async def follower():
+        with deadline_scope(Deadline(0.05, name="follower")):
+            return await flights.do("k", work)
+
+    async def main():
+        leader = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await follower()
+        # The leader keeps waiting on the call the follower left
+        return await leader
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_shared_call_is_cancelled_only_when_every_waiter_is_gone():
+    flights = SingleFlight("test_cancel")
+    cancelled = []
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+
+    async def main():
+        first = asyncio.create_task(flights.do("k", work))
+        second = asyncio.create_task(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0.01)
+        assert not cancelled
+        second.cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled == [1]
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(main())
+
+
+def test_failure_is_shared_and_forgotten():
+    flights = SingleFlight("test_failure")
+    calls = []
+
+    async def failing():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        results = await asyncio.gather(flights.do("k", failing), flights.do("k", failing), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        # A later call starts a new attempt instead of reusing the failure
+        with pytest.raises(ValueError):
+            await flights.do("k", failing)
+
+    asyncio.run(main())
+    assert len(calls) == 2
@@ -0,0 +1,29 @@
+import pytest
+
+from utils.urls import company_name_from_urls, normalize_url
+
+
+def test_normalize_url_drops_www_tracking_and_trailing_slash():
+    assert normalize_url("HTTPS://www.Acme.com/about/?utm_source=x&b=2&a=1#team") == "https://acme.com/about?a=1&b=2"
+    assert normalize_url("acme.com") == "https://acme.com"
+
+
+def test_crunchbase_slug_is_preferred():
+    assert company_name_from_urls("https://acme.io", "https://www.crunchbase.com/organization/acme-robotics") == "Acme Robotics"
+
+
+@pytest.mark.parametrize("url, name", [
+    ("https://acme.io", "Acme"),
+    ("https://app.acme.io", "Acme"),
+    ("https://acme.co.uk", "Acme"),
+    ("https://www.acme.com.au/", "Acme"),
+    ("https://app.xyz.ai", "Xyz"),
+    ("https://get.abc.io", "Abc"),
+    ("https://deep-mind.co", "Deep Mind"),
+])
+def test_name_from_domain(url, name):
+    assert company_name_from_urls(url) == name
+
+
+def test_unknown_company_without_a_usable_url():
+    assert company_name_from_urls("", "") == "Unknown Company"
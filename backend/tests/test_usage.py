@@ -0,0 +1,107 @@
+import pytest
+
+from config import config
+from services.usage import (
+    UsageLedger, get_process_usage, record_call, record_firecrawl_usage, record_llm_usage, summarize_usage, usage_scope
+)
+from utils.deadline import Deadline, deadline_scope
+from utils.metrics import PROVIDER_COST
+
+
+def _ledger(**kwargs):
+    return UsageLedger("https://acme.com", "https://cb.com/acme", name="Acme", **kwargs)
+
+
+def _search_response(results, scraped=0):
+    return {"success": True, "data": {"web": [
+        {"url": f"https://example.com/{i}", **({"markdown": "page"} if i < scraped else {})} for i in range(results)
+    ]}}
+
+
+def _cost_counter(provider, agent):
+    return PROVIDER_COST._values.get(PROVIDER_COST._key({"provider": provider, "agent": agent}), 0)
+
+
+def test_calls_are_attributed_to_the_agent_whose_deadline_is_in_scope():
+    ledger = _ledger()
+    with usage_scope(ledger):
+        with deadline_scope(Deadline(60, name="team")):
+            record_call("sonar", 1.5)
+            record_llm_usage("sonar", {"usage": {"prompt_tokens": 1000, "completion_tokens": 200, "cost": {"total_cost": 0.01}}})
+        record_call("firecrawl_search", 0.5, failed=True)
+
+    snapshot = ledger.snapshot()
+    assert snapshot["agents"]["team"]["prompt_tokens"] == 1000
+    assert snapshot["agents"]["team"]["cost_usd"] == 0.01
+    assert snapshot["agents"]["other"]["errors"] == 1
+    assert snapshot["total"]["calls"] == 2 and snapshot["complete"] is False
+    ledger.close()
+    assert ledger.snapshot()["complete"] is True
+
+
+def test_llm_cost_is_estimated_from_prices_when_not_reported(monkeypatch):
+    monkeypatch.setattr(config, "LLM_INPUT_PRICES", {"sonar_pro": 3.0})
+    monkeypatch.setattr(config, "LLM_OUTPUT_PRICES", {"sonar_pro": 15.0})
+    monkeypatch.setattr(config, "LLM_REQUEST_PRICES", {"sonar_pro": 0.006})
+    ledger = _ledger()
+    with usage_scope(ledger):
+        record_llm_usage("sonar_pro", {"usage": {"prompt_tokens": 1_000_000, "completion_tokens": 100_000}})
+    assert ledger.snapshot()["total"]["cost_usd"] == pytest.approx(3.0 + 1.5 + 0.006)
+
+
+@pytest.mark.parametrize("provider, response, pages, credits", [
+    ("firecrawl_search", _search_response(12, scraped=3), 3, 2 * 2 + 3),
+    ("firecrawl_search", {**_search_response(5), "creditsUsed": 9}, 0, 9),
+    ("firecrawl_scrape", {"data": {"json": {"company_name": "Acme"}}}, 1, 5),
+    ("firecrawl_scrape", {"data": {"markdown": "page"}}, 1, 1),
+    ("firecrawl_scrape", {"status": "completed", "data": [{"markdown": "a"}, {"markdown": "b"}]}, 2, 2),
+])
+def test_firecrawl_credits_are_reported_or_estimated(provider, response, pages, credits):
+    ledger = _ledger()
+    with usage_scope(ledger):
+        record_firecrawl_usage(provider, response)
+    total = ledger.snapshot()["total"]
+    assert total["pages"] == pages and total["credits"] == credits
+    assert total["cost_usd"] == pytest.approx(credits * config.FIRECRAWL_CREDIT_PRICE)
+
+
+def test_shared_results_count_in_the_ledger_but_not_process_totals():
+    ledger = _ledger()
+    before = get_process_usage()["providers"].get("firecrawl_search", {}).get("credits", 0)
+
+    with usage_scope(ledger), deadline_scope(Deadline(60, name="traction")):
+        record_firecrawl_usage("firecrawl_search", _search_response(5), shared=True)
+
+    figures = ledger.snapshot()["agents"]["traction"]
+    assert figures["coalesced"] == 1 and figures["credits"] == 2
+    assert get_process_usage()["providers"].get("firecrawl_search", {}).get("credits", 0) == before
+
+
+def test_replayed_analyses_stay_out_of_the_spend_metrics():
+    ledger = _ledger(replayed=True)
+    before = _cost_counter("sonar", "market")
+    process_before = get_process_usage()["providers"].get("sonar", {}).get("cost_usd", 0)
+    with usage_scope(ledger), deadline_scope(Deadline(60, name="market")):
+        record_llm_usage("sonar", {"usage": {"prompt_tokens": 10, "completion_tokens": 10, "cost": {"total_cost": 0.5}}})
+    assert ledger.snapshot()["total"]["cost_usd"] == 0.5
+    assert _cost_counter("sonar", "market") == before
+    assert get_process_usage()["providers"].get("sonar", {}).get("cost_usd", 0) == process_before
+
+
+def test_summarize_usage_over_stored_analyses():
+    def row(name, cost, created_at):
+        figures = {"calls": 2, "cost_usd": cost}
+        return {
+            "name": name, "company_url": f"https://{name}.com", "created_at": created_at,
+            "usage": {"total": figures, "agents": {"synthesis": figures}, "providers": {"sonar": figures}}
+        }
+
+    summary = summarize_usage([row("b", 0.03, 86400 * 2), row("a", 0.01, 86400)], hours=72)
+
+    assert summary["analyses"] == 2
+    assert summary["total"]["cost_usd"] == 0.04
+    assert summary["cost_usd_per_analysis"]["mean"] == 0.02
+    assert summary["agents"]["synthesis"]["cost_share"] == 1.0
+    assert summary["agents"]["synthesis"]["cost_usd_per_analysis"] == 0.02
+    assert list(summary["days"]) == ["1970-01-02", "1970-01-03"]
+    assert summary["most_expensive"][0]["name"] == "b"
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+import asyncio
+import time
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised when a call is about to start after its deadline has passed"""
+    pass
+
+
+class Deadline:
+    """
+    Absolute point in time by which a piece of work must finish.
+
+    One Deadline is created per analysis and narrowed per stage and agent with
+    child(); outbound calls size their timeouts from the remaining time of the
+    deadline in scope (see call_timeout) instead of a fixed number.
+    """
+
+    def __init__(self, seconds: float, name: str = "analysis", expires_at: Optional[float] = None):
+        self.name = name
+        self.expires_at = expires_at if expires_at is not None else time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def child(self, name: str, seconds: Optional[float] = None, reserve: float = 0.0) -> "Deadline":
+        """
+        Narrower deadline for a stage or agent.
+
+        Args:
+            name: Stage or agent name (for logs)
+            seconds: Budget from now (default: whatever this deadline has left)
+            reserve: Seconds of this deadline to hold back for later stages
+
+        Returns:
+            Deadline expiring at the earliest of now + seconds and this deadline minus reserve
+        """
+        expires_at = self.expires_at - reserve
+        if seconds is not None:
+            expires_at = min(expires_at, time.monotonic() + seconds)
+        return Deadline(0, name=name, expires_at=expires_at)
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """
+        Timeout for the next call: the remaining time, capped at `default`.
+
+        Args:
+            default: The call's usual timeout in seconds
+
+        Returns:
+            Seconds to allow the call
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name} deadline exceeded")
+        return remaining if default is None else min(default, remaining)
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.name!r}, remaining={self.remaining():.2f}s)"
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline in scope for the running task, if any."""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """
+    Make `deadline` the current deadline for this task and the tasks it creates.
+
+    Args:
+        deadline: Deadline to put in scope (None clears it)
+    """
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def call_timeout(default: float) -> float:
+    """
+    Timeout for an outbound call: `default`, shortened to the current deadline.
+
+    Args:
+        default: The call's configured timeout in seconds
+
+    Returns:
+        Seconds to allow the call
+
+    Raises:
+        DeadlineExceeded: If the current deadline has already passed
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
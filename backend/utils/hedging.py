@@ -0,0 +1,201 @@
+from typing import Awaitable, Callable, Dict, Optional, Set, TypeVar
+from config import config
+from utils.logger import setup_logger
+from utils.metrics import AGENT_FALLBACKS, AGENT_PATH_DURATION
+from utils.stats import LatencyStats
+from utils.tracing import current_span, span
+import asyncio
+import time
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class _AgentHedgeStats:
+    """Latency and outcome counters for one agent's primary/fallback paths"""
+
+    def __init__(self):
+        self.primary = LatencyStats()
+        self.fallback = LatencyStats()
+        self.total = LatencyStats()
+        self.counters = {
+            "primary_wins": 0,
+            "fallback_wins": 0,
+            "primary_failures": 0,
+            "fallback_failures": 0,
+            "hedges_started": 0,
+            "all_failed": 0,
+            # Losing paths cancelled mid-flight: their latency is not in the
+            # percentiles, so a high count means the primary p99 understates it
+            "primary_cancelled": 0,
+            "fallback_cancelled": 0
+        }
+
+    def snapshot(self) -> Dict:
+        p50 = self.total.percentile(50)
+        p99 = self.total.percentile(99)
+        return {
+            # Agent latency (winning path, including any hedge delay)
+            "p50_seconds": round(p50, 4) if p50 is not None else None,
+            "p99_seconds": round(p99, 4) if p99 is not None else None,
+            **self.counters,
+            "primary": self.primary.snapshot(),
+            "fallback": self.fallback.snapshot(),
+            "total": self.total.snapshot()
+        }
+
+
+_stats: Dict[str, _AgentHedgeStats] = {}
+
+# Cancelled losing paths, referenced until they have unwound
+_losers: Set[asyncio.Task] = set()
+
+
+def _agent_stats(agent: str) -> _AgentHedgeStats:
+    stats = _stats.get(agent)
+    if stats is None:
+        stats = _stats[agent] = _AgentHedgeStats()
+    return stats
+
+
+async def run_hedged(
+    agent: str,
+    primary: Callable[[], Awaitable[T]],
+    fallback: Callable[[], Awaitable[T]],
+    mode: Optional[str] = None,
+    delay: Optional[float] = None
+) -> T:
+    """
+    Run an agent's primary path with its fallback hedged according to HEDGE_MODE.
+
+    The first path to return without raising wins and is returned right away;
+    the other is cancelled and left to unwind in the background. A path
+    signals an invalid answer (e.g. unparseable JSON) by raising.
+
+    Args:
+        agent: Agent name for stats and per-agent delay lookup
+        primary: Coroutine factory for the primary path (Fireplexity)
+        fallback: Coroutine factory for the fallback path (Perplexity)
+        mode: "sequential", "delayed" or "parallel" (default: HEDGE_MODE)
+        delay: Seconds before the fallback starts in delayed mode
+               (default: HEDGE_AGENT_DELAYS[agent] or HEDGE_DELAY_SECONDS)
+
+    Returns:
+        Result of the winning path
+
+    Raises:
+        Exception: The fallback's error (or the primary's) when both paths fail
+    """
+    mode = mode or config.HEDGE_MODE
+    if delay is None:
+        delay = config.HEDGE_AGENT_DELAYS.get(agent, config.HEDGE_DELAY_SECONDS)
+    stats = _agent_stats(agent)
+    start_time = time.perf_counter()
+    # The agent's span: the winning path and fallback starts are marked on it
+    agent_span = current_span()
+
+    async def timed(path: str, factory: Callable[[], Awaitable[T]]) -> T:
+        path_start = time.perf_counter()
+        try:
+            with span(f"{agent} {path}", agent=agent, path=path):
+                result = await factory()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.counters[f"{path}_failures"] += 1
+            AGENT_PATH_DURATION.observe(time.perf_counter() - path_start, agent=agent, path=path, outcome="error")
+            raise
+        elapsed = time.perf_counter() - path_start
+        getattr(stats, path).record(elapsed)
+        AGENT_PATH_DURATION.observe(elapsed, agent=agent, path=path, outcome="ok")
+        return result
+
+    tasks: Dict[asyncio.Task, str] = {asyncio.create_task(timed("primary", primary)): "primary"}
+    fallback_started = False
+    errors: Dict[str, BaseException] = {}
+
+    def start_fallback(reason: str):
+        nonlocal fallback_started
+        fallback_started = True
+        logger.info(f"🔀 {agent}: starting fallback ({reason})")
+        if agent_span is not None:
+            agent_span.add_event("fallback started", reason=reason)
+        tasks[asyncio.create_task(timed("fallback", fallback))] = "fallback"
+
+    if mode == "parallel":
+        stats.counters["hedges_started"] += 1
+        start_fallback("parallel mode")
+
+    try:
+        while tasks:
+            timeout = None
+            if mode == "delayed" and not fallback_started:
+                timeout = max(0.0, delay - (time.perf_counter() - start_time))
+
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                stats.counters["hedges_started"] += 1
+                start_fallback(f"primary still running after {delay:.1f}s")
+                continue
+
+            for task in done:
+                path = tasks.pop(task)
+                error = task.exception()
+                if error is None:
+                    elapsed = time.perf_counter() - start_time
+                    stats.counters[f"{path}_wins"] += 1
+                    stats.total.record(elapsed)
+                    if path == "fallback":
+                        AGENT_FALLBACKS.inc(agent=agent, reason="fallback_path")
+                    if agent_span is not None:
+                        agent_span.set_attribute("winning_path", path)
+                        if path == "fallback":
+                            agent_span.set_attribute("fallback", "fallback_path")
+                    logger.info(f"✅ {agent}: {path} path won in {elapsed:.2f}s")
+                    return task.result()
+
+                errors[path] = error
+                logger.warning(f"{agent}: {path} path failed: {str(error)}")
+                if path == "primary" and not fallback_started:
+                    start_fallback("primary failed")
+
+        stats.counters["all_failed"] += 1
+        AGENT_FALLBACKS.inc(agent=agent, reason="all_failed")
+        if agent_span is not None:
+            agent_span.set_attribute("fallback", "all_failed")
+        raise errors.get("fallback") or errors["primary"]
+
+    finally:
+        # Cancel whichever path lost (or everything if we are being cancelled)
+        # without waiting for it to unwind
+        for task, path in tasks.items():
+            stats.counters[f"{path}_cancelled"] += 1
+            _cancel_loser(task)
+
+
+def _cancel_loser(task: asyncio.Task):
+    task.cancel()
+    _losers.add(task)
+    task.add_done_callback(_loser_done)
+
+
+def _loser_done(task: asyncio.Task):
+    _losers.discard(task)
+    # Retrieve the exception so a loser that failed while unwinding is not reported as never retrieved
+    if not task.cancelled():
+        task.exception()
+
+
+def get_hedging_stats() -> Dict:
+    """
+    Per-agent p50/p99 (overall and per path) and outcome counters,
+    for tuning HEDGE_DELAY_SECONDS / HEDGE_AGENT_DELAYS: a delay around the
+    primary path's p95 only hedges the slow tail.
+    """
+    return {
+        "mode": config.HEDGE_MODE,
+        "default_delay_seconds": config.HEDGE_DELAY_SECONDS,
+        "agent_delays": config.HEDGE_AGENT_DELAYS,
+        "agents": {agent: stats.snapshot() for agent, stats in _stats.items()}
+    }
@@ -0,0 +1,309 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from utils.logger import setup_logger
+from utils.metrics import JSON_EXTRACTIONS
+import json
+import re
+
+logger = setup_logger(__name__)
+
+# Per-agent outcomes, exposed through /api/admin/agents
+_extract_stats: Dict[str, Dict[str, int]] = {}
+
+_CLOSERS = {"{": "}", "[": "]"}
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class JsonExtractionError(ValueError):
+    """Raised when no usable JSON object can be recovered from an LLM response"""
+    pass
+
+
+class _Scanner:
+    """
+    Bracket and string state over JSON text.
+
+    Tracks whether the scan is inside a string, the stack of open brackets and
+    the positions of structural commas, so a caller can tell where a top-level
+    object ends or how to close one that was cut off.
+    """
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.start: Optional[int] = None
+        self.cut_points: List[int] = []  # positions just before structural commas
+        self.pos = 0
+
+    def feed(self, text: str) -> Optional[int]:
+        """
+        Scan text from the current position.
+
+        Args:
+            text: Response text
+
+        Returns:
+            Absolute index just past the closing brace of the first top-level
+            object, or None while it is still open (or has not started)
+        """
+        for char in text:
+            index = self.pos
+            self.pos += 1
+            if self.start is None:
+                if char == "{":
+                    self.start = index
+                    self.stack.append(char)
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+            if char == '"':
+                self.in_string = True
+            elif char in _CLOSERS:
+                self.stack.append(char)
+            elif char in "}]":
+                if self.stack:
+                    self.stack.pop()
+                if not self.stack:
+                    return self.pos
+            elif char == ",":
+                self.cut_points.append(index)
+        return None
+
+    def closing(self) -> str:
+        """Suffix that closes the open string and brackets."""
+        return ('"' if self.in_string else "") + "".join(_CLOSERS[opener] for opener in reversed(self.stack))
+
+
+def _outside_strings(text: str, fix: Callable[[str], str]) -> str:
+    """Apply `fix` to the parts of `text` that are not inside JSON strings."""
+    parts = re.split(r'("(?:[^"\\]|\\.)*")', text, flags=re.S)
+    return "".join(part if idx % 2 else fix(part) for idx, part in enumerate(parts))
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix the mistakes LLMs commonly make in JSON.
+
+    Curly quotes used as string delimiters, trailing commas before a closing
+    bracket, and Python True/False/None literals. Curly quotes inside
+    strings are left alone.
+
+    Args:
+        text: JSON-ish text
+
+    Returns:
+        Repaired text (not guaranteed to be valid JSON)
+    """
+    text = re.sub(r'([{\[,:]\s*)[“”]', r'\1"', text)
+    text = re.sub(r'[“”](\s*[:,}\]])', r'"\1', text)
+
+    def fix(part: str) -> str:
+        part = re.sub(r",(\s*[}\]])", r"\1", part)
+        return re.sub(r"\b(True|False|None)\b", lambda m: _PYTHON_LITERALS[m.group(1)], part)
+
+    return _outside_strings(text, fix)
+
+
+def _loads(text: str) -> Tuple[Optional[Any], bool]:
+    """Parse text as is, then repaired. Returns (value or None, repaired)."""
+    try:
+        return json.loads(text, strict=False), False
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(text), strict=False), True
+    except json.JSONDecodeError:
+        return None, True
+
+
+def _candidates(text: str) -> List[str]:
+    """Balanced {...} spans in order of appearance, fenced ```json blocks first."""
+    spans = []
+    fenced = re.findall(r"```(?:json)?\s*(.*?)```", text, flags=re.S | re.I)
+    for source in fenced + [text]:
+        offset = 0
+        while True:
+            start = source.find("{", offset)
+            if start < 0:
+                break
+            end = _Scanner().feed(source[start:])
+            if end is None:
+                spans.append(source[start:])  # unterminated: try it repaired and closed
+                break
+            spans.append(source[start:start + end])
+            offset = start + end
+    return list(dict.fromkeys(spans))
+
+
+def _close_truncated(text: str) -> Optional[Any]:
+    """
+    Parse an object that was cut off, dropping the incomplete last member if needed.
+
+    A string cut off mid-value is never closed and kept: its member is dropped.
+    """
+    scanner = _Scanner()
+    scanner.feed(text)
+    if scanner.start is None:
+        return None
+    if not scanner.in_string:
+        value, _ = _loads(text[scanner.start:] + scanner.closing())
+        if isinstance(value, dict):
+            return value
+    for cut in reversed(scanner.cut_points):
+        head = text[scanner.start:cut]
+        head_scanner = _Scanner()
+        head_scanner.feed(head)
+        value, _ = _loads(head + head_scanner.closing())
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def _drop_nulls(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _drop_nulls(item) for key, item in value.items() if item is not None}
+    if isinstance(value, list):
+        return [_drop_nulls(item) for item in value if item is not None]
+    return value
+
+
+def _validate(value: Dict, model: Optional[Type[BaseModel]]) -> Dict:
+    """Validate against the model; nulls in fields that have defaults are dropped rather than rejected."""
+    if model is None:
+        return value
+    try:
+        return model.model_validate(value).model_dump()
+    except ValidationError:
+        pass
+    try:
+        return model.model_validate(_drop_nulls(value)).model_dump()
+    except ValidationError as e:
+        error = e.errors()[0]
+        raise JsonExtractionError(f"Response does not match {model.__name__}: {error.get('msg')} at {'.'.join(map(str, error.get('loc', ())))}") from e
+
+
+def _record(agent: Optional[str], outcome: str):
+    stats = _extract_stats.setdefault(agent or "unknown", {"parsed": 0, "repaired": 0, "failed": 0})
+    stats[outcome] += 1
+    JSON_EXTRACTIONS.inc(agent=agent or "unknown", outcome=outcome)
+
+
+def extract_json(text: str, model: Optional[Type[BaseModel]] = None, agent: Optional[str] = None) -> Dict:
+    """
+    First JSON object in an LLM response, repaired and validated.
+
+    Handles prose around the object, markdown fences, trailing commas, curly
+    quotes, Python literals and raw newlines in strings. A response cut off
+    mid-object is only accepted if it still validates against `model`.
+
+    Args:
+        text: Raw LLM response
+        model: Pydantic model the object must match (its defaults are filled in)
+        agent: Agent name for stats
+
+    Returns:
+        Parsed dict
+
+    Raises:
+        JsonExtractionError: If no object can be parsed or none matches `model`
+    """
+    error: Optional[JsonExtractionError] = None
+    for candidate in _candidates(text or ""):
+        value, repaired = _loads(candidate)
+        if not isinstance(value, dict):
+            continue
+        try:
+            result = _validate(value, model)
+        except JsonExtractionError as e:
+            error = error or e
+            continue
+        _record(agent, "repaired" if repaired else "parsed")
+        if repaired:
+            logger.info(f"🩹 Repaired malformed JSON in {agent or 'LLM'} response")
+        return result
+
+    if error is None:
+        value = _close_truncated(text or "")
+        if value is not None:
+            try:
+                result = _validate(value, model)
+                _record(agent, "repaired")
+                logger.warning(f"🩹 {agent or 'LLM'} response was truncated - recovered the fields before the cut")
+                return result
+            except JsonExtractionError as e:
+                error = e
+
+    _record(agent, "failed")
+    raise error or JsonExtractionError("No JSON object found in response")
+
+
+class IncrementalJsonParser:
+    """
+    Parse a JSON object from a streamed LLM response as chunks arrive.
+
+    Chunks go through the same _Scanner as extract_json, so feed() returns the
+    object as soon as its closing brace is seen and the caller can stop
+    reading without waiting for trailing prose. If the stream ends first,
+    result() applies the truncation rules of extract_json.
+    """
+
+    def __init__(self, model: Optional[Type[BaseModel]] = None, agent: Optional[str] = None):
+        """
+        Args:
+            model: Pydantic model the object must match
+            agent: Agent name for stats
+        """
+        self.model = model
+        self.agent = agent
+        self.buffer = ""
+        self._scanner = _Scanner()
+        self._value: Optional[Dict] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._value is not None
+
+    def feed(self, chunk: str) -> Optional[Dict]:
+        """
+        Add the next chunk of the response.
+
+        Args:
+            chunk: Streamed text
+
+        Returns:
+            The validated object once the first top-level object has closed, else None
+
+        Raises:
+            JsonExtractionError: If the closed object does not parse or match the model
+        """
+        if self.complete:
+            return None
+        self.buffer += chunk
+        end = self._scanner.feed(chunk)
+        if end is None:
+            return None
+        self._value = extract_json(self.buffer[self._scanner.start:end], self.model, self.agent)
+        return self._value
+
+    def result(self) -> Dict:
+        """
+        Final object once the stream has ended.
+
+        Raises:
+            JsonExtractionError: If no object can be recovered
+        """
+        if self._value is not None:
+            return self._value
+        return extract_json(self.buffer, self.model, self.agent)
+
+
+def get_json_extract_stats() -> Dict:
+    """Per-agent counts of responses parsed as is, parsed after repair, and unusable."""
+    return {agent: dict(stats) for agent, stats in _extract_stats.items()}
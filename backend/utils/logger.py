@@ -1,43 +1,195 @@
+import atexit
+import contextvars
+import json
 import logging
-import sys
-from datetime import datetime
+import logging.handlers
 import os
+import queue
+import sys
+from typing import Any, Dict, Optional
+
+# Console and file levels, e.g. LOG_LEVEL=DEBUG; the file defaults to the console level
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE_LEVEL = os.getenv("LOG_FILE_LEVEL", LOG_LEVEL).upper()
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "14"))  # rotated daily files kept
+LOG_DIR = os.getenv("LOG_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "logs"))
+
+_FORMAT = '%(asctime)s | %(levelname)-8s | %(request_id)s | %(name)s:%(funcName)s:%(lineno)d | %(message)s'
+_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+# One queue per process: loggers only enqueue records, a listener thread does the I/O
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_console_handler: Optional[logging.Handler] = None
+_file_handler: Optional[logging.Handler] = None
+_loggers: Dict[str, logging.Logger] = {}
+
+# Id of the API request (or job) being served, stamped on every record logged for it
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id", default="-")
+
+
+def get_request_id() -> str:
+    """Request id in scope for the running task ("-" outside a request)."""
+    return _request_id.get()
+
+
+def set_request_id(request_id: str) -> contextvars.Token:
+    """
+    Put a request id in scope for this task and the tasks it creates.
+
+    Returns:
+        Token for resetting it (contextvars.ContextVar.reset)
+    """
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token):
+    _request_id.reset(token)
+
+
+class _RequestIdFilter(logging.Filter):
+    """Add the request id in scope; runs in the logging task, before the record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records with the message rendered but without formatting the full line."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks are rendered here, while the frames still exist
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class lazy_json:
+    """
+    Log argument that serializes its value only if the record is emitted.
+
+    Usage: logger.debug("Result: %s", lazy_json(result))
+    """
+
+    __slots__ = ("value", "indent")
+
+    def __init__(self, value: Any, indent: Optional[int] = 2):
+        self.value = value
+        self.indent = indent
+
+    def __str__(self) -> str:
+        return json.dumps(self.value, indent=self.indent, default=str)
+
+
+def _parse_level(level: str) -> int:
+    value = logging.getLevelName(str(level).upper())
+    if not isinstance(value, int):
+        raise ValueError(f"Unknown log level: {level}")
+    return value
+
+
+def _effective_level() -> int:
+    return min(_console_handler.level, _file_handler.level)
+
+
+def _get_queue_handler() -> logging.handlers.QueueHandler:
+    """Create the queue, the console and rotating file handlers and the listener thread on first use."""
+    global _queue_handler, _listener, _console_handler, _file_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    formatter = logging.Formatter(_FORMAT, datefmt=_DATEFMT)
+
+    # Console handler
+    _console_handler = logging.StreamHandler(sys.stdout)
+    _console_handler.setLevel(_parse_level(LOG_LEVEL))
+    _console_handler.setFormatter(formatter)
+
+    # File handler: backend.log, rotated at midnight into backend.log.YYYY-MM-DD
+    os.makedirs(LOG_DIR, exist_ok=True)
+    _file_handler = logging.handlers.TimedRotatingFileHandler(
+        os.path.join(LOG_DIR, "backend.log"),
+        when="midnight",
+        backupCount=LOG_RETENTION_DAYS,
+        encoding="utf-8",
+        delay=True
+    )
+    _file_handler.setLevel(_parse_level(LOG_FILE_LEVEL))
+    _file_handler.setFormatter(formatter)
+
+    _queue_handler = _QueueHandler(queue.SimpleQueue())
+    _queue_handler.addFilter(_RequestIdFilter())
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, _console_handler, _file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+    return _queue_handler
+
 
 def setup_logger(name: str) -> logging.Logger:
     """
-    Set up structured logger with timestamp, level, and module name.
-    Logs to both console and file.
+    Set up structured logger with timestamp, level, request id and module name.
+
+    Records go through a queue to a background thread that writes them to
+    the console and to a daily-rotated file, so logging never blocks the
+    event loop on I/O. The logger's level is the lower of the console and
+    file levels, so disabled debug calls return before building a record.
     """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
 
     # Avoid duplicate handlers
     if logger.handlers:
         return logger
 
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG)
+    logger.addHandler(_get_queue_handler())
+    logger.setLevel(_effective_level())
+    logger.propagate = False
+    _loggers[name] = logger
+    return logger
 
-    # File handler
-    log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
-    os.makedirs(log_dir, exist_ok=True)
 
-    file_handler = logging.FileHandler(
-        os.path.join(log_dir, f"backend_{datetime.now().strftime('%Y%m%d')}.log")
-    )
-    file_handler.setLevel(logging.DEBUG)
+def set_log_level(level: str, file_level: Optional[str] = None) -> Dict[str, str]:
+    """
+    Change log levels at runtime for every logger created by setup_logger.
 
-    # Format with timestamp, level, module, function, line number
-    formatter = logging.Formatter(
-        '%(asctime)s | %(levelname)-8s | %(name)s:%(funcName)s:%(lineno)d | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    Args:
+        level: Console level (DEBUG, INFO, WARNING, ERROR)
+        file_level: File level (default: same as the console)
 
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
+    Returns:
+        The levels now in effect
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    Raises:
+        ValueError: If a level name is unknown
+    """
+    _get_queue_handler()
+    console_level = _parse_level(level)
+    log_file_level = _parse_level(file_level or level)
+    _console_handler.setLevel(console_level)
+    _file_handler.setLevel(log_file_level)
+    for logger in _loggers.values():
+        logger.setLevel(_effective_level())
+    return get_log_levels()
 
-    return logger
+
+def get_log_levels() -> Dict[str, str]:
+    """Current console and file levels."""
+    _get_queue_handler()
+    return {
+        "console": logging.getLevelName(_console_handler.level),
+        "file": logging.getLevelName(_file_handler.level)
+    }
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread (called at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,197 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import threading
+
+# Seconds, from a cached lookup up to a full analysis
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 240)
+# Response sizes, from an error body up to a large scraped page
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base for a labelled metric family rendered in the Prometheus text format."""
+
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram per label set; observe() is one bisect and three additions."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        lines = self._header()
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def provider_status(status_code: Optional[int] = None, error: Optional[BaseException] = None) -> str:
+    """
+    Status label for an outbound call: the HTTP status code, or the error kind.
+
+    Args:
+        status_code: HTTP status of the response, if one arrived
+        error: Exception raised instead of a response
+
+    Returns:
+        "200", "429", "timeout", "error", ...
+    """
+    if status_code is not None:
+        return str(status_code)
+    if isinstance(error, TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout"
+    return "error"
+
+
+# Workflow
+STAGE_DURATION = Histogram(
+    "investigate_stage_duration_seconds",
+    "Workflow stage duration (collect_data, retrieve_sources, analyze_agents, synthesize)",
+    ["stage"]
+)
+ANALYSIS_DURATION = Histogram(
+    "investigate_analysis_duration_seconds",
+    "End-to-end analysis duration until the result; outcome is complete or deep_research_pending",
+    ["outcome"]
+)
+
+# Agents
+AGENT_DURATION = Histogram(
+    "investigate_agent_duration_seconds",
+    "Agent duration within the workflow; outcome is ok or deadline (fallback result used)",
+    ["agent", "outcome"]
+)
+AGENT_PATH_DURATION = Histogram(
+    "investigate_agent_path_duration_seconds",
+    "Duration of an agent's primary (Fireplexity) or fallback (Perplexity) path; outcome is ok or error",
+    ["agent", "path", "outcome"]
+)
+AGENT_FALLBACKS = Counter(
+    "investigate_agent_fallbacks_total",
+    "Agent results not produced by the primary path: fallback_path won, all_failed (default result), deadline or error",
+    ["agent", "reason"]
+)
+JSON_EXTRACTIONS = Counter(
+    "investigate_llm_json_extractions_total",
+    "LLM responses by JSON extraction outcome: parsed, repaired or failed",
+    ["agent", "outcome"]
+)
+
+# Outbound providers
+PROVIDER_REQUEST_DURATION = Histogram(
+    "investigate_provider_request_duration_seconds",
+    "Outbound provider call duration (excluding rate-limit waits) by provider and HTTP status or error kind",
+    ["provider", "status"]
+)
+PROVIDER_RESPONSE_BYTES = Histogram(
+    "investigate_provider_response_bytes",
+    "Outbound provider response body size",
+    ["provider"],
+    buckets=BYTES_BUCKETS
+)
+PROVIDER_TOKENS = Counter(
+    "investigate_provider_tokens_total",
+    "Perplexity tokens by model, calling stage or agent, and type (prompt or completion)",
+    ["provider", "agent", "type"]
+)
+PROVIDER_COST = Counter(
+    "investigate_provider_cost_usd_total",
+    "Estimated provider spend in USD (Firecrawl credits and Perplexity tokens and request fees) by calling stage or agent",
+    ["provider", "agent"]
+)
@@ -0,0 +1,327 @@
+from typing import Any, Dict, Iterable, List, Optional, Set
+from config import config
+from utils.logger import setup_logger
+from utils.urls import normalize_url
+import json
+import re
+
+logger = setup_logger(__name__)
+
+# tiktoken is optional; without it (or before its BPE file is loaded) tokens are estimated as chars / 4
+_TIKTOKEN_ENCODING = "cl100k_base"
+_encoding = None
+
+# Paragraphs shorter than this are never treated as duplicates (headings, "Read more", ...)
+_MIN_DEDUPE_CHARS = 40
+
+# Per-agent prompt sizes, exposed through /api/admin/agents
+_prompt_stats: Dict[str, Dict[str, int]] = {}
+
+
+def load_tokenizer() -> bool:
+    """
+    Load the tiktoken encoding used by count_tokens().
+
+    Blocking (tiktoken may download its BPE file on first use), so it is run in a
+    worker thread at startup; prompts built before it finishes use the estimate.
+
+    Returns:
+        True if tiktoken is available
+    """
+    global _encoding
+    if _encoding is not None:
+        return True
+    try:
+        import tiktoken
+        _encoding = tiktoken.get_encoding(_TIKTOKEN_ENCODING)
+        logger.info(f"Prompt token counting with tiktoken ({_TIKTOKEN_ENCODING})")
+        return True
+    except Exception as e:  # not installed, or the encoding can't be fetched
+        logger.info(f"tiktoken unavailable ({type(e).__name__}) - estimating prompt tokens as chars / 4")
+        return False
+
+
+def count_tokens(text: str) -> int:
+    """
+    Local token count for a prompt (an estimate of the provider's own count).
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Number of tokens
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+def _prune(value: Any) -> Any:
+    """Drop None and empty strings, lists and dicts, recursively."""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, (list, tuple)):
+        pruned = [_prune(item) for item in value]
+        return [item for item in pruned if item not in (None, "", [], {})]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def compact_json(value: Any) -> str:
+    """
+    Serialize data for a prompt: no indentation or spaces, empty fields dropped.
+
+    Args:
+        value: JSON-serializable data
+
+    Returns:
+        Compact JSON string
+    """
+    return json.dumps(_prune(value), separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _strings(value: Any) -> Iterable[str]:
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+    elif isinstance(value, str):
+        yield value
+
+
+class _JsonSection:
+    """Structured data; trimmed by dropping the last item of its longest list, then shortening long strings."""
+
+    def __init__(self, value: Any, priority: Optional[int]):
+        self.value = _prune(value)
+        self.priority = priority
+
+    def text(self) -> str:
+        return compact_json(self.value)
+
+    def trim(self) -> bool:
+        lists = [item for item in self._containers(self.value) if isinstance(item, list) and item]
+        if lists:
+            max(lists, key=lambda item: len(compact_json(item))).pop()
+            return True
+        longest = None
+        for container, key in self._string_slots(self.value):
+            if longest is None or len(container[key]) > len(longest[0][longest[1]]):
+                longest = (container, key)
+        if longest is not None and len(longest[0][longest[1]]) > 80:
+            container, key = longest
+            container[key] = container[key][:len(container[key]) // 2].rstrip() + "…"
+            return True
+        return False
+
+    def _containers(self, value: Any) -> Iterable[Any]:
+        if isinstance(value, (dict, list)):
+            yield value
+            for item in (value.values() if isinstance(value, dict) else value):
+                yield from self._containers(item)
+
+    def _string_slots(self, value: Any) -> Iterable[tuple]:
+        for container in self._containers(value):
+            keys = container.keys() if isinstance(container, dict) else range(len(container))
+            for key in keys:
+                if isinstance(container[key], str):
+                    yield container, key
+
+
+class _SourcesSection:
+    """Ranked web sources; trimmed from the lowest-ranked source up, the last one by shortening it."""
+
+    def __init__(self, items: List[Dict[str, str]], priority: Optional[int], show_urls: bool):
+        self.items = items
+        self.priority = priority
+        self.show_urls = show_urls
+
+    def text(self) -> str:
+        blocks = []
+        for idx, item in enumerate(self.items, 1):
+            header = f"[{idx}] {item['title']}"
+            if self.show_urls and item["url"]:
+                header += f" ({item['url']})"
+            blocks.append(f"{header}\n{item['content']}")
+        return "\n\n".join(blocks)
+
+    def trim(self) -> bool:
+        if len(self.items) > 1:
+            self.items.pop()
+            return True
+        if self.items and len(self.items[0]["content"]) > 200:
+            content = self.items[0]["content"]
+            self.items[0]["content"] = content[:len(content) // 2].rstrip() + "…"
+            return True
+        return False
+
+
+class PromptBuilder:
+    """
+    Builds one agent prompt from named context sections within a token budget.
+
+    Data is serialized with compact_json() and web sources are deduplicated as
+    they are added: pages already in the prompt (e.g. the Crunchbase profile,
+    whose data is its own section) are skipped, and paragraphs that repeat
+    earlier sections or sources (shared boilerplate, copied descriptions) are
+    dropped. If the rendered prompt is still over budget, the lowest-priority
+    sections are trimmed first, lowest-ranked content first.
+
+    Example:
+        builder = PromptBuilder("team")
+        builder.add_json("company_data", data.get("crunchbase", {}), priority=2)
+        builder.add_sources("sources", all_sources, max_chars=1000, priority=1)
+        prompt = builder.render(TEMPLATE, company_name=company_name)
+    """
+
+    def __init__(self, agent: str, budget: Optional[int] = None):
+        """
+        Args:
+            agent: Agent name (for PROMPT_TOKEN_BUDGETS, logs and stats)
+            budget: Token budget (default: PROMPT_TOKEN_BUDGETS[agent] or PROMPT_TOKEN_BUDGET_DEFAULT)
+        """
+        self.agent = agent
+        self.budget = int(budget if budget is not None else config.PROMPT_TOKEN_BUDGETS.get(agent, config.PROMPT_TOKEN_BUDGET_DEFAULT))
+        self._sections: Dict[str, Any] = {}
+        self._seen_text: Set[str] = set()
+        self._seen_urls: Set[str] = set()
+
+    def add_json(self, name: str, value: Any, priority: Optional[int] = None, drop_keys: Iterable[str] = ()) -> "PromptBuilder":
+        """
+        Add structured data as compact JSON.
+
+        Args:
+            name: Placeholder name in the template
+            value: JSON-serializable data
+            priority: Trim order, lowest first (None = never trimmed)
+            drop_keys: Top-level keys to leave out (already stated elsewhere in the prompt)
+
+        Returns:
+            self
+        """
+        if isinstance(value, dict) and drop_keys:
+            value = {key: item for key, item in value.items() if key not in set(drop_keys)}
+        section = _JsonSection(value, priority)
+        for text in _strings(section.value):
+            if text.startswith(("http://", "https://")):
+                self._seen_urls.add(normalize_url(text))
+            elif len(text) >= _MIN_DEDUPE_CHARS:
+                self._seen_text.add(_normalize_text(text))
+        self._sections[name] = section
+        return self
+
+    def add_sources(
+        self,
+        name: str,
+        sources: List[Dict],
+        max_chars: int = 1000,
+        limit: int = 5,
+        priority: Optional[int] = 0,
+        show_urls: bool = False
+    ) -> "PromptBuilder":
+        """
+        Add ranked web sources as "[n] title\\ncontent" blocks.
+
+        Sources already in the prompt and duplicate paragraphs are dropped before
+        each source is cut to `max_chars`, so the space goes to new content.
+
+        Args:
+            name: Placeholder name in the template
+            sources: Ranked search result dicts (url, title, markdown/content/description)
+            max_chars: Content kept per source
+            limit: Sources kept
+            priority: Trim order, lowest first (None = never trimmed)
+            show_urls: Put each source's URL after its title
+
+        Returns:
+            self
+        """
+        items = []
+        for source in sources:
+            if len(items) >= limit:
+                break
+            url = source.get("url", "")
+            url_key = normalize_url(url)
+            if url_key and url_key in self._seen_urls:
+                continue
+            content = source.get("markdown") or source.get("content") or source.get("description") or ""
+            paragraphs = []
+            for paragraph in re.split(r"\n\s*\n", content):
+                key = _normalize_text(paragraph)
+                if not key or (len(key) >= _MIN_DEDUPE_CHARS and key in self._seen_text):
+                    continue
+                if len(key) >= _MIN_DEDUPE_CHARS:
+                    self._seen_text.add(key)
+                paragraphs.append(paragraph.strip())
+            content = "\n\n".join(paragraphs)[:max_chars]
+            if not content:
+                continue
+            if url_key:
+                self._seen_urls.add(url_key)
+            items.append({"title": source.get("title") or "No title", "url": url, "content": content})
+        self._sections[name] = _SourcesSection(items, priority, show_urls)
+        return self
+
+    def render(self, template: str, **fixed: str) -> str:
+        """
+        Fill the template and trim it to the token budget.
+
+        Args:
+            template: Prompt with {name} placeholders for the sections and fixed
+                      values (literal braces doubled, as in an f-string)
+            **fixed: Values that are never trimmed (company name, ...)
+
+        Returns:
+            Prompt text
+        """
+        prompt = self._fill(template, fixed)
+        tokens_before = tokens = count_tokens(prompt)
+        trims = 0
+        trimmable = sorted(
+            (section for section in self._sections.values() if section.priority is not None),
+            key=lambda section: section.priority
+        )
+        while tokens > self.budget:
+            if not any(section.trim() for section in trimmable):
+                break
+            trims += 1
+            prompt = self._fill(template, fixed)
+            tokens = count_tokens(prompt)
+
+        stats = _prompt_stats.setdefault(self.agent, {"prompts": 0, "trimmed": 0, "tokens_before": 0, "tokens_after": 0})
+        stats["prompts"] += 1
+        stats["trimmed"] += 1 if trims else 0
+        stats["tokens_before"] += tokens_before
+        stats["tokens_after"] += tokens
+
+        if trims:
+            logger.info(f"✂️  {self.agent} prompt: {tokens_before} → {tokens} tokens (budget {self.budget}, {trims} trims)")
+        else:
+            logger.info(f"🧮 {self.agent} prompt: {tokens} tokens (budget {self.budget})")
+        if tokens > self.budget:
+            logger.warning(f"⚠️  {self.agent} prompt still over budget after trimming ({tokens} > {self.budget} tokens)")
+        return prompt
+
+    def _fill(self, template: str, fixed: Dict[str, str]) -> str:
+        return template.format(**fixed, **{name: section.text() for name, section in self._sections.items()})
+
+
+def get_prompt_stats() -> Dict:
+    """Per-agent prompt counts, how many were trimmed, and average tokens before/after trimming."""
+    return {
+        agent: {
+            "prompts": stats["prompts"],
+            "trimmed": stats["trimmed"],
+            "avg_tokens_before": round(stats["tokens_before"] / stats["prompts"]),
+            "avg_tokens_after": round(stats["tokens_after"] / stats["prompts"])
+        }
+        for agent, stats in _prompt_stats.items()
+    }
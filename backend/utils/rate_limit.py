@@ -0,0 +1,101 @@
+from typing import Dict
+from utils.stats import LatencyStats
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second refill up to `capacity`.
+
+    acquire() waits until enough tokens are available. Waiters are served in
+    arrival order, so a burst is smoothed to the refill rate instead of
+    stampeding once tokens return. pause() empties the bucket and holds every
+    acquirer for a while (e.g. after a 429). A rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, name: str, rate: float, capacity: float):
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.wait_time = LatencyStats()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def _refill(self):
+        now = time.monotonic()
+        if now < self._updated:
+            return  # paused
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Take tokens from the bucket, waiting for a refill if necessary.
+
+        Args:
+            tokens: Number of tokens to take
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.unlimited and time.monotonic() >= self._paused_until:
+            self.acquired += 1
+            return 0.0
+
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            async with self._lock:
+                while True:
+                    paused_for = self._paused_until - time.monotonic()
+                    if paused_for > 0:
+                        await asyncio.sleep(paused_for)
+                        continue
+                    if self.unlimited:
+                        break
+                    self._refill()
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        break
+                    await asyncio.sleep((tokens - self._tokens) / self.rate)
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - start
+        self.acquired += 1
+        self.wait_time.record(waited)
+        return waited
+
+    def pause(self, seconds: float):
+        """
+        Hold all acquirers for `seconds` and restart from an empty bucket.
+
+        Args:
+            seconds: How long to stop handing out tokens
+        """
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+    def stats(self) -> Dict:
+        if not self.unlimited:
+            self._refill()
+        return {
+            "rate_per_second": self.rate,
+            "capacity": self.capacity,
+            "available": None if self.unlimited else round(self._tokens, 2),
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "wait_time": self.wait_time.snapshot()
+        }
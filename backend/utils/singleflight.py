@@ -0,0 +1,125 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from utils.deadline import DeadlineExceeded, current_deadline
+from utils.logger import setup_logger
+from utils.tracing import current_span
+import asyncio
+
+logger = setup_logger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight call and the number of callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key onto a single in-flight task.
+
+    The first caller for a key starts the work; callers arriving while it runs
+    await the same result (or exception). The work is only cancelled when every
+    caller waiting on it has given up (been cancelled or run out of time).
+
+    The shared task runs in the leader's context: its deadline, cassette,
+    usage ledger and trace span. Each caller still waits at most until its own
+    deadline (DeadlineExceeded), and `on_shared` lets a follower account for
+    the result in its own context (e.g. its usage ledger). What stays with the
+    leader: the provider call's span and cassette entry, and a shared call
+    can fail on the leader's (shorter) deadline. Provider calls go through
+    services.cassette.shared_call, which copies the leader's cassette entries
+    to the followers'.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self.leaders = 0
+        self.followers = 0
+        _groups.append(self)
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        on_shared: Optional[Callable[[T], Any]] = None
+    ) -> T:
+        """
+        Run fn() once per key among concurrent callers.
+
+        Args:
+            key: Identity of the work (e.g. normalized URL or payload hash)
+            fn: Zero-argument coroutine factory, only called by the first caller
+            on_shared: Called with the result by callers that joined another
+                       caller's call, in their own context
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            DeadlineExceeded: If the caller's deadline passes before the shared call finishes
+        """
+        call = self._calls.get(key)
+        leader = call is None
+        if leader:
+            call = _Call(asyncio.create_task(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task, key=key: self._forget(key, task))
+            self.leaders += 1
+        else:
+            self.followers += 1
+            logger.info(f"🔗 {self.name}: joining in-flight call ({call.waiters} already waiting)")
+            span = current_span()
+            if span is not None:
+                span.add_event("joined in-flight call", group=self.name)
+
+        deadline = current_deadline()
+        call.waiters += 1
+        try:
+            result = await asyncio.wait_for(
+                asyncio.shield(call.task), timeout=deadline.remaining() if deadline is not None else None
+            )
+        except (asyncio.CancelledError, asyncio.TimeoutError) as e:
+            if call.waiters == 1 and not call.task.done():
+                logger.debug(f"{self.name}: last waiter gave up, cancelling shared call")
+                call.task.cancel()
+            if isinstance(e, asyncio.TimeoutError) and not call.task.done():
+                raise DeadlineExceeded(f"{self.name}: deadline {deadline.name} passed waiting for in-flight call") from None
+            raise
+        finally:
+            call.waiters -= 1
+        if not leader and on_shared is not None:
+            on_shared(result)
+        return result
+
+    def in_flight(self, key: str) -> bool:
+        """Whether a call for `key` is running (a do() now would join it)."""
+        return key in self._calls
+
+    def _forget(self, key: str, task: asyncio.Task):
+        current = self._calls.get(key)
+        if current is not None and current.task is task:
+            del self._calls[key]
+        # Retrieve the exception so an unobserved failure is not reported as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers
+        }
+
+
+# Every group registers itself here so one endpoint can report them all
+_groups: List[SingleFlight] = []
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """Coalescing counters for every single-flight group, keyed by group name."""
+    return {group.name: group.stats() for group in _groups}
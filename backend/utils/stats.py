@@ -0,0 +1,58 @@
+from collections import deque
+from typing import Dict, Optional
+import math
+import threading
+
+class LatencyStats:
+    """
+    Rolling latency recorder.
+
+    Keeps lifetime count/total/max plus the most recent samples for percentiles,
+    so memory stays bounded no matter how long the process runs.
+    """
+
+    def __init__(self, window: int = 1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Record one latency sample in seconds."""
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """
+        Percentile over the recent window (nearest-rank).
+
+        Args:
+            pct: Percentile in 0-100
+
+        Returns:
+            Latency in seconds, or None when no samples were recorded
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(0, min(len(samples) - 1, math.ceil(pct / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def snapshot(self) -> Dict:
+        """Summary dict for stats endpoints."""
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        p99 = self.percentile(99)
+        return {
+            "count": self.count,
+            "mean_seconds": round(self.total / self.count, 4) if self.count else None,
+            "p50_seconds": round(p50, 4) if p50 is not None else None,
+            "p95_seconds": round(p95, 4) if p95 is not None else None,
+            "p99_seconds": round(p99, 4) if p99 is not None else None,
+            "max_seconds": round(self.max, 4)
+        }
@@ -0,0 +1,366 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from config import config
+from utils.logger import setup_logger, set_request_id, reset_request_id
+import asyncio
+import atexit
+import json
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import uuid
+
+logger = setup_logger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Counters, exposed through /api/admin/tracing
+_trace_stats = {"spans_started": 0, "spans_exported": 0, "spans_dropped": 0, "export_errors": 0}
+
+
+def _attribute_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: Dict[str, Any]) -> List[Dict]:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """
+    One timed operation in a trace, exported in the OTLP JSON format.
+
+    Spans are created with span() (which also makes them current, so calls
+    made inside become children) or record_span() for calls that are timed
+    by their caller.
+    """
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "events", "status", "status_message")
+
+    def __init__(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        trace_id: Optional[str] = None,
+        parent_id: Optional[str] = None,
+        start_ns: Optional[int] = None,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        _trace_stats["spans_started"] += 1
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any):
+        self.events.append({"timeUnixNano": str(time.time_ns()), "name": name, "attributes": _attributes(attributes)})
+
+    def record_error(self, error: BaseException):
+        """Mark the span failed and attach the exception as an event."""
+        self.status = STATUS_ERROR
+        self.status_message = str(error)[:500]
+        self.attributes["error.type"] = type(error).__name__
+        self.add_event("exception", **{"exception.type": type(error).__name__, "exception.message": str(error)[:500]})
+
+    def end(self, end_ns: Optional[int] = None):
+        """Finish the span and queue it for export (once)."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        if config.TRACE_EXPORTER != "none":
+            _get_exporter().submit(self)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})}
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """The span in scope for the running task, if any."""
+    return _current_span.get()
+
+
+def _new_span(
+    name: str, kind: int, remote_parent: Optional[Tuple[str, str]], start_ns: Optional[int], attributes: Dict[str, Any]
+) -> Span:
+    parent = _current_span.get()
+    if parent is not None:
+        return Span(name, kind, parent.trace_id, parent.span_id, start_ns, attributes)
+    if remote_parent is not None:
+        return Span(name, kind, remote_parent[0], remote_parent[1], start_ns, attributes)
+    return Span(name, kind, start_ns=start_ns, attributes=attributes)
+
+
+@contextmanager
+def span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    remote_parent: Optional[Tuple[str, str]] = None,
+    **attributes: Any
+) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span and make it current inside.
+
+    The span is in scope for tasks created inside the block, so concurrent
+    agents and their outbound calls nest under it. An exception marks it
+    failed; cancellation (e.g. the losing hedged path) marks it cancelled.
+
+    Args:
+        name: Span name ("collect_data", "agent traction", ...)
+        kind: SPAN_KIND_INTERNAL, SPAN_KIND_SERVER or SPAN_KIND_CLIENT
+        remote_parent: (trace id, span id) from an incoming traceparent, used
+                       when no span is current
+        **attributes: Span attributes (None values are left out)
+    """
+    current = _new_span(name, kind, remote_parent, None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except asyncio.CancelledError:
+        current.set_attribute("cancelled", True)
+        raise
+    except BaseException as e:
+        current.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def record_span(
+    name: str,
+    duration: float,
+    kind: int = SPAN_KIND_CLIENT,
+    error: Optional[BaseException] = None,
+    failed: bool = False,
+    **attributes: Any
+) -> Span:
+    """
+    Record an already finished call (ending now) as a child of the current span.
+
+    Args:
+        name: Span name
+        duration: Seconds the call took
+        kind: Span kind (default: client call)
+        error: Exception the call raised, if any
+        failed: Mark the span failed without an exception (e.g. an HTTP error status)
+        **attributes: Span attributes (None values are left out)
+
+    Returns:
+        The finished span
+    """
+    end_ns = time.time_ns()
+    finished = _new_span(name, kind, None, end_ns - int(duration * 1e9), attributes)
+    if error is not None:
+        finished.record_error(error)
+    elif failed:
+        finished.status = STATUS_ERROR
+    finished.end(end_ns)
+    return finished
+
+
+class _SpanExporter:
+    """
+    Background thread that batches finished spans and writes them as OTLP JSON.
+
+    TRACE_EXPORTER=file appends one ExportTraceServiceRequest per line to
+    TRACE_FILE (the OpenTelemetry Collector's otlpjsonfile format);
+    TRACE_EXPORTER=otlp posts it to TRACE_OTLP_ENDPOINT (OTLP/HTTP JSON).
+    Spans are dropped rather than queued without bound if export falls behind.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=config.TRACE_QUEUE_MAX)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._client = None
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def submit(self, finished: Span):
+        try:
+            self._queue.put_nowait(finished)
+        except queue.Full:
+            _trace_stats["spans_dropped"] += 1
+
+    def stop(self):
+        """Export what is queued and stop the thread (called at exit)."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch: List[Span] = []
+            deadline = time.monotonic() + config.TRACE_EXPORT_INTERVAL_SECONDS
+            while len(batch) < 512:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            if batch:
+                self._export(batch)
+
+    def _export(self, batch: List[Span]):
+        request = {"resourceSpans": [{
+            "resource": {"attributes": _attributes({"service.name": config.TRACE_SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "investigate"}, "spans": [item.to_otlp() for item in batch]}]
+        }]}
+        try:
+            if config.TRACE_EXPORTER == "otlp":
+                if self._client is None:
+                    import httpx
+                    self._client = httpx.Client(timeout=5)
+                response = self._client.post(config.TRACE_OTLP_ENDPOINT, json=request)
+                response.raise_for_status()
+            else:
+                os.makedirs(os.path.dirname(os.path.abspath(config.TRACE_FILE)), exist_ok=True)
+                with open(config.TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(request, separators=(",", ":"), default=str) + "\n")
+            _trace_stats["spans_exported"] += len(batch)
+        except Exception as e:
+            _trace_stats["export_errors"] += 1
+            _trace_stats["spans_dropped"] += len(batch)
+            logger.warning(f"⚠️  Span export to {config.TRACE_EXPORTER} failed ({len(batch)} spans dropped): {str(e)}")
+
+
+_exporter: Optional[_SpanExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _get_exporter() -> _SpanExporter:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = _SpanExporter()
+    return _exporter
+
+
+def _parse_traceparent(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    return (match.group(1), match.group(2)) if match else None
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: a request id for every request and a root span per API request.
+
+    The id comes from the X-Request-ID header (or is generated), is stamped on
+    every log line written while serving the request and is echoed back. API
+    requests (/api/...) get a server span, continuing the caller's trace if
+    it sent a traceparent header; the response carries the span's traceparent.
+    """
+
+    def __init__(self, app, traced_prefix: str = "/api/"):
+        self.app = app
+        self.traced_prefix = traced_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        request_id = headers.get("x-request-id", "")
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex[:16]
+        token = set_request_id(request_id)
+        response_status = {"code": 500}
+        root: Optional[Span] = None
+
+        async def send_with_ids(message):
+            if message["type"] == "http.response.start":
+                response_status["code"] = message["status"]
+                extra = [(b"x-request-id", request_id.encode("latin-1"))]
+                if root is not None:
+                    extra.append((b"traceparent", root.traceparent.encode("latin-1")))
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        try:
+            if not scope["path"].startswith(self.traced_prefix):
+                await self.app(scope, receive, send_with_ids)
+                return
+            method = scope.get("method", "GET")
+            with span(
+                f"{method} {scope['path']}",
+                kind=SPAN_KIND_SERVER,
+                remote_parent=_parse_traceparent(headers.get("traceparent")),
+                **{"http.request.method": method, "url.path": scope["path"], "request.id": request_id}
+            ) as root:
+                try:
+                    await self.app(scope, receive, send_with_ids)
+                finally:
+                    route = scope.get("route")
+                    if route is not None and getattr(route, "path", None):
+                        root.name = f"{method} {route.path}"  # template, e.g. /api/jobs/{job_id}
+                    root.set_attribute("http.response.status_code", response_status["code"])
+                    if response_status["code"] >= 500:
+                        root.status = STATUS_ERROR
+        finally:
+            reset_request_id(token)
+
+
+def get_tracing_stats() -> Dict:
+    """Exporter settings and span counters."""
+    return {
+        "exporter": config.TRACE_EXPORTER,
+        "target": config.TRACE_OTLP_ENDPOINT if config.TRACE_EXPORTER == "otlp" else config.TRACE_FILE,
+        **_trace_stats
+    }
@@ -0,0 +1,68 @@
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# Query parameters that never change page content
+_TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "ref", "gclid", "fbclid"}
+
+# Second-level labels under country TLDs that are registries, not names ("acme.co.uk", "acme.com.au")
+_SECOND_LEVEL_DOMAINS = {"co", "com", "org", "net", "ac", "gov", "edu"}
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for cache keys and deduplication.
+
+    Lowercases scheme and host, drops "www.", fragments, tracking parameters
+    and trailing slashes, and sorts the remaining query parameters.
+
+    Args:
+        url: Any http(s) URL, with or without scheme
+
+    Returns:
+        Normalized URL string
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = f"https://{url}"
+
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host if not parsed.port or parsed.port in (80, 443) else f"{host}:{parsed.port}"
+
+    path = parsed.path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS
+    ))
+    return urlunparse(((parsed.scheme or "https").lower(), netloc, path, "", query, ""))
+
+def company_name_from_urls(company_url: str, crunchbase_url: str = "") -> str:
+    """
+    Best-effort company name from its URLs, available before any scraping.
+
+    Prefers the Crunchbase organization slug ("/organization/acme-robotics" ->
+    "Acme Robotics") and falls back to the website's domain ("acme.io" -> "Acme").
+
+    Args:
+        company_url: Company website URL
+        crunchbase_url: Crunchbase profile URL
+
+    Returns:
+        Title-cased name, or "Unknown Company" if neither URL yields one
+    """
+    parsed = urlparse(normalize_url(crunchbase_url))
+    if parsed.netloc.endswith("crunchbase.com"):
+        parts = [part for part in parsed.path.split("/") if part]
+        if len(parts) >= 2 and parts[0] == "organization":
+            return parts[1].replace("-", " ").title()
+
+    host = urlparse(normalize_url(company_url)).hostname or ""
+    labels = host.split(".")
+    if len(labels) >= 2:
+        # "acme.co.uk" -> "acme", "app.acme.io" -> "acme", "app.xyz.ai" -> "xyz"
+        country_sld = len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_DOMAINS
+        name = labels[-3] if country_sld else labels[-2]
+        return name.replace("-", " ").title()
+    return "Unknown Company"